@@ -7,6 +7,7 @@ export async function GET(request: Request) {
     const source = searchParams.get('source')
     const availability = searchParams.get('availability')
     const limit = searchParams.get('limit')
+    const hideDuplicates = searchParams.get('hide_duplicates') === 'true'
 
     let query = 'SELECT * FROM watch_listings WHERE 1=1'
     const params: any[] = []
@@ -20,6 +21,10 @@ export async function GET(request: Request) {
       query += ` AND availability = $${paramIndex++}`
       params.push(availability)
     }
+    if (hideDuplicates) {
+      // Cross-source duplicates point to their cluster's canonical listing (migration 012)
+      query += ' AND canonical_id IS NULL'
+    }
 
     query += ' ORDER BY date_found DESC'
 
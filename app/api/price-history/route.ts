@@ -0,0 +1,29 @@
+import { sql } from '@vercel/postgres'
+import { NextResponse } from 'next/server'
+
+// Price series of a listing (?listing_id=) or of a reference across sources (?reference=),
+// daily rollups for compacted days followed by raw observations (migrations/010)
+export async function GET(request: Request) {
+  try {
+    const { searchParams } = new URL(request.url)
+    const listingId = searchParams.get('listing_id')
+    const reference = searchParams.get('reference')
+    const days = searchParams.get('days')
+
+    if (!listingId && !reference) {
+      return NextResponse.json({ error: 'listing_id or reference required' }, { status: 400 })
+    }
+
+    if (days !== null && !/^[1-9]\d*$/.test(days)) {
+      return NextResponse.json({ error: 'days must be a positive integer' }, { status: 400 })
+    }
+
+    const since = days ? new Date(Date.now() - parseInt(days, 10) * 86400000).toISOString() : null
+    const { rows } = await sql`
+      SELECT * FROM watch_price_series(${listingId}::uuid, ${reference}, ${since}::timestamp)
+    `
+    return NextResponse.json(rows)
+  } catch (error: any) {
+    return NextResponse.json({ error: error.message }, { status: 500 })
+  }
+}
@@ -1,18 +1,35 @@
 """
 Availability checker - marks listings as sold if no longer available
 Runs hourly at :30 (offset from main search)
+
+With sold inference (SOLD_INFERENCE, migration 007) only listings the search
+flagged as probably sold - or that no complete crawl has seen for a while -
+get a detail-page check; otherwise every Available listing is checked.
+
+Listings are grouped by source: each source gets one scraper that checks all
+of its listings, and sources are checked in parallel. Request spacing per
+domain is enforced by the shared rate limiter, and at most
+AVAILABILITY_PER_HOST sources of one domain are checked at the same time.
 """
 import os
 import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from core.supabase_client import SupabaseClient
-from scrapers import CustomScraperLoader
+from core.supabase_client import SupabaseClient, parse_timestamp
+from core.availability_writer import AvailabilityWriter
+from core.availability_scheduler import AvailabilityPlanner
+from scrapers import CustomScraperLoader, ScraperCache
 from utils import setup_logger
+from utils.sharding import source_domain
 
 # Load environment variables
 load_dotenv()
@@ -24,15 +41,48 @@ logger = setup_logger('availability_checker', 'availability_check.log')
 class AvailabilityChecker:
     """Check if available listings are still active"""
 
-    def __init__(self):
-        """Initialize Supabase client"""
-        self.db = SupabaseClient()
+    def __init__(
+        self,
+        db: SupabaseClient = None,
+        scrapers: ScraperCache = None,
+        stop_event: threading.Event = None
+    ):
+        """
+        Initialize Supabase client
+
+        Args:
+            db: Supabase client (default: new client)
+            scrapers: Scraper cache of a long-running process - scrapers stay open
+            stop_event: Set to stop checking further listings
+        """
+        self.db = db or SupabaseClient()
+        self.scrapers = scrapers
+        self.stop_event = stop_event or threading.Event()
+        self.workers = int(os.getenv('AVAILABILITY_WORKERS', '8'))
+        # Each Dynamic source holds a Chrome instance while it is checked
+        self.browsers = threading.Semaphore(int(os.getenv('AVAILABILITY_MAX_BROWSERS', '2')))
+        # Sources sharing a domain don't multiply its in-flight requests
+        self.per_host = max(1, int(os.getenv('AVAILABILITY_PER_HOST', '1')))
+        self.hosts: Dict[str, threading.Semaphore] = defaultdict(lambda: threading.Semaphore(self.per_host))
         self.stats = {
             'checked': 0,
             'still_available': 0,
             'marked_sold': 0,
-            'errors': 0
+            'errors': 0,
+            'skipped': 0,
+            'db_writes': 0,
+            'checks_per_second': 0.0,
+            'candidates': 0,
+            'detection_hours': 0.0
         }
+        # Hours between previous check and detection of each sale found
+        self.detection_hours: List[float] = []
+        self.source_stats: Dict[str, Dict[str, Any]] = {}
+        self.sold_inference = os.getenv('SOLD_INFERENCE', 'true').lower() == 'true'
+        self.recheck_hours = float(os.getenv('AVAILABILITY_RECHECK_HOURS', '24'))
+        # Status updates are written in batches per status
+        self.writer = AvailabilityWriter(self.db, clear_flags=self.sold_inference)
+        self._stats_lock = threading.Lock()
 
     def run(self):
         """Main execution flow"""
@@ -41,22 +91,49 @@ class AvailabilityChecker:
             logger.info("🔍 Availability Checker - Starting")
             logger.info("=" * 60)
 
-            # Get all available listings
-            listings = self.db.get_available_listings()
+            # Get flagged and unseen listings, or all available ones
+            if self.sold_inference:
+                listings = self.db.get_listings_to_confirm(self.recheck_hours)
+            else:
+                listings = self.db.get_available_listings()
 
             if not listings:
                 logger.info("No available listings to check")
                 return
 
+            # Most likely sold first, within the per-run check budget
+            planner = AvailabilityPlanner()
+            history = self.db.get_sell_through_data(planner.stats_days)
+            planner.learn(history['available'], history['sold'])
+            self.stats['candidates'] = len(listings)
+            listings = planner.plan(listings)
+
             logger.info(f"Checking {len(listings)} available listings")
 
             # Load all active sources for scrapers
             sources = self.db.get_active_sources()
             source_map = {s['name']: s for s in sources}
 
-            # Check each listing
-            for listing in listings:
-                self._check_listing(listing, source_map)
+            groups = self._group_by_source(listings, source_map)
+            start = time.monotonic()
+
+            try:
+                # Largest sources first, so the slowest group doesn't start last
+                with ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix='availability') as pool:
+                    for source_name, group in sorted(groups.items(), key=lambda g: -len(g[1])):
+                        pool.submit(self._check_source, source_map[source_name], group)
+            finally:
+                self.writer.flush()
+
+            elapsed = time.monotonic() - start
+            self.stats['checks_per_second'] = round(self.stats['checked'] / elapsed, 2) if elapsed else 0.0
+            self.stats['db_writes'] = self.writer.round_trips
+            self.stats['errors'] += self.writer.failed
+            if self.detection_hours:
+                self.stats['detection_hours'] = round(sum(self.detection_hours) / len(self.detection_hours), 1)
+
+            if self.stop_event.is_set():
+                logger.warning("Stop requested - remaining listings are checked next run")
 
             # Log summary
             self._log_summary()
@@ -69,72 +146,160 @@ class AvailabilityChecker:
             logger.error(f"Fatal error: {e}", exc_info=True)
             raise
 
-    def _check_listing(self, listing: dict, source_map: dict):
+    def _group_by_source(self, listings: List[dict], source_map: dict) -> Dict[str, List[dict]]:
         """
-        Check single listing availability
+        Group listings by source, skipping listings without URL or active source
 
         Args:
-            listing: Listing data from database
+            listings: Available listings
             source_map: Map of source name to config
+
+        Returns:
+            Dict of source name -> listings
         """
-        listing_id = listing.get('id')
-        url = listing.get('link')
-        source_name = listing.get('source')
+        groups: Dict[str, List[dict]] = defaultdict(list)
+        missing = defaultdict(int)
+
+        for listing in listings:
+            if not listing.get('link'):
+                logger.warning(f"Listing {listing.get('id')} has no URL - skipping")
+                self.stats['skipped'] += 1
+            elif listing.get('source') not in source_map:
+                missing[listing.get('source')] += 1
+                self.stats['skipped'] += 1
+            else:
+                groups[listing['source']].append(listing)
+
+        for source_name, count in missing.items():
+            logger.warning(f"Source {source_name} not found - skipping {count} listings")
+        return groups
+
+    def _check_source(self, source_config: Dict[str, Any], listings: List[dict]):
+        """
+        Check all listings of one source with a single scraper
 
-        if not url:
-            logger.warning(f"Listing {listing_id} has no URL - skipping")
-            return
+        Args:
+            source_config: Source configuration
+            listings: Listings of this source
+        """
+        source_name = source_config.get('name', 'Unknown')
+        dynamic = source_config.get('Scraper_Type') == 'Dynamic'
+        counts = {'checked': 0, 'sold': 0, 'errors': 0, 'seconds': 0.0}
+        start = time.monotonic()
+        scraper = None
 
+        with self._stats_lock:
+            host = self.hosts[source_domain(source_config)]
+        host.acquire()
+        if dynamic:
+            self.browsers.acquire()
         try:
-            self.stats['checked'] += 1
+            # Load scraper once for the whole group (warm if cached)
+            if self.scrapers is not None:
+                scraper = self.scrapers.get(source_config)
+            else:
+                scraper = CustomScraperLoader.load_scraper(source_config)
 
-            # Get source config
-            source_config = source_map.get(source_name)
-            if not source_config:
-                logger.warning(f"Source {source_name} not found - skipping")
-                return
+            for listing in listings:
+                if self.stop_event.is_set():
+                    break
+                result = self._check_listing(listing, scraper)
+                counts['checked'] += 1
+                counts['sold'] += result == 'Sold'
+                counts['errors'] += result is None
+
+        except Exception as e:
+            logger.error(f"Failed to check {source_name}: {e}")
+            counts['errors'] += 1
+            with self._stats_lock:
+                self.stats['errors'] += 1
+
+        finally:
+            # Close scraper
+            if scraper is not None and self.scrapers is None:
+                scraper.close_driver()
+            if dynamic:
+                self.browsers.release()
+            host.release()
+
+            counts['seconds'] = round(time.monotonic() - start, 1)
+            with self._stats_lock:
+                self.source_stats[source_name] = counts
 
-            # Load scraper
-            scraper = CustomScraperLoader.load_scraper(source_config)
+    def _check_listing(self, listing: dict, scraper) -> Optional[str]:
+        """
+        Check single listing availability
 
+        Args:
+            listing: Listing data from database
+            scraper: Scraper of the listing's source
+
+        Returns:
+            'Sold', 'Available', or None if the check failed
+        """
+        listing_id = listing.get('id')
+        url = listing.get('link')
+
+        try:
             # Check availability
             is_available = scraper.check_availability(url)
+            if is_available is None:
+                # Rate limited, server error or timeout - keep the status, check again next run
+                with self._stats_lock:
+                    self.stats['checked'] += 1
+                    self.stats['errors'] += 1
+                return None
 
-            # Update Notion
+            # Queue Supabase update (written in batches)
             if not is_available:
                 logger.info(f"❌ Marking as sold: {url}")
-                self.db.update_availability(
-                    listing_id,
-                    status='Sold',
-                    sold_at=datetime.now()
-                )
-                self.stats['marked_sold'] += 1
+                status = 'Sold'
             else:
                 logger.debug(f"✅ Still available: {url}")
-                self.db.update_availability(
-                    listing_id,
-                    status='Available'
-                )
-                self.stats['still_available'] += 1
+                status = 'Available'
+            self.writer.add(listing_id, status)
 
-            # Close scraper
-            scraper.close_driver()
+            with self._stats_lock:
+                self.stats['checked'] += 1
+                self.stats['marked_sold' if status == 'Sold' else 'still_available'] += 1
+                previous_check = parse_timestamp(listing.get('last_checked'), None)
+                if status == 'Sold' and previous_check:
+                    self.detection_hours.append((datetime.now() - previous_check).total_seconds() / 3600)
+            return status
 
         except Exception as e:
             logger.error(f"Failed to check {url}: {e}")
-            self.stats['errors'] += 1
+            with self._stats_lock:
+                self.stats['checked'] += 1
+                self.stats['errors'] += 1
+            return None
 
     def _log_summary(self):
         """Log execution summary"""
         logger.info("\n" + "=" * 60)
         logger.info("📊 SUMMARY")
         logger.info("=" * 60)
-        logger.info(f"Checked:          {self.stats['checked']}")
+        logger.info(f"Checked:          {self.stats['checked']} of {self.stats['candidates']} candidates")
         logger.info(f"Still available:  {self.stats['still_available']}")
         logger.info(f"Marked sold:      {self.stats['marked_sold']}")
         logger.info(f"Errors:           {self.stats['errors']}")
+        logger.info(f"Skipped:          {self.stats['skipped']}")
+        logger.info(f"DB writes:        {self.stats['db_writes']}")
+        logger.info(f"Throughput:       {self.stats['checks_per_second']} checks/s")
+        if self.detection_hours:
+            # A sale happened somewhere between the previous check and this one
+            logger.info(f"Time to detect:   ≤ {self.stats['detection_hours']}h on average "
+                        f"({len(self.detection_hours)} sales)")
         logger.info("=" * 60)
 
+        if self.source_stats:
+            logger.info("⏱️  Per source (checked / sold / errors, checks/s)")
+            for source_name, counts in sorted(self.source_stats.items(), key=lambda s: -s[1]['checked']):
+                rate = counts['checked'] / counts['seconds'] if counts['seconds'] else 0.0
+                logger.info(
+                    f"  {source_name:<30} {counts['checked']} / {counts['sold']} / {counts['errors']}, {rate:.2f}/s"
+                )
+
 
 def main():
     """Entry point"""
@@ -146,6 +146,34 @@ class Database:
         except:
             return False
 
+    def mark_listings_sold(self, listing_ids: List[str]) -> int:
+        """Mark several listings as sold in one statement"""
+        if not listing_ids:
+            return 0
+        query = """
+            UPDATE watch_listings
+            SET availability = 'Sold', sold_at = NOW(), last_checked = NOW()
+            WHERE id = ANY(%s::uuid[])
+        """
+        try:
+            return self.execute_update(query, (list(listing_ids),))
+        except:
+            return 0
+
+    def update_last_checked_many(self, listing_ids: List[str]) -> int:
+        """Update last_checked timestamp for several listings in one statement"""
+        if not listing_ids:
+            return 0
+        query = """
+            UPDATE watch_listings
+            SET last_checked = NOW()
+            WHERE id = ANY(%s::uuid[])
+        """
+        try:
+            return self.execute_update(query, (list(listing_ids),))
+        except:
+            return 0
+
     # ==================== SYNC HISTORY ====================
 
     def create_sync_log(self, log_data: Dict) -> Optional[str]:
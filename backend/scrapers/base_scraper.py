@@ -10,6 +10,7 @@ from abc import ABC, abstractmethod
 from typing import List, Dict, Optional
 import requests
 from bs4 import BeautifulSoup
+from utils.sold_detector import SoldDetector
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +34,7 @@ class BaseScraper(ABC):
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         })
+        self.sold_detector = SoldDetector()
         logger.info(f"✓ Initialized scraper: {source_name}")
 
     @abstractmethod
@@ -97,6 +99,9 @@ class BaseScraper(ABC):
         """
         Check if a listing is still available
 
+        One streamed GET: the body is scanned for sold markers as it arrives
+        and the download stops at the first decisive one.
+
         Args:
             url: The listing URL
 
@@ -107,22 +112,13 @@ class BaseScraper(ABC):
             # Rate limiting
             time.sleep(self.rate_limit)
 
-            response = self.session.head(url, timeout=10, allow_redirects=True)
-
-            # If we get 404 or 410, it's definitely gone
-            if response.status_code in [404, 410]:
-                return False
-
-            # If we get 200, fetch the page and check for "sold" indicators
-            if response.status_code == 200:
-                soup = self.fetch_page(url)
-                if soup:
-                    text_lower = soup.get_text().lower()
-                    # Common "sold" indicators
-                    sold_indicators = ['verkauft', 'sold', 'nicht verfügbar', 'out of stock']
-                    for indicator in sold_indicators:
-                        if indicator in text_lower:
-                            return False
+            with self.session.get(url, timeout=10, stream=True) as response:
+                # If we get 404 or 410, it's definitely gone
+                if response.status_code in [404, 410]:
+                    return False
+
+                if response.status_code == 200:
+                    return not self.sold_detector.scan(response.iter_content(chunk_size=16384))
 
             return True
 
@@ -13,6 +13,8 @@ from dotenv import load_dotenv
 
 # Add backend directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Shared utilities of the repository root (utils.sold_detector)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.database import Database
 from core.openai_extractor import OpenAIExtractor
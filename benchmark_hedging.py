@@ -0,0 +1,95 @@
+"""
+Benchmark request hedging against a local server with a slow tail
+Usage: python benchmark_hedging.py [requests] [slow share] [slow seconds]
+
+Every request sleeps 20-40 ms, a share of them slow_seconds instead - the
+tail a dealer site with an overloaded backend shows. The same sequence of
+requests is fetched with HEDGE_REQUESTS off and on.
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('ADAPTIVE_RATE_DB', os.path.join(tempfile.mkdtemp(), 'rate_state.db'))
+
+from scrapers.static_scraper import StaticScraper
+from utils.latency import get_latency_tracker
+
+BODY = b'<html><body>' + b'<div class="item">listing</div>' * 200 + b'</body></html>'
+
+
+def make_handler(slow_share: float, slow_seconds: float, seed: int):
+    """Request handler whose latency is drawn from a fixed random sequence"""
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                delay = slow_seconds if rng.random() < slow_share else rng.uniform(0.02, 0.04)
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def run(hedging: bool, count: int, slow_share: float, slow_seconds: float) -> list:
+    """Fetch count pages and return their latencies and the hedge counters"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(slow_share, slow_seconds, seed=42))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    domain = f"hedge-{'on' if hedging else 'off'}.test"
+
+    os.environ['HEDGE_REQUESTS'] = 'true' if hedging else 'false'
+    scraper = StaticScraper(domain, rate_limit=0.001)
+    url = f"http://127.0.0.1:{server.server_port}/search"
+
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        scraper.fetch_raw(url)
+        latencies.append(time.perf_counter() - start)
+
+    counters = get_latency_tracker().report().get(domain, {})
+    scraper.close()
+    server.shutdown()
+    return latencies, counters
+
+
+def percentile(values: list, p: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def main():
+    """Entry point"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    slow_share = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    slow_seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+
+    print(f"{count} requests, {slow_share:.0%} take {slow_seconds:.1f}s")
+    print(f"{'Hedging':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'total s':>8} {'hedges':>7} {'won':>5}")
+    for hedging in (False, True):
+        latencies, counters = run(hedging, count, slow_share, slow_seconds)
+        print(
+            f"{'on' if hedging else 'off':>8} {percentile(latencies, 50) * 1000:>8.0f} "
+            f"{percentile(latencies, 95) * 1000:>8.0f} {percentile(latencies, 99) * 1000:>8.0f} "
+            f"{max(latencies) * 1000:>8.0f} {sum(latencies):>8.1f} "
+            f"{counters.get('hedges_sent', 0):>7} {counters.get('hedges_won', 0):>5}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark parse pool throughput from 1 to N worker processes on recorded pages
+Usage: python benchmark_parse_pool.py "<listing selector>" <pages dir> [max workers] [repeat]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from scrapers.listing_parser import ListingSpec, ParsePool
+
+
+def main():
+    """Entry point"""
+    if len(sys.argv) < 3:
+        print(__doc__.strip())
+        sys.exit(1)
+
+    selector = sys.argv[1]
+    pages_dir = sys.argv[2]
+    max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else (os.cpu_count() or 1)
+    repeat = int(sys.argv[4]) if len(sys.argv) > 4 else 10
+
+    spec = ListingSpec(listing_selector=selector, title_selector='h1, h2, h3', link_selector='a[href]')
+
+    raw_pages = []
+    for name in sorted(os.listdir(pages_dir)):
+        if name.endswith(('.html', '.htm')):
+            with open(os.path.join(pages_dir, name), 'rb') as f:
+                raw_pages.append(f.read())
+
+    if not raw_pages:
+        print(f"No .html files in {pages_dir}")
+        sys.exit(1)
+
+    pages = [(raw, spec) for raw in raw_pages] * repeat
+    baseline = None
+
+    print(f"{len(pages)} pages ({sum(len(r) for r, _ in pages) / 1e6:.1f} MB)")
+    print(f"{'Workers':>8} {'Seconds':>9} {'Pages/s':>9} {'Speedup':>8} {'Listings':>9}")
+
+    for workers in range(1, max_workers + 1):
+        pool = ParsePool(workers=workers)
+        if pool.executor:
+            # Warm up worker processes so start-up isn't measured
+            list(pool.map(pages[:workers]))
+
+        start = time.perf_counter()
+        listings = sum(len(records) for records in pool.map(pages))
+        elapsed = time.perf_counter() - start
+        pool.close()
+
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>9.2f} {len(pages) / elapsed:>9.1f} {baseline / elapsed:>7.2f}x {listings:>9}")
+
+
+if __name__ == '__main__':
+    main()
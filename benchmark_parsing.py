@@ -0,0 +1,37 @@
+"""
+Benchmark region-restricted parsing against full-document parsing
+Usage: python benchmark_parsing.py "<listing selector>" page1.html [page2.html ...]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from scrapers.region_parser import compare_parse_modes
+
+
+def main():
+    """Entry point"""
+    if len(sys.argv) < 3:
+        print(__doc__.strip())
+        sys.exit(1)
+
+    selector = sys.argv[1]
+
+    print(f"{'Page':<30} {'KB':>8} {'Full ms':>9} {'Region ms':>10} {'Full MB':>9} {'Region MB':>10} {'Listings':>9}")
+    for path in sys.argv[2:]:
+        with open(path, 'rb') as f:
+            raw = f.read()
+
+        result = compare_parse_modes(raw, selector)
+        full, region = result['full'], result['region']
+        print(
+            f"{os.path.basename(path)[:30]:<30} {result['bytes'] / 1024:>8.0f} "
+            f"{full['seconds'] * 1000:>9.1f} {region['seconds'] * 1000:>10.1f} "
+            f"{full['peak_bytes'] / 1e6:>9.1f} {region['peak_bytes'] / 1e6:>10.1f} "
+            f"{full['listings']:>4}/{region['listings']:<4}"
+        )
+
+
+if __name__ == '__main__':
+    main()
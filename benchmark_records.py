@@ -0,0 +1,95 @@
+"""
+Benchmark memory and copy time of pipeline records: dicts vs slot dataclasses
+Usage: python benchmark_records.py [findings]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.records import RawFinding, ExtractedListing, ListingRow
+
+CRITERIA = {
+    'id': '5f0c6a52-8a7e-4f0e-9b7a-3d2f1e0c9b11',
+    'name': 'Rolex Submariner',
+    'manufacturer': 'Rolex',
+    'model': 'Submariner',
+    'reference_number': '124060',
+    'year': None,
+    'allowed_countries': ['Deutschland', 'Österreich', 'Schweiz'],
+    'active': True,
+    'notes': 'No date, full set preferred',
+    'image_url': 'https://example.com/sub.jpg',
+}
+
+EXTRACTED = {
+    'manufacturer': 'Rolex', 'model': 'Submariner', 'reference_number': '124060',
+    'year': 2021, 'condition': 'Sehr Gut', 'price': 11500.0, 'currency': 'EUR',
+    'location': 'Köln', 'country': 'Deutschland', 'seller_name': 'Dealer', 'confidence': 0.9,
+}
+
+
+def scraper_results(count: int):
+    """Simulate scraper output (each with its own raw HTML string)"""
+    return [{
+        'title': f'Rolex Submariner 124060 #{i}',
+        'price': '11.500 €',
+        'link': f'https://dealer.example.com/watch/{i}',
+        'raw_html': f'<div class="product" data-id="{i}">' + 'x' * 1500 + '</div>',
+        'source_name': ''.join(['Cologne', ' Watch']),
+        'source_type': ''.join(['Dea', 'ler']),
+    } for i in range(count)]
+
+
+def run_dicts(results):
+    """Old pipeline: copy criteria into every finding, then merge dicts"""
+    findings = [{**f, 'criteria': CRITERIA} for f in results]
+    listings = [{**EXTRACTED, 'link': f['link'], 'url_hash': 'h', 'criteria_id': f['criteria']['id'],
+                 'source_name': f['source_name'], 'source_type': f['source_type']} for f in findings]
+    rows = [{'name': f"{l['manufacturer']} {l['model']}", **l} for l in listings]
+    return findings, listings, rows
+
+
+def run_records(results):
+    """New pipeline: slot records referencing the criteria ID"""
+    findings = [RawFinding.from_scraper(f, CRITERIA['id']) for f in results]
+    listings = []
+    for finding in findings:
+        finding.drop_html()
+        listings.append(ExtractedListing.from_extraction(EXTRACTED, finding, 'h'))
+    rows = [ListingRow.from_listing(l) for l in listings]
+    return findings, listings, rows
+
+
+def measure(fn, count):
+    """Return (seconds spent building records, bytes still held)"""
+    results = scraper_results(count)
+    start = time.perf_counter()
+    fn(results)
+    elapsed = time.perf_counter() - start
+
+    # Memory is traced in a separate pass so tracing overhead doesn't skew timing
+    tracemalloc.start()
+    results = scraper_results(count)
+    held = fn(results)
+    del results  # Old pipeline still references raw_html through its copies
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return elapsed, current
+
+
+def main():
+    """Entry point"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    print(f"{count} findings")
+    for label, fn in (('dicts', run_dicts), ('records', run_records)):
+        elapsed, held = measure(fn, count)
+        print(f"{label:<8} {elapsed * 1000:>8.1f} ms {held / 1e6:>8.1f} MB held")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Priority scheduler for availability checks
+Ranks listings by the probability that they sold since their last check and
+checks only the top AVAILABILITY_MAX_CHECKS per run. The hourly sell hazard of
+a listing comes from its source's observed sell-through (sold listings per
+listing-hour over the last AVAILABILITY_STATS_DAYS, smoothed towards a prior
+per source type) and falls with the listing's age - fresh marketplace
+listings are checked often, months-old dealer stock rarely.
+"""
+import math
+import os
+from datetime import datetime
+from typing import Dict, Any, List
+from core.supabase_client import parse_timestamp
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Share of listings sold within a week, by source type (prior)
+TYPE_PRIORS = {'Marketplace': 0.35, 'Forum': 0.25, 'Dealer': 0.05}
+DEFAULT_PRIOR = 0.15
+
+
+def _weekly_to_hourly(share: float) -> float:
+    """Convert a weekly sell-through share into an hourly hazard"""
+    return -math.log(1 - min(share, 0.99)) / (7 * 24)
+
+
+class AvailabilityPlanner:
+    """Orders listings by probability of having sold since the last check"""
+
+    def __init__(self, now: datetime = None):
+        """
+        Initialize planner
+
+        Args:
+            now: Reference time (default: now)
+        """
+        self.now = now or datetime.now()
+        self.max_checks = int(os.getenv('AVAILABILITY_MAX_CHECKS', '1000'))
+        self.stats_days = float(os.getenv('AVAILABILITY_STATS_DAYS', '30'))
+        self.age_halflife_days = float(os.getenv('AVAILABILITY_AGE_HALFLIFE_DAYS', '7'))
+        # Weight of the source-type prior, in listing-hours of evidence
+        self.prior_hours = float(os.getenv('AVAILABILITY_PRIOR_HOURS', '5000'))
+        self.hazards: Dict[str, float] = {}
+        self.source_types: Dict[str, str] = {}
+
+    def learn(self, available: List[Dict[str, Any]], sold: List[Dict[str, Any]]):
+        """
+        Estimate each source's hourly sell hazard
+
+        Args:
+            available: Available listings (source, source_type, date_found)
+            sold: Listings sold within the stats window (source, source_type, date_found, sold_at)
+        """
+        window_hours = self.stats_days * 24
+        exposure: Dict[str, float] = {}
+        sales: Dict[str, int] = {}
+
+        for listing in available:
+            source = listing.get('source')
+            self.source_types.setdefault(source, listing.get('source_type'))
+            exposure[source] = exposure.get(source, 0.0) + min(self._age_hours(listing), window_hours)
+
+        for listing in sold:
+            source = listing.get('source')
+            self.source_types.setdefault(source, listing.get('source_type'))
+            found_at = parse_timestamp(listing.get('date_found'), None)
+            sold_at = parse_timestamp(listing.get('sold_at'), None) or self.now
+            hours = (sold_at - found_at).total_seconds() / 3600 if found_at else window_hours / 2
+            exposure[source] = exposure.get(source, 0.0) + min(max(hours, 1.0), window_hours)
+            sales[source] = sales.get(source, 0) + 1
+
+        # Gamma-Poisson smoothing: sources with little history stay near their type's prior
+        for source, hours in exposure.items():
+            prior = _weekly_to_hourly(TYPE_PRIORS.get(self.source_types.get(source), DEFAULT_PRIOR))
+            self.hazards[source] = (sales.get(source, 0) + prior * self.prior_hours) / (hours + self.prior_hours)
+
+    def hazard(self, listing: Dict[str, Any]) -> float:
+        """
+        Hourly probability density of a listing selling right now
+
+        Args:
+            listing: Listing row
+
+        Returns:
+            Sell hazard per hour, scaled down with listing age
+        """
+        base = self.hazards.get(listing.get('source'))
+        if base is None:
+            base = _weekly_to_hourly(TYPE_PRIORS.get(listing.get('source_type'), DEFAULT_PRIOR))
+        age_days = self._age_hours(listing) / 24
+        return base * 2 * self.age_halflife_days / (self.age_halflife_days + age_days)
+
+    def priority(self, listing: Dict[str, Any]) -> float:
+        """
+        Probability that a listing sold since its last check
+
+        Args:
+            listing: Listing row
+
+        Returns:
+            Probability 0..1 (listings flagged as probably sold rank above all)
+        """
+        if listing.get('probably_sold_at'):
+            return 1.0
+        checked_at = parse_timestamp(listing.get('last_checked') or listing.get('date_found'), None)
+        hours = (self.now - checked_at).total_seconds() / 3600 if checked_at else 24 * self.stats_days
+        return 1 - math.exp(-self.hazard(listing) * max(hours, 0.0))
+
+    def plan(self, listings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Pick the listings to check this run
+
+        Args:
+            listings: Candidate listings
+
+        Returns:
+            Top AVAILABILITY_MAX_CHECKS listings, highest priority first
+            (each gets a 'priority' key)
+        """
+        for listing in listings:
+            listing['priority'] = self.priority(listing)
+        ranked = sorted(listings, key=lambda l: -l['priority'])
+        selected = ranked[:self.max_checks] if self.max_checks > 0 else ranked
+
+        if len(selected) < len(ranked):
+            logger.info(
+                f"🗓️  Checking top {len(selected)} of {len(ranked)} listings "
+                f"(expected sales found: {sum(l['priority'] for l in selected):.1f} "
+                f"of {sum(l['priority'] for l in ranked):.1f})"
+            )
+        return selected
+
+    def _age_hours(self, listing: Dict[str, Any]) -> float:
+        """Hours since a listing was found"""
+        found_at = parse_timestamp(listing.get('date_found'), None)
+        return max((self.now - found_at).total_seconds() / 3600, 0.0) if found_at else 0.0
@@ -0,0 +1,77 @@
+"""
+Batched availability status writes
+Check results are buffered per status and written with one update per
+status bucket (id IN (...)), flushed every AVAILABILITY_BATCH_SIZE results or
+AVAILABILITY_FLUSH_SECONDS. A check run costs O(n / batch) round trips
+instead of one per listing.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class AvailabilityWriter:
+    """Buffers availability updates and writes them in batches (thread-safe)"""
+
+    def __init__(self, db, batch_size: int = None, flush_seconds: float = None, clear_flags: bool = False):
+        """
+        Initialize writer
+
+        Args:
+            db: SupabaseClient
+            batch_size: Results buffered before a flush (default: AVAILABILITY_BATCH_SIZE)
+            flush_seconds: Maximum age of a buffered result (default: AVAILABILITY_FLUSH_SECONDS)
+            clear_flags: Reset probably-sold flags of listings confirmed available
+        """
+        self.db = db
+        self.clear_flags = clear_flags
+        if batch_size is None:
+            batch_size = int(os.getenv('AVAILABILITY_BATCH_SIZE', '100'))
+        if flush_seconds is None:
+            flush_seconds = float(os.getenv('AVAILABILITY_FLUSH_SECONDS', '10'))
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+
+        self.pending: Dict[str, List[str]] = {}
+        self.oldest_at = None
+        self.round_trips = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        # Serializes flushes, so buffered results aren't written out of order
+        self._flush_lock = threading.Lock()
+
+    def add(self, listing_id: str, status: str):
+        """
+        Buffer a check result, flushing when the batch is full or old enough
+
+        Args:
+            listing_id: UUID of the listing
+            status: 'Available', 'Sold', or 'Unknown'
+        """
+        with self._lock:
+            self.pending.setdefault(status, []).append(listing_id)
+            if self.oldest_at is None:
+                self.oldest_at = time.monotonic()
+            size = sum(len(ids) for ids in self.pending.values())
+            due = size >= self.batch_size or time.monotonic() - self.oldest_at >= self.flush_seconds
+
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered results - one update per status"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self.pending, self.oldest_at = self.pending, {}, None
+
+            for status, listing_ids in pending.items():
+                sold_at = datetime.now() if status == 'Sold' else None
+                self.round_trips += 1
+                if not self.db.update_availability_batch(listing_ids, status, sold_at=sold_at,
+                                                         clear_flags=self.clear_flags):
+                    self.failed += len(listing_ids)
@@ -0,0 +1,111 @@
+"""
+Criteria change watcher
+Wakes the daemon within seconds when a search criteria is added or changed in
+the web app. Listens on the watch_criteria_changed channel (migration 006)
+when a direct Postgres connection is configured and falls back to polling
+otherwise. The poll interval also bounds the wait while listening, so a
+missed notification only delays a backfill, never loses it.
+"""
+import os
+import select
+import threading
+import time
+from typing import List
+import psycopg2
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CHANNEL = 'watch_criteria_changed'
+
+
+class CriteriaWatcher:
+    """Blocks until criteria changed (LISTEN/NOTIFY) or the poll interval passed"""
+
+    def __init__(self, connection_string: str = None, poll_interval: float = None):
+        """
+        Initialize watcher
+
+        Args:
+            connection_string: Postgres DSN - needs a session, not the transaction pooler
+                (default: CRITERIA_LISTEN_URL, POSTGRES_URL_NON_POOLING; None = poll only)
+            poll_interval: Seconds between polls (default: CRITERIA_POLL_INTERVAL)
+        """
+        self.connection_string = (
+            connection_string
+            or os.getenv('CRITERIA_LISTEN_URL')
+            or os.getenv('POSTGRES_URL_NON_POOLING')
+        )
+        if poll_interval is None:
+            poll_interval = float(os.getenv('CRITERIA_POLL_INTERVAL', '60'))
+        self.poll_interval = poll_interval
+        self.conn = None
+        self._retry_at = 0.0
+
+    @property
+    def listening(self) -> bool:
+        """True while notifications are received"""
+        return self.conn is not None
+
+    def _listen(self) -> bool:
+        """Open the LISTEN connection (retried once per poll interval after failures)"""
+        if self.conn is not None:
+            return True
+        if not self.connection_string or time.monotonic() < self._retry_at:
+            return False
+
+        try:
+            conn = psycopg2.connect(self.connection_string)
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN {CHANNEL}')
+            self.conn = conn
+            logger.info(f"👂 Listening for criteria changes on {CHANNEL}")
+            return True
+        except Exception as e:
+            logger.warning(f"Criteria LISTEN unavailable - polling every {self.poll_interval:.0f}s: {e}")
+            self._retry_at = time.monotonic() + self.poll_interval
+            return False
+
+    def wait(self, stop_event: threading.Event) -> List[str]:
+        """
+        Wait for the next criteria change or the end of the poll interval
+
+        Args:
+            stop_event: Returns early once set
+
+        Returns:
+            IDs of notified criteria (empty after a plain poll interval)
+        """
+        if not self._listen():
+            stop_event.wait(self.poll_interval)
+            return []
+
+        deadline = time.monotonic() + self.poll_interval
+        try:
+            # Short slices so a stop request isn't held up by select()
+            while not stop_event.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                if select.select([self.conn], [], [], min(remaining, 1.0))[0]:
+                    self.conn.poll()
+                    if self.conn.notifies:
+                        ids = [notify.payload for notify in self.conn.notifies]
+                        self.conn.notifies.clear()
+                        return ids
+            return []
+
+        except Exception as e:
+            logger.warning(f"Criteria LISTEN connection lost: {e}")
+            self.close()
+            return []
+
+    def close(self):
+        """Close the LISTEN connection"""
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+            self.conn = None
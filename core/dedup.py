@@ -0,0 +1,217 @@
+"""
+Cross-source near-duplicate detection
+The same watch listed on a dealer site, Chrono24 and eBay becomes one row per
+source. Each listing gets a MinHash signature of its title and card text
+(utils/minhash.py); LSH finds earlier listings of other sources with similar
+text, which are accepted as the same watch only if the reference numbers and
+years don't contradict each other and the prices (same currency) are within
+DEDUP_PRICE_TOLERANCE. Listings of the same source are never merged - a
+dealer offering two watches of one reference lists them twice on purpose.
+An agreeing reference or seller lowers the text similarity required. A
+near-identical listing photo (dHash within IMAGE_HASH_DISTANCE bits,
+utils/image_hash.py) replaces the text match if at least the reference or
+the price agrees, unless the photo is shared by several clusters (stock
+photos). A
+duplicate points to the canonical listing of its cluster (canonical_id,
+migration 012) and isn't notified again.
+"""
+import os
+import re
+from typing import Dict, Any, List, Optional
+from utils import minhash
+from utils.image_hash import MultiIndexHash, from_signed
+from utils.logger import get_logger
+from utils.text_utils import normalize_reference
+
+logger = get_logger(__name__)
+
+# Text similarity required without agreeing reference / seller, and the relief each gives
+BASE_SIMILARITY = 0.5
+AGREEMENT_BONUS = 0.1
+
+
+def listing_signature(title: Optional[str], description: Optional[str]) -> List[int]:
+    """
+    Signature of a listing's title and card text
+
+    Args:
+        title: Result card title
+        description: Result card text (html_to_text)
+
+    Returns:
+        MinHash signature (empty without text)
+    """
+    return minhash.signature(minhash.shingles(f"{title or ''} {description or ''}"))
+
+
+def _seller_key(seller_name: Optional[str]) -> str:
+    """Seller name as compared across sources"""
+    return re.sub(r'[^a-z0-9]', '', (seller_name or '').lower())
+
+
+def _year(value: Any) -> Optional[int]:
+    """Model year as compared across sources (None if missing or not a year)"""
+    try:
+        return int(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+class DuplicateDetector:
+    """LSH index over the signatures of recent listings"""
+
+    def __init__(self, db=None):
+        """
+        Initialize detector
+
+        Args:
+            db: SupabaseClient to load recent listings from (None: start empty,
+                e.g. to cluster one batch of rows)
+        """
+        self.db = db
+        self.window_days = int(os.getenv('DEDUP_WINDOW_DAYS', '60'))
+        self.similarity = float(os.getenv('DEDUP_SIMILARITY', str(BASE_SIMILARITY)))
+        self.price_tolerance = float(os.getenv('DEDUP_PRICE_TOLERANCE', '0.05'))
+        self.index = minhash.LSHIndex()
+        self.images = MultiIndexHash(int(os.getenv('IMAGE_HASH_DISTANCE', '6')))
+        self.stock_photo_clusters = int(os.getenv('IMAGE_STOCK_PHOTO_CLUSTERS', '3'))
+        self.listings: Dict[str, Dict[str, Any]] = {}
+        self.loaded = db is None
+
+    def load(self):
+        """Index the listings of the last DEDUP_WINDOW_DAYS"""
+        if self.loaded:
+            return
+        rows = self.db.get_dedup_index(self.window_days)
+        for row in rows:
+            self.add(row['id'], row, row.get('dedup_signature') or [], row.get('canonical_id'))
+        self.loaded = True
+        logger.debug(f"🧬 Indexed {len(rows)} listings for duplicate detection")
+
+    def find_canonical(self, listing: Dict[str, Any], sig: List[int]) -> Optional[str]:
+        """
+        Find the cluster a listing belongs to
+
+        Args:
+            listing: Listing row (source, reference_number, year, price, currency,
+                seller_name, image_hash)
+            sig: Signature of the listing
+
+        Returns:
+            ID of the canonical listing, or None if the listing is new
+        """
+        self.load()
+        canonical_id = self._find_by_image(listing)
+        if canonical_id:
+            return canonical_id
+
+        best, best_similarity = None, 0.0
+        for key in self.index.query(sig):
+            candidate = self.listings[key]
+            required = self._required_similarity(listing, candidate)
+            if required is None:
+                continue
+            score = minhash.similarity(sig, candidate['signature'])
+            if score >= required and score > best_similarity:
+                best, best_similarity = candidate, score
+        return best['canonical_id'] if best else None
+
+    def _find_by_image(self, listing: Dict[str, Any]) -> Optional[str]:
+        """Canonical listing of the closest compatible listing with a near-identical photo"""
+        if listing.get('image_hash') is None:
+            return None
+
+        matches = [
+            self.listings[key] for _, key in self.images.search(from_signed(listing['image_hash']))
+        ]
+        if len({match['canonical_id'] for match in matches}) >= self.stock_photo_clusters:
+            return None
+        for match in matches:
+            if self._required_similarity(listing, match) is not None and self._agrees(listing, match):
+                return match['canonical_id']
+        return None
+
+    def _agrees(self, listing: Dict[str, Any], candidate: Dict[str, Any]) -> bool:
+        """Check that the reference or the price positively agree (not merely don't contradict)"""
+        reference = normalize_reference(listing.get('reference_number'))
+        if reference and reference == candidate['reference']:
+            return True
+        price, other = listing.get('price'), candidate['price']
+        return bool(price and other) and abs(float(price) - other) <= self.price_tolerance * max(float(price), other)
+
+    def _required_similarity(self, listing: Dict[str, Any], candidate: Dict[str, Any]) -> Optional[float]:
+        """Text similarity a candidate needs, or None if it can't be the same watch"""
+        if listing.get('source') and listing.get('source') == candidate['source']:
+            return None
+        required = self.similarity
+
+        reference = normalize_reference(listing.get('reference_number'))
+        if reference and candidate['reference']:
+            if reference != candidate['reference']:
+                return None
+            required -= AGREEMENT_BONUS
+
+        year = _year(listing.get('year'))
+        if year and candidate['year'] and year != candidate['year']:
+            return None
+
+        price, other = listing.get('price'), candidate['price']
+        if price and other:
+            if (listing.get('currency') or 'EUR') != candidate['currency']:
+                return None
+            if abs(float(price) - other) > self.price_tolerance * max(float(price), other):
+                return None
+
+        seller = _seller_key(listing.get('seller_name'))
+        if seller and seller == candidate['seller']:
+            required -= AGREEMENT_BONUS
+        return required
+
+    def add(self, listing_id: str, listing: Dict[str, Any], sig: List[int], canonical_id: Optional[str] = None):
+        """
+        Index a saved listing
+
+        Args:
+            listing_id: ID of the listing (or any unique key)
+            listing: Listing row
+            sig: Signature of the listing
+            canonical_id: Canonical listing if it is a duplicate
+        """
+        image_hash = listing.get('image_hash')
+        if len(sig) != minhash.NUM_PERM and image_hash is None:
+            return
+        self.listings[listing_id] = {
+            'canonical_id': canonical_id or listing_id,
+            'signature': sig,
+            'source': listing.get('source'),
+            'reference': normalize_reference(listing.get('reference_number')),
+            'year': _year(listing.get('year')),
+            'price': float(listing['price']) if listing.get('price') else None,
+            'currency': listing.get('currency') or 'EUR',
+            'seller': _seller_key(listing.get('seller_name'))
+        }
+        self.index.insert(listing_id, sig)
+        if image_hash is not None:
+            self.images.add(from_signed(image_hash), listing_id)
+
+    def unique(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Drop rows that duplicate an earlier row of the same batch
+
+        Used by the queue coordinator, whose workers don't see each
+        other's listings while saving.
+
+        Args:
+            rows: Saved listing rows with dedup_signature and image_hash
+
+        Returns:
+            Rows without in-batch duplicates, in order
+        """
+        kept = []
+        for row in rows:
+            sig = row.get('dedup_signature') or []
+            if self.find_canonical(row, sig):
+                continue
+            self.add(row['url_hash'], row, sig)
+            kept.append(row)
+        return kept
@@ -105,12 +105,25 @@ class EmailSender:
             if ref_num:
                 title += f" ({ref_num})"
 
+            # Market comparison (core/market_stats.py)
+            market = ''
+            deal_score = listing.get('deal_score')
+            if deal_score is not None:
+                color = '#2e7d32' if deal_score > 0 else '#c62828'
+                direction = 'unter' if deal_score > 0 else 'über'
+                market = f'''
+                <p style="margin: 5px 0; color: {color};">
+                    <strong>Marktvergleich:</strong> {abs(deal_score):.0f}% {direction} Median
+                    ({listing['market_median']:,.0f} {currency}, P10–P90 {listing['market_p10']:,.0f}–{listing['market_p90']:,.0f},
+                    {listing['market_samples']} Angebote)
+                </p>'''
+
             card = f'''
             <div style="margin: 20px 0; padding: 20px; border: 1px solid #ddd; border-radius: 8px; background-color: #f9f9f9;">
                 <h3 style="margin: 0 0 10px 0; color: #333;">{title}</h3>
                 <p style="margin: 5px 0; font-size: 24px; font-weight: bold; color: #2c5aa0;">
                     {price:,.2f} {currency}
-                </p>
+                </p>{market}
                 <p style="margin: 5px 0; color: #666;">
                     <strong>Zustand:</strong> {condition}
                 </p>
@@ -174,6 +187,73 @@ class EmailSender:
 
         return html
 
+    def send_price_drops_email(self, drops: List[Dict[str, Any]]) -> bool:
+        """
+        Send email with price drops of known listings
+
+        Args:
+            drops: Dicts with name, reference_number, link, source, currency, old_price, price
+
+        Returns:
+            True if sent successfully
+        """
+        if not drops or not all([self.smtp_user, self.smtp_password, self.recipient_email]):
+            return False
+
+        try:
+            rows = []
+            for drop in sorted(drops, key=lambda d: d['price'] / d['old_price']):
+                title = drop.get('name') or 'Unknown'
+                if drop.get('reference_number'):
+                    title += f" ({drop['reference_number']})"
+                percent = (1 - drop['price'] / drop['old_price']) * 100
+
+                rows.append(f'''
+                <tr>
+                    <td style="padding: 10px; border-bottom: 1px solid #ddd;">
+                        <a href="{drop.get('link', '#')}" style="color: #2c5aa0;">{title}</a><br>
+                        <span style="color: #999; font-size: 12px;">{drop.get('source', '')}</span>
+                    </td>
+                    <td style="padding: 10px; border-bottom: 1px solid #ddd; color: #999; text-decoration: line-through;">
+                        {drop['old_price']:,.2f} {drop['currency']}
+                    </td>
+                    <td style="padding: 10px; border-bottom: 1px solid #ddd; font-weight: bold; color: #2e7d32;">
+                        {drop['price']:,.2f} {drop['currency']} (−{percent:.0f}%)
+                    </td>
+                </tr>
+                ''')
+
+            html = f'''
+            <!DOCTYPE html>
+            <html>
+            <body style="font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px;">
+                <h2 style="color: #2c5aa0;">📉 {len(drops)} Preissenkungen</h2>
+                <p style="color: #666;"><strong>Datum:</strong> {datetime.now().strftime('%d.%m.%Y %H:%M')} Uhr</p>
+                <table style="width: 100%; border-collapse: collapse;">
+                    {''.join(rows)}
+                </table>
+            </body>
+            </html>
+            '''
+
+            msg = MIMEMultipart('alternative')
+            msg['Subject'] = f"📉 {len(drops)} Preissenkungen bei beobachteten Uhren"
+            msg['From'] = self.smtp_user
+            msg['To'] = self.recipient_email
+            msg.attach(MIMEText(html, 'html', 'utf-8'))
+
+            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
+                server.starttls()
+                server.login(self.smtp_user, self.smtp_password)
+                server.send_message(msg)
+
+            logger.info(f"Price drop email sent with {len(drops)} listings")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to send price drop email: {e}")
+            return False
+
     def send_error_notification(self, error_message: str) -> bool:
         """
         Send error notification email
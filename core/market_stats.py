@@ -0,0 +1,197 @@
+"""
+Market statistics per reference for deal scoring
+Prices of saved listings are kept as quantile sketches (utils/quantile_sketch.py)
+per market key and day. The window sketch of a key (last MARKET_WINDOW_DAYS,
+all sources) gives median, p10 and p90 without querying listings; a new
+listing is scored against it before its own price is added. Additions are
+buffered as per-day deltas and merged into watch_market_sketches at most
+every MARKET_FLUSH_SECONDS and at the end of a run (migration 011).
+"""
+import os
+import re
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Any, List, Optional
+from utils.logger import get_logger
+from utils.quantile_sketch import QuantileSketch, build_sketches
+from utils.text_utils import normalize_manufacturer, normalize_reference
+
+logger = get_logger(__name__)
+
+
+def market_key(manufacturer: Optional[str], model: Optional[str],
+               reference_number: Optional[str], currency: Optional[str]) -> Optional[str]:
+    """
+    Market a listing is compared within
+
+    The reference identifies the model, so the model name (spelled
+    differently by every source) only separates listings without one.
+
+    Args:
+        manufacturer: Manufacturer as extracted
+        model: Model as extracted
+        reference_number: Reference number as extracted
+        currency: Price currency
+
+    Returns:
+        'manufacturer|model|reference|currency' or None if the listing can't
+        be placed in a market
+    """
+    brand = re.sub(r'[^a-z0-9]', '', normalize_manufacturer(manufacturer or '').lower())
+    reference = normalize_reference(reference_number)
+    model_key = '' if reference else ' '.join(re.findall(r'[a-z0-9]+', (model or '').lower()))
+    if not brand or not (reference or model_key):
+        return None
+    return f"{brand}|{model_key}|{reference}|{(currency or 'EUR').upper()}"
+
+
+class MarketStats:
+    """Incremental market statistics over daily sketches"""
+
+    def __init__(self, db, window_days: int = None):
+        """
+        Initialize statistics
+
+        Args:
+            db: SupabaseClient
+            window_days: Days of listings per market (default: MARKET_WINDOW_DAYS)
+        """
+        self.db = db
+        self.window_days = window_days or int(os.getenv('MARKET_WINDOW_DAYS', '90'))
+        self.min_samples = int(os.getenv('MARKET_MIN_SAMPLES', '5'))
+        self.flush_seconds = float(os.getenv('MARKET_FLUSH_SECONDS', '300'))
+        self.windows: Dict[str, QuantileSketch] = {}
+        self.pending: Dict[tuple, QuantileSketch] = defaultdict(QuantileSketch)
+        self.loaded_on: Optional[date] = None
+        self.last_flush = time.monotonic()
+
+    def load(self):
+        """Load the window sketches (again once the window has moved by a day)"""
+        today = date.today()
+        if self.loaded_on == today:
+            return
+
+        windows: Dict[str, QuantileSketch] = {}
+        for row in self.db.get_market_sketches(today - timedelta(days=self.window_days - 1)):
+            windows.setdefault(row['key'], QuantileSketch()).merge(QuantileSketch.from_dict(row['bins']))
+        # Additions not flushed yet belong to the window too
+        for (key, _), sketch in self.pending.items():
+            windows.setdefault(key, QuantileSketch()).merge(sketch)
+
+        self.windows = windows
+        self.loaded_on = today
+        logger.debug(f"📈 Loaded market statistics for {len(windows)} markets")
+
+    def market(self, manufacturer: Optional[str], model: Optional[str],
+               reference_number: Optional[str], currency: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Statistics of a market
+
+        Returns:
+            Dict with median, p10, p90 and samples, or None below MARKET_MIN_SAMPLES
+        """
+        key = market_key(manufacturer, model, reference_number, currency)
+        if key is None:
+            return None
+        self.load()
+        sketch = self.windows.get(key)
+        if sketch is None or sketch.count < self.min_samples:
+            return None
+        return {
+            'median': round(sketch.quantile(0.5), 2),
+            'p10': round(sketch.quantile(0.1), 2),
+            'p90': round(sketch.quantile(0.9), 2),
+            'samples': sketch.count
+        }
+
+    def deal_score(self, listing) -> Dict[str, Any]:
+        """
+        Compare a listing's price with its market
+
+        Args:
+            listing: ExtractedListing
+
+        Returns:
+            Dict with deal_score (percent below the median, negative above),
+            market_median, market_p10, market_p90 and market_samples - empty
+            without price or enough samples
+        """
+        if not listing.price or listing.price <= 0:
+            return {}
+        stats = self.market(listing.manufacturer, listing.model, listing.reference_number, listing.currency)
+        if stats is None:
+            return {}
+        return {
+            'deal_score': round((stats['median'] - listing.price) / stats['median'] * 100, 1),
+            'market_median': stats['median'],
+            'market_p10': stats['p10'],
+            'market_p90': stats['p90'],
+            'market_samples': stats['samples']
+        }
+
+    def add(self, listing):
+        """
+        Add a saved listing's price to its market
+
+        Args:
+            listing: ExtractedListing
+        """
+        key = market_key(listing.manufacturer, listing.model, listing.reference_number, listing.currency)
+        if key is None or not listing.price or listing.price <= 0:
+            return
+        self.load()
+        self.windows.setdefault(key, QuantileSketch()).add(listing.price)
+        self.pending[(key, date.today().isoformat())].add(listing.price)
+
+    def flush(self, force: bool = True):
+        """
+        Merge buffered additions into the stored sketches
+
+        Args:
+            force: Flush even if MARKET_FLUSH_SECONDS haven't passed
+        """
+        if not self.pending or (not force and time.monotonic() - self.last_flush < self.flush_seconds):
+            return
+        rows = [
+            {'key': key, 'day': day, 'bins': sketch.to_dict(), 'count': sketch.count}
+            for (key, day), sketch in self.pending.items()
+        ]
+        if self.db.merge_market_sketches(rows):
+            self.pending.clear()
+            self.last_flush = time.monotonic()
+            logger.debug(f"📈 Saved {len(rows)} market sketch updates")
+
+    def rebuild(self, listings: List[Dict[str, Any]]) -> int:
+        """
+        Recompute all sketches from listings and replace the stored ones
+
+        Used after backfills and imports that bypassed _save_listing. All
+        listings are bucketed in one vectorized pass (build_sketches).
+
+        Args:
+            listings: Rows with manufacturer, model, reference_number, price,
+                currency and date_found (SupabaseClient.get_market_listings)
+
+        Returns:
+            Number of daily sketches written (-1 if the replacement failed)
+        """
+        groups, prices = [], []
+        for row in listings:
+            key = market_key(row.get('manufacturer'), row.get('model'), row.get('reference_number'), row.get('currency'))
+            if key is None or row.get('price') is None or not row.get('date_found'):
+                continue
+            groups.append(f"{key}\t{row['date_found'][:10]}")
+            prices.append(float(row['price']))
+
+        rows = []
+        for group, sketch in build_sketches(groups, prices).items():
+            key, day = group.split('\t')
+            rows.append({'key': key, 'day': day, 'bins': sketch.to_dict(), 'count': sketch.count})
+
+        if not self.db.replace_market_sketches(rows):
+            return -1
+        self.pending.clear()
+        self.loaded_on = None
+        logger.info(f"📈 Rebuilt {len(rows)} daily market sketches from {len(prices)} listings")
+        return len(rows)
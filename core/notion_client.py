@@ -72,6 +72,8 @@ class NotionWatchClient:
                         'Price_Selector': self._get_rich_text(props.get('Price_Selector')),
                         'Link_Selector': self._get_rich_text(props.get('Link_Selector')),
                         'Image_Selector': self._get_rich_text(props.get('Image_Selector')),
+                        'Sold_Selector': self._get_rich_text(props.get('Sold_Selector')),
+                        'Sold_Keywords': self._get_rich_text(props.get('Sold_Keywords')),
                         'Custom_Scraper': self._get_rich_text(props.get('Custom_Scraper')),
                         'Auth_Username_Env': self._get_rich_text(props.get('Auth_Username_Env')),
                         'Auth_Password_Env': self._get_rich_text(props.get('Auth_Password_Env')),
@@ -11,6 +11,10 @@ from utils.text_utils import truncate_html, normalize_manufacturer
 logger = get_logger(__name__)
 
 
+class ExtractionError(Exception):
+    """OpenAI call or response parsing failed (worth retrying)"""
+
+
 class OpenAIExtractor:
     """Extract structured watch data from HTML using OpenAI"""
 
@@ -20,16 +24,25 @@ class OpenAIExtractor:
         self.model = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
         self.confidence_threshold = float(os.getenv('OPENAI_CONFIDENCE_THRESHOLD', '0.5'))
 
-    def extract_watch_data(self, raw_html: str, source_name: str) -> Optional[Dict[str, Any]]:
+    def extract_watch_data(
+        self,
+        raw_html: str,
+        source_name: str,
+        raise_errors: bool = False
+    ) -> Optional[Dict[str, Any]]:
         """
         Extract structured watch data from raw HTML
 
         Args:
             raw_html: Raw HTML content from listing
             source_name: Source website name (for context)
+            raise_errors: Raise ExtractionError on API/parse failures instead of returning None
 
         Returns:
-            Dictionary with extracted data or None if extraction failed
+            Dictionary with extracted data or None if extraction failed (or confidence too low)
+
+        Raises:
+            ExtractionError if raise_errors is set and the call or parsing failed
         """
         try:
             # Truncate HTML to reduce token usage
@@ -95,9 +108,13 @@ Extrahiere die Uhrendaten als JSON."""
 
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse OpenAI JSON response: {e}")
+            if raise_errors:
+                raise ExtractionError(f"Invalid JSON response: {e}") from e
             return None
         except Exception as e:
             logger.error(f"OpenAI extraction failed: {e}")
+            if raise_errors:
+                raise ExtractionError(str(e)) from e
             return None
 
     def match_search_criteria(
@@ -0,0 +1,342 @@
+"""
+Durable per-finding pipeline state
+Every scraped finding is recorded in a local SQLite file (WAL mode) with its
+stage: fetched -> prefiltered -> extracted -> matched -> saved -> notified,
+or rejected / failed. A run that dies halfway leaves its findings behind; the
+next run drains them from where they stopped without re-fetching. Transient
+failures are retried with exponential back-off instead of being dropped.
+
+Entries are claimed by the store instance working on them (lease renewed on
+every stage), so concurrent runs - other processes or the daemon's backfill
+thread - never advance or notify the same entry twice.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Any, List, Optional, Tuple
+from core.records import RawFinding
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+FETCHED = 'fetched'
+PREFILTERED = 'prefiltered'
+EXTRACTED = 'extracted'
+MATCHED = 'matched'
+SAVED = 'saved'
+NOTIFIED = 'notified'
+REJECTED = 'rejected'
+FAILED = 'failed'
+
+# Stages a new run picks up again
+UNFINISHED_STAGES = (FETCHED, PREFILTERED, EXTRACTED, MATCHED)
+FINAL_STAGES = (NOTIFIED, REJECTED, FAILED)
+
+
+class PipelineStore:
+    """SQLite store of finding stages"""
+
+    def __init__(self, db_path: str = None, owner: str = None):
+        """
+        Initialize store
+
+        Args:
+            db_path: SQLite file (default: PIPELINE_DB)
+            owner: Claim holder name (default: unique per store instance)
+        """
+        self.db_path = db_path or os.getenv('PIPELINE_DB', 'pipeline_state.db')
+        self.max_attempts = int(os.getenv('PIPELINE_MAX_ATTEMPTS', '5'))
+        self.retry_seconds = float(os.getenv('PIPELINE_RETRY_SECONDS', '60'))
+        self.retention_days = float(os.getenv('PIPELINE_RETENTION_DAYS', '7'))
+        # Claims of a crashed run are taken over once their lease ran out
+        self.lease_seconds = float(os.getenv('PIPELINE_LEASE_SECONDS', '3600'))
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        self._init_db()
+
+    def _connect(self):
+        """Get this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        """Create findings table"""
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS findings ('
+                'url_hash TEXT NOT NULL, criteria_id TEXT NOT NULL, run_id TEXT, '
+                'title TEXT, price TEXT, link TEXT NOT NULL, raw_html TEXT, '
+                'source_name TEXT, source_type TEXT, stage TEXT NOT NULL, '
+                'extracted TEXT, listing TEXT, attempts INTEGER NOT NULL DEFAULT 0, '
+                'next_attempt_at REAL NOT NULL DEFAULT 0, error TEXT, updated_at REAL NOT NULL, '
+                'image_url TEXT, claimed_by TEXT, lease_until REAL NOT NULL DEFAULT 0, '
+                'PRIMARY KEY (url_hash, criteria_id))'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_findings_stage ON findings(stage, next_attempt_at)')
+            # Stores created before image extraction / claims
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(findings)')}
+            if 'image_url' not in columns:
+                conn.execute('ALTER TABLE findings ADD COLUMN image_url TEXT')
+            if 'claimed_by' not in columns:
+                conn.execute('ALTER TABLE findings ADD COLUMN claimed_by TEXT')
+                conn.execute('ALTER TABLE findings ADD COLUMN lease_until REAL NOT NULL DEFAULT 0')
+
+    def add(self, finding: RawFinding, url_hash: str, run_id: str) -> Dict[str, Any]:
+        """
+        Record a fetched finding (an unfinished entry for the same listing is kept)
+
+        Args:
+            finding: Raw finding
+            url_hash: Hash of the listing URL
+            run_id: Current run
+
+        Returns:
+            Stored entry
+        """
+        key = (url_hash, finding.criteria_id or '')
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO findings (url_hash, criteria_id, run_id, title, price, link, raw_html, '
+                'image_url, source_name, source_type, stage, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(url_hash, criteria_id) DO UPDATE SET '
+                # A listing seen again after it was finished starts over with fresh HTML
+                'run_id = excluded.run_id, raw_html = excluded.raw_html, image_url = excluded.image_url, '
+                'stage = excluded.stage, attempts = 0, next_attempt_at = 0, error = NULL, extracted = NULL, '
+                'listing = NULL, claimed_by = NULL, lease_until = 0, '
+                'updated_at = excluded.updated_at '
+                f"WHERE findings.stage IN ('{REJECTED}', '{FAILED}')",
+                (*key, run_id, finding.title, finding.price, finding.link, finding.raw_html, finding.image_url,
+                 finding.source_name, finding.source_type, FETCHED, time.time())
+            )
+        return self.get(key)
+
+    def get(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        """Load one entry by (url_hash, criteria_id)"""
+        row = self._connect().execute(
+            'SELECT * FROM findings WHERE url_hash = ? AND criteria_id = ?', key
+        ).fetchone()
+        return _to_entry(row) if row else None
+
+    def claim(self, entry: Dict[str, Any]) -> bool:
+        """
+        Take ownership of an entry before working on it
+
+        Succeeds if the entry is unclaimed, already ours, or its holder's
+        lease ran out.
+
+        Args:
+            entry: Stored entry (updated in place)
+
+        Returns:
+            False if another run holds the entry
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'UPDATE findings SET claimed_by = ?, lease_until = ? WHERE url_hash = ? AND criteria_id = ? '
+                'AND (claimed_by IS NULL OR claimed_by = ? OR lease_until < ?)',
+                (self.owner, now + self.lease_seconds, *entry['key'], self.owner, now)
+            )
+        if not cursor.rowcount:
+            return False
+        entry['claimed_by'] = self.owner
+        return True
+
+    def advance(self, entry: Dict[str, Any], stage: str, extracted: Dict = None, listing: Dict = None):
+        """
+        Move entry to the next stage
+
+        Raw HTML is dropped once the finding is extracted.
+
+        Args:
+            entry: Stored entry (updated in place)
+            stage: New stage
+            extracted: OpenAI extraction result (stage extracted)
+            listing: Saved listing row (stage saved)
+        """
+        sets = ['stage = ?', 'attempts = 0', 'error = NULL', 'updated_at = ?', 'lease_until = ?']
+        params: List[Any] = [stage, time.time(), time.time() + self.lease_seconds]
+        if extracted is not None:
+            sets += ['extracted = ?', 'raw_html = NULL']
+            params.append(json.dumps(extracted))
+            entry['extracted'], entry['raw_html'] = extracted, None
+        if listing is not None:
+            sets.append('listing = ?')
+            params.append(json.dumps(listing, default=str))
+            entry['listing'] = listing
+
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE findings SET {', '.join(sets)} WHERE url_hash = ? AND criteria_id = ?",
+                (*params, *entry['key'])
+            )
+        entry['stage'] = stage
+
+    def reject(self, entry: Dict[str, Any], reason: str):
+        """
+        Finish entry without saving (duplicate, no match, ...)
+
+        Args:
+            entry: Stored entry
+            reason: Why it was rejected
+        """
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE findings SET stage = ?, error = ?, raw_html = NULL, updated_at = ? '
+                'WHERE url_hash = ? AND criteria_id = ?',
+                (REJECTED, reason, time.time(), *entry['key'])
+            )
+        entry['stage'] = REJECTED
+
+    def fail(self, entry: Dict[str, Any], error: str) -> bool:
+        """
+        Record a transient failure - retried with back-off until max attempts
+
+        The claim is given up, so any run may pick the retry up.
+
+        Args:
+            entry: Stored entry (keeps its stage)
+            error: Error message
+
+        Returns:
+            True if it will be retried, False if it failed for good
+        """
+        attempts = entry.get('attempts', 0) + 1
+        retry = attempts < self.max_attempts
+        next_attempt_at = time.time() + self.retry_seconds * 2 ** (attempts - 1)
+
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE findings SET stage = ?, attempts = ?, next_attempt_at = ?, error = ?, updated_at = ?, '
+                'claimed_by = NULL WHERE url_hash = ? AND criteria_id = ?',
+                (entry['stage'] if retry else FAILED, attempts, next_attempt_at, error[:2000], time.time(),
+                 *entry['key'])
+            )
+        entry['attempts'] = attempts
+        if not retry:
+            entry['stage'] = FAILED
+        return retry
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """
+        Entries of earlier runs that stopped before being saved and are due for retry
+
+        Entries another run holds are left out - claim() each before resuming it.
+
+        Returns:
+            Stored entries, oldest first
+        """
+        now = time.time()
+        placeholders = ', '.join('?' for _ in UNFINISHED_STAGES)
+        rows = self._connect().execute(
+            f'SELECT * FROM findings WHERE stage IN ({placeholders}) AND next_attempt_at <= ? '
+            'AND (claimed_by IS NULL OR claimed_by = ? OR lease_until < ?) ORDER BY updated_at',
+            (*UNFINISHED_STAGES, now, self.owner, now)
+        ).fetchall()
+        return [_to_entry(row) for row in rows]
+
+    def unnotified(self) -> List[Dict[str, Any]]:
+        """Saved entries whose notification wasn't sent yet (claim() before sending, like unfinished())"""
+        now = time.time()
+        rows = self._connect().execute(
+            'SELECT * FROM findings WHERE stage = ? '
+            'AND (claimed_by IS NULL OR claimed_by = ? OR lease_until < ?) ORDER BY updated_at',
+            (SAVED, self.owner, now)
+        ).fetchall()
+        return [_to_entry(row) for row in rows]
+
+    def mark_notified(self, entries: List[Dict[str, Any]]):
+        """
+        Mark saved entries as notified
+
+        Args:
+            entries: Entries included in the sent email
+        """
+        with self._connect() as conn:
+            conn.executemany(
+                'UPDATE findings SET stage = ?, updated_at = ?, claimed_by = NULL '
+                'WHERE url_hash = ? AND criteria_id = ? AND stage = ?',
+                [(NOTIFIED, time.time(), *entry['key'], SAVED) for entry in entries]
+            )
+
+    def release(self) -> int:
+        """
+        Give up all claims of this store (end of run)
+
+        Entries left unfinished or unnotified become available to the next
+        run right away instead of after the lease.
+
+        Returns:
+            Number of entries released
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'UPDATE findings SET claimed_by = NULL, lease_until = 0 WHERE claimed_by = ?', (self.owner,)
+            )
+            return cursor.rowcount
+
+    def purge(self) -> int:
+        """
+        Delete finished entries older than the retention period
+
+        Saved entries that were never notified are dropped after the same
+        period, so a broken mail setup can't grow the store forever.
+
+        Returns:
+            Number of entries deleted
+        """
+        cutoff = time.time() - self.retention_days * 86400
+        placeholders = ', '.join('?' for _ in FINAL_STAGES + (SAVED,))
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f'DELETE FROM findings WHERE stage IN ({placeholders}) AND updated_at < ?',
+                (*FINAL_STAGES, SAVED, cutoff)
+            )
+            return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Entries per stage"""
+        rows = self._connect().execute('SELECT stage, COUNT(*) FROM findings GROUP BY stage').fetchall()
+        return {stage: count for stage, count in rows}
+
+
+def _to_entry(row) -> Dict[str, Any]:
+    """Convert a findings row to an entry dict"""
+    entry = dict(row)
+    entry['key'] = (entry['url_hash'], entry['criteria_id'])
+    for column in ('extracted', 'listing'):
+        if entry.get(column):
+            entry[column] = json.loads(entry[column])
+    return entry
+
+
+def entry_finding(entry: Dict[str, Any]) -> RawFinding:
+    """
+    Rebuild the raw finding of a stored entry
+
+    Args:
+        entry: Stored entry
+
+    Returns:
+        RawFinding (raw_html is None once extracted)
+    """
+    return RawFinding(
+        title=entry.get('title') or '',
+        price=entry.get('price') or '',
+        link=entry['link'],
+        raw_html=entry.get('raw_html'),
+        source_name=entry.get('source_name'),
+        source_type=entry.get('source_type'),
+        criteria_id=entry.get('criteria_id') or None,
+        image_url=entry.get('image_url')
+    )
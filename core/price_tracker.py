@@ -0,0 +1,133 @@
+"""
+Price-change and relisting detection for known listings
+A known URL hash used to be skipped as a duplicate. Now its result card is
+fingerprinted (price text and title, see RawFinding.fingerprint) and compared
+with the stored fingerprint - one lookup per result page. Only cards whose
+fingerprint changed are re-extracted, and only that card's HTML. New prices
+are appended to watch_price_history, drops of at least PRICE_DROP_MIN_PERCENT
+are collected for notification, and listings marked Sold that show up in
+results again are relisted.
+"""
+import os
+from typing import Dict, Any, List, Optional, Tuple
+from core.records import RawFinding
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PriceTracker:
+    """Detects changed result cards of known listings (migration 009)"""
+
+    def __init__(self, db, openai, run_id: str = None):
+        """
+        Initialize tracker
+
+        Args:
+            db: SupabaseClient
+            openai: OpenAIExtractor used for re-extraction of changed cards
+            run_id: Run ID stored with price observations
+        """
+        self.db = db
+        self.openai = openai
+        self.run_id = run_id
+        self.drop_percent = float(os.getenv('PRICE_DROP_MIN_PERCENT', '3'))
+        self.drops: List[Dict[str, Any]] = []
+        self.observations: List[Dict[str, Any]] = []
+        self.stats = {'unchanged': 0, 'prices_changed': 0, 'relisted': 0}
+
+    def check_page(self, findings: List[Tuple[RawFinding, str]]):
+        """
+        Compare known listings of a result page with their stored fingerprints
+
+        Args:
+            findings: (finding, url_hash) pairs of listings already in the database
+        """
+        known = self.db.get_known_listings([url_hash for _, url_hash in findings])
+
+        for finding, url_hash in findings:
+            row = known.get(url_hash)
+            fingerprint = finding.fingerprint()
+            relisted = row is not None and row.get('availability') == 'Sold'
+
+            if row is None or (fingerprint == row.get('fingerprint') and not relisted):
+                self.stats['unchanged'] += 1
+                continue
+
+            try:
+                self._apply_change(row, finding, fingerprint, relisted)
+            except Exception as e:
+                # The fingerprint isn't stored, so the next sighting retries
+                logger.warning(f"  ⚠️  Change check failed for {finding.link}: {e}")
+
+        self.flush()
+
+    def _apply_change(self, row: Dict[str, Any], finding: RawFinding, fingerprint: str, relisted: bool):
+        """
+        Re-extract a changed card and update its listing
+
+        Args:
+            row: Stored listing (get_known_listings)
+            finding: Result card as seen now
+            fingerprint: Fingerprint of the card
+            relisted: Listing was marked Sold
+        """
+        price = currency = None
+        old_price = float(row['price']) if row.get('price') is not None else None
+
+        # Rows saved before fingerprints existed only get their baseline
+        if row.get('fingerprint') and fingerprint != row['fingerprint']:
+            extracted = self.openai.extract_watch_data(finding.raw_html or '', finding.source_name, raise_errors=True)
+            if extracted and extracted.get('price') is not None:
+                price = float(extracted['price'])
+                currency = extracted.get('currency') or row.get('currency') or 'EUR'
+                if price == old_price and currency == row.get('currency'):
+                    price = None
+
+        if not self.db.update_listing_change(row['id'], fingerprint, price, currency, old_price, relisted):
+            return
+
+        if relisted:
+            self.stats['relisted'] += 1
+            logger.info(f"  ♻️  Relisted: {row.get('name')} ({row.get('source')})")
+
+        if price is None:
+            return
+
+        self.stats['prices_changed'] += 1
+        self.record(row['id'], price, currency)
+        logger.info(f"  💶 Price changed: {row.get('name')} {old_price} → {price} {currency}")
+
+        if old_price and currency == row.get('currency') and price <= old_price * (1 - self.drop_percent / 100):
+            self.drops.append({
+                'name': row.get('name'),
+                'reference_number': row.get('reference_number'),
+                'link': row.get('link'),
+                'source': row.get('source'),
+                'currency': currency,
+                'old_price': old_price,
+                'price': price
+            })
+
+    def record(self, listing_id: str, price: Optional[float], currency: Optional[str]):
+        """
+        Buffer a price observation (written by flush)
+
+        Args:
+            listing_id: UUID of the listing
+            price: Observed price
+            currency: Currency of the price
+        """
+        if price is None:
+            return
+        self.observations.append({
+            'listing_id': listing_id,
+            'price': price,
+            'currency': currency or 'EUR',
+            'run_id': self.run_id
+        })
+
+    def flush(self):
+        """Write buffered price observations"""
+        if self.observations and self.db.record_price_observations(self.observations):
+            self.observations = []
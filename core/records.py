@@ -0,0 +1,203 @@
+"""
+Compact typed records passed through the search pipeline
+Slot-based dataclasses instead of dicts: findings reference their criteria by
+ID instead of carrying a copy, source names/types are interned, and raw HTML
+can be dropped as soon as extraction is done.
+"""
+import hashlib
+import sys
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
+from utils.text_utils import normalize_text
+
+
+def _intern(value: Optional[str], default: str) -> str:
+    """Intern short, highly repetitive strings like source names"""
+    return sys.intern(value or default)
+
+
+@dataclass(slots=True)
+class RawFinding:
+    """Raw listing as returned by a scraper"""
+    title: str
+    price: str
+    link: str
+    raw_html: Optional[str]
+    source_name: str
+    source_type: str
+    criteria_id: Optional[str]
+    image_url: Optional[str] = None
+
+    def __post_init__(self):
+        self.source_name = _intern(self.source_name, 'Unknown')
+        self.source_type = _intern(self.source_type, 'Unknown')
+
+    @classmethod
+    def from_scraper(cls, finding: Dict[str, Any], criteria_id: Optional[str]) -> 'RawFinding':
+        """
+        Build finding from a scraper result dict
+
+        Args:
+            finding: Raw listing dict (title, price, link, raw_html, image_url, source_name, source_type)
+            criteria_id: ID of the search criteria that produced it
+
+        Returns:
+            RawFinding instance
+        """
+        return cls(
+            title=finding.get('title', ''),
+            price=finding.get('price', ''),
+            link=finding.get('link', ''),
+            raw_html=finding.get('raw_html', ''),
+            source_name=finding.get('source_name'),
+            source_type=finding.get('source_type'),
+            criteria_id=criteria_id,
+            image_url=finding.get('image_url') or None
+        )
+
+    def fingerprint(self) -> str:
+        """
+        Compact hash of the result card fields a seller edits (price text, title)
+
+        Returns:
+            16-character hex digest
+        """
+        key = f"{normalize_text(self.price).lower()}|{normalize_text(self.title).lower()}"
+        return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+    def drop_html(self):
+        """Release raw HTML once it is no longer needed"""
+        self.raw_html = None
+
+
+@dataclass(slots=True)
+class ExtractedListing:
+    """Listing after OpenAI extraction, criteria matching and duplicate check"""
+    manufacturer: Optional[str]
+    model: Optional[str]
+    reference_number: Optional[str]
+    year: Optional[int]
+    condition: Optional[str]
+    price: Optional[float]
+    currency: str
+    location: Optional[str]
+    country: Optional[str]
+    seller_name: Optional[str]
+    seller_url: Optional[str]
+    link: str
+    url_hash: str
+    fingerprint: str
+    criteria_id: Optional[str]
+    source_name: str
+    source_type: str
+    # Result card title, text and image, for near-duplicate detection (core/dedup.py)
+    title: str
+    description: str
+    image_url: Optional[str]
+
+    @classmethod
+    def from_extraction(cls, extracted: Dict[str, Any], finding: RawFinding, url_hash: str) -> 'ExtractedListing':
+        """
+        Combine OpenAI extraction result with the originating finding
+
+        Args:
+            extracted: Dict returned by OpenAIExtractor.extract_watch_data
+            finding: Raw finding the data was extracted from
+            url_hash: Hash of the listing URL
+
+        Returns:
+            ExtractedListing instance
+        """
+        return cls(
+            manufacturer=extracted.get('manufacturer', ''),
+            model=extracted.get('model', ''),
+            reference_number=extracted.get('reference_number', ''),
+            year=extracted.get('year'),
+            condition=extracted.get('condition', 'Unbekannt'),
+            price=extracted.get('price'),
+            currency=_intern(extracted.get('currency'), 'EUR'),
+            location=extracted.get('location', ''),
+            country=extracted.get('country', ''),
+            seller_name=extracted.get('seller_name', ''),
+            seller_url=extracted.get('seller_url', ''),
+            link=finding.link,
+            url_hash=url_hash,
+            fingerprint=finding.fingerprint(),
+            criteria_id=finding.criteria_id,
+            source_name=finding.source_name,
+            source_type=finding.source_type,
+            title=finding.title or '',
+            description=extracted.get('description') or '',
+            image_url=finding.image_url
+        )
+
+
+@dataclass(slots=True)
+class ListingRow:
+    """Row written to watch_listings"""
+    name: str
+    manufacturer: Optional[str]
+    model: Optional[str]
+    reference_number: Optional[str]
+    year: Optional[int]
+    condition: Optional[str]
+    price: Optional[float]
+    currency: str
+    location: Optional[str]
+    country: Optional[str]
+    link: str
+    seller_name: Optional[str]
+    seller_url: Optional[str]
+    source: str
+    source_type: str
+    url_hash: str
+    fingerprint: str
+    search_criteria_id: Optional[str]
+    image_url: Optional[str]
+    # Market comparison at save time (core/market_stats.py)
+    deal_score: Optional[float] = None
+    market_median: Optional[float] = None
+    market_p10: Optional[float] = None
+    market_p90: Optional[float] = None
+    market_samples: Optional[int] = None
+    # Cross-source duplicate clustering (core/dedup.py)
+    dedup_signature: Optional[List[int]] = None
+    canonical_id: Optional[str] = None
+    image_hash: Optional[int] = None
+
+    @classmethod
+    def from_listing(cls, listing: ExtractedListing) -> 'ListingRow':
+        """
+        Build database row from an extracted listing
+
+        Args:
+            listing: Extracted listing
+
+        Returns:
+            ListingRow instance
+        """
+        return cls(
+            name=f"{listing.manufacturer or 'Unknown'} {listing.model or ''}",
+            manufacturer=listing.manufacturer,
+            model=listing.model,
+            reference_number=listing.reference_number,
+            year=listing.year,
+            condition=listing.condition,
+            price=listing.price,
+            currency=listing.currency,
+            location=listing.location,
+            country=listing.country,
+            link=listing.link,
+            seller_name=listing.seller_name,
+            seller_url=listing.seller_url,
+            source=listing.source_name,
+            source_type=listing.source_type,
+            url_hash=listing.url_hash,
+            fingerprint=listing.fingerprint,
+            search_criteria_id=listing.criteria_id,
+            image_url=listing.image_url
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dict for SupabaseClient.create_listing and email"""
+        return {name: getattr(self, name) for name in self.__slots__}
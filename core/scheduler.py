@@ -0,0 +1,349 @@
+"""
+Time-budget scheduler for search runs
+Orders (source, criteria) work by historical new-listing yield per second and
+stops starting work when the run budget is nearly used up, so the hourly job
+never runs into the next slot. Work that didn't fit is deferred and goes first
+in the next run.
+
+Each pair also tracks its new-listing arrival rate and gets a next-due time:
+pairs that just produced listings are searched every run, empty pairs back off
+exponentially (never longer than the expected gap between arrivals or the
+staleness cap), and a run only processes pairs that are due. Yield history
+lives in a local SQLite file.
+"""
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+from utils.deadline import Deadline
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+POLL_COLUMNS = {
+    'rate': 'REAL NOT NULL DEFAULT 0',
+    'empty_streak': 'INTEGER NOT NULL DEFAULT 0',
+    'last_run_at': 'REAL',
+    'next_due_at': 'REAL',
+}
+
+
+@dataclass(slots=True)
+class WorkItem:
+    """One (source, criteria) search"""
+    source: Dict[str, Any]
+    criteria: Dict[str, Any]
+    score: float
+    expected_seconds: float
+    deferred: bool
+    rate: float = 0.0  # New listings per hour (EWMA)
+    empty_streak: int = 0
+    last_run_at: Optional[float] = None
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        """(source_id, criteria_id)"""
+        return self.source.get('id'), self.criteria.get('id')
+
+
+class YieldHistory:
+    """Per (source, criteria) run history: new listings, seconds spent, deferrals"""
+
+    def __init__(self, db_path: str = None):
+        """
+        Initialize history
+
+        Args:
+            db_path: SQLite file (default: SCHEDULER_DB)
+        """
+        self.db_path = db_path or os.getenv('SCHEDULER_DB', 'scheduler_state.db')
+        self._local = threading.local()
+        self._init_db()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Get this thread's connection (None if the history is unavailable)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            try:
+                conn = sqlite3.connect(self.db_path, timeout=30)
+                self._local.conn = conn
+            except sqlite3.Error as e:
+                logger.warning(f"Scheduler history unavailable: {e}")
+                return None
+        return conn
+
+    def _init_db(self):
+        """Create history table"""
+        conn = self._connect()
+        if conn is None:
+            return
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS search_yield ('
+                'source_id TEXT NOT NULL, criteria_id TEXT NOT NULL, '
+                'runs INTEGER NOT NULL DEFAULT 0, new_listings REAL NOT NULL DEFAULT 0, '
+                'seconds REAL NOT NULL DEFAULT 0, deferred_at REAL, updated_at REAL NOT NULL, '
+                'PRIMARY KEY (source_id, criteria_id))'
+            )
+            # Polling columns were added later - extend older history files in place
+            existing = {row[1] for row in conn.execute('PRAGMA table_info(search_yield)')}
+            for column, definition in POLL_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f'ALTER TABLE search_yield ADD COLUMN {column} {definition}')
+
+    def load(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """
+        Load history of all pairs
+
+        Returns:
+            Dict of (source_id, criteria_id) -> {runs, new_listings, seconds,
+            deferred_at, rate, empty_streak, last_run_at, next_due_at}
+        """
+        conn = self._connect()
+        if conn is None:
+            return {}
+        try:
+            rows = conn.execute(
+                'SELECT source_id, criteria_id, runs, new_listings, seconds, deferred_at, '
+                'rate, empty_streak, last_run_at, next_due_at FROM search_yield'
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not load scheduler history: {e}")
+            return {}
+        columns = ('runs', 'new_listings', 'seconds', 'deferred_at', 'rate', 'empty_streak', 'last_run_at', 'next_due_at')
+        return {(row[0], row[1]): dict(zip(columns, row[2:])) for row in rows}
+
+    def record(
+        self,
+        key: Tuple[str, str],
+        new_listings: int,
+        seconds: float,
+        decay: float,
+        poll: Dict[str, Any]
+    ):
+        """
+        Add one completed search, decaying older runs
+
+        Args:
+            key: (source_id, criteria_id)
+            new_listings: Listings saved by this search
+            seconds: Wall time spent on fetching, extraction and saving
+            decay: Weight kept by previous runs (recent runs count more)
+            poll: New rate, empty_streak, last_run_at and next_due_at
+        """
+        self._write(
+            'INSERT INTO search_yield (source_id, criteria_id, runs, new_listings, seconds, deferred_at, updated_at, '
+            'rate, empty_streak, last_run_at, next_due_at) '
+            'VALUES (?, ?, 1, ?, ?, NULL, ?, ?, ?, ?, ?) ON CONFLICT(source_id, criteria_id) DO UPDATE SET '
+            'runs = runs + 1, new_listings = new_listings * ? + excluded.new_listings, '
+            'seconds = seconds * ? + excluded.seconds, deferred_at = NULL, updated_at = excluded.updated_at, '
+            'rate = excluded.rate, empty_streak = excluded.empty_streak, '
+            'last_run_at = excluded.last_run_at, next_due_at = excluded.next_due_at',
+            (*key, new_listings, seconds, time.time(), poll['rate'], poll['empty_streak'],
+             poll['last_run_at'], poll['next_due_at'], decay, decay)
+        )
+
+    def defer(self, key: Tuple[str, str]):
+        """
+        Mark a search as deferred to the next run (keeps the oldest deferral)
+
+        Args:
+            key: (source_id, criteria_id)
+        """
+        now = time.time()
+        self._write(
+            'INSERT INTO search_yield (source_id, criteria_id, deferred_at, updated_at) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT(source_id, criteria_id) DO UPDATE SET '
+            'deferred_at = COALESCE(deferred_at, excluded.deferred_at), updated_at = excluded.updated_at',
+            (*key, now, now)
+        )
+
+    def _write(self, sql: str, params: tuple):
+        """Execute a write, logging failures"""
+        conn = self._connect()
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.execute(sql, params)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not update scheduler history: {e}")
+
+
+class BudgetScheduler:
+    """Plans a search run within a wall-clock budget"""
+
+    def __init__(self, budget_seconds: float = None, history: YieldHistory = None):
+        """
+        Initialize scheduler
+
+        Args:
+            budget_seconds: Wall-clock budget of the run (default: RUN_TIME_BUDGET)
+            history: Yield history (default: SQLite at SCHEDULER_DB)
+        """
+        if budget_seconds is None:
+            budget_seconds = float(os.getenv('RUN_TIME_BUDGET', '3000'))
+        self.deadline = Deadline(budget_seconds)
+        # Time kept free for email, summary and logging after the last search
+        self.reserve_seconds = float(os.getenv('RUN_BUDGET_RESERVE', '120'))
+        self.default_seconds = float(os.getenv('SCHEDULER_DEFAULT_SECONDS', '60'))
+        self.decay = float(os.getenv('SCHEDULER_DECAY', '0.8'))
+        self.history = history or YieldHistory()
+        self.deferred: List[WorkItem] = []
+
+        # Adaptive polling - intervals in seconds, run start as the time base
+        self.started_at = time.time()
+        self.min_interval = float(os.getenv('POLL_MIN_INTERVAL', '3600'))
+        self.max_interval = float(os.getenv('POLL_MAX_INTERVAL', str(24 * 3600)))
+        self.backoff = float(os.getenv('POLL_BACKOFF', '2'))
+        self.rate_smoothing = float(os.getenv('POLL_RATE_SMOOTHING', '0.3'))
+        # Cron start jitter - a pair due a few minutes from now is searched now
+        self.due_slack = float(os.getenv('POLL_DUE_SLACK', '300'))
+        self.not_due = 0
+
+    def plan(
+        self,
+        sources: List[Dict[str, Any]],
+        criteria_list: List[Dict[str, Any]],
+        due_only: bool = True
+    ) -> List[WorkItem]:
+        """
+        Order all due (source, criteria) pairs
+
+        Pairs whose next-due time lies in the future are left out. Deferred
+        pairs come first (oldest first) so nothing starves; the rest is sorted
+        by smoothed new listings per second. Pairs without history are always
+        due and get a prior of one listing per default run time, so new
+        sources and criteria are tried early.
+
+        Args:
+            sources: Active sources
+            criteria_list: Active search criteria
+            due_only: Leave out pairs that are not due (False for backfills)
+
+        Returns:
+            Work items in execution order
+        """
+        history = self.history.load()
+        items = []
+        self.not_due = 0
+
+        for source in sources:
+            for criteria in criteria_list:
+                stats = history.get((source.get('id'), criteria.get('id')), {})
+                deferred = stats.get('deferred_at') is not None
+                next_due_at = stats.get('next_due_at')
+                if due_only and not deferred and next_due_at and next_due_at > self.started_at + self.due_slack:
+                    self.not_due += 1
+                    continue
+
+                seconds = stats.get('seconds') or 0.0
+                new_listings = stats.get('new_listings') or 0.0
+                runs = stats.get('runs') or 0
+
+                # Decayed sums weigh runs by decay^age - normalize back to one run
+                if self.decay < 1:
+                    weight = (1 - self.decay ** runs) / (1 - self.decay)
+                else:
+                    weight = float(runs)
+                expected = seconds / weight if weight else self.default_seconds
+                score = (new_listings + 1) / (seconds + self.default_seconds)
+
+                items.append(WorkItem(
+                    source=source,
+                    criteria=criteria,
+                    score=score,
+                    expected_seconds=expected,
+                    deferred=deferred,
+                    rate=stats.get('rate') or 0.0,
+                    empty_streak=stats.get('empty_streak') or 0,
+                    last_run_at=stats.get('last_run_at')
+                ))
+
+        deferred_at = {key: stats.get('deferred_at') for key, stats in history.items()}
+        items.sort(key=lambda item: (
+            not item.deferred,
+            (deferred_at.get(item.key) or 0) if item.deferred else -item.score
+        ))
+        return items
+
+    def can_start(self, item: WorkItem) -> bool:
+        """
+        Check if the expected duration of item fits the remaining budget
+
+        Args:
+            item: Work item about to start
+
+        Returns:
+            True if it should run now, False to defer it
+        """
+        return self.deadline.remaining() - self.reserve_seconds >= item.expected_seconds
+
+    def exhausted(self) -> bool:
+        """True once only the reserve is left - nothing new should start"""
+        return self.deadline.remaining() <= self.reserve_seconds
+
+    def record(self, item: WorkItem, new_listings: int, seconds: float):
+        """
+        Record a completed search
+
+        Only searches that ran to completion belong here - a failed or
+        budget-interrupted search would count as an empty one and push the
+        pair's yield estimate and polling interval in the wrong direction.
+
+        Args:
+            item: Finished work item
+            new_listings: Listings saved
+            seconds: Wall time spent
+        """
+        self.history.record(item.key, new_listings, seconds, self.decay, self._next_poll(item, new_listings))
+
+    def _next_poll(self, item: WorkItem, new_listings: int) -> Dict[str, Any]:
+        """
+        Update arrival rate and compute the next-due time of a pair
+
+        Args:
+            item: Finished work item
+            new_listings: Listings saved by this search
+
+        Returns:
+            Dict with rate, empty_streak, last_run_at and next_due_at
+        """
+        # Listings found now arrived since the previous search of the pair
+        elapsed = self.started_at - item.last_run_at if item.last_run_at else self.min_interval
+        observed = new_listings / (max(elapsed, self.min_interval) / 3600)
+        rate = self.rate_smoothing * observed + (1 - self.rate_smoothing) * item.rate
+
+        if new_listings:
+            empty_streak = 0
+            interval = self.min_interval
+        else:
+            empty_streak = item.empty_streak + 1
+            interval = self.min_interval * self.backoff ** empty_streak
+            if rate > 0:
+                # Don't back off past the expected gap between two arrivals
+                interval = min(interval, 3600 / rate)
+
+        interval = min(max(interval, self.min_interval), self.max_interval)
+        return {
+            'rate': rate,
+            'empty_streak': empty_streak,
+            'last_run_at': self.started_at,
+            'next_due_at': self.started_at + interval
+        }
+
+    def defer(self, item: WorkItem):
+        """
+        Defer item to the next run
+
+        Args:
+            item: Work item that didn't fit
+        """
+        self.deferred.append(item)
+        self.history.defer(item.key)
+
+    def work_deadline(self) -> Deadline:
+        """Deadline for fetches - the run budget minus the reserve"""
+        return Deadline(max(0.0, self.deadline.remaining() - self.reserve_seconds))
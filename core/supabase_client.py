@@ -4,15 +4,39 @@ Handles all interactions with Supabase PostgreSQL database
 """
 import os
 from typing import List, Dict, Optional
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from dotenv import load_dotenv
 from supabase import create_client, Client
+from postgrest.exceptions import APIError
 import logging
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Postgres unique_violation
+UNIQUE_VIOLATION = '23505'
+
+
+class DuplicateListingError(Exception):
+    """A listing with the same url_hash was saved already"""
+
+
+def parse_timestamp(value: Optional[str], default: Optional[datetime] = datetime.min) -> Optional[datetime]:
+    """
+    Parse a timestamp column value
+
+    Args:
+        value: ISO timestamp from Supabase
+        default: Returned if the value is missing (default: oldest)
+
+    Returns:
+        Naive datetime
+    """
+    if not value:
+        return default
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+
 
 class SupabaseClient:
     """
@@ -31,6 +55,25 @@ class SupabaseClient:
         self.client: Client = create_client(self.url, self.key)
         logger.info("✅ Supabase client initialized")
 
+    @staticmethod
+    def _select_all(build_query, page_size: int = 1000) -> List[Dict]:
+        """
+        Run a select page by page - PostgREST caps a response at 1000 rows
+
+        Args:
+            build_query: Returns a fresh filtered select (ordered by id here)
+            page_size: Rows per request
+
+        Returns:
+            All rows
+        """
+        rows = []
+        while True:
+            response = build_query().order('id').range(len(rows), len(rows) + page_size - 1).execute()
+            rows.extend(response.data)
+            if len(response.data) < page_size:
+                return rows
+
     # ========================================
     # SOURCES
     # ========================================
@@ -80,6 +123,35 @@ class SupabaseClient:
         except Exception as e:
             logger.error(f"❌ Error updating source stats: {e}")
 
+    def get_source_health(self) -> Dict[str, Dict]:
+        """
+        Get circuit breaker state of all sources
+
+        Returns:
+            Dict of source_id -> watch_source_health row
+        """
+        try:
+            response = self.client.table('watch_source_health').select('*').execute()
+            return {row['source_id']: row for row in response.data}
+        except Exception as e:
+            logger.error(f"❌ Error loading source health: {e}")
+            return {}
+
+    def save_source_health(self, health: Dict):
+        """
+        Upsert circuit breaker state of a source
+
+        Args:
+            health: Dictionary from CircuitBreaker.to_dict()
+        """
+        try:
+            self.client.table('watch_source_health').upsert({
+                **health,
+                'updated_at': datetime.now().isoformat()
+            }).execute()
+        except Exception as e:
+            logger.error(f"❌ Error saving source health: {e}")
+
     # ========================================
     # SEARCH CRITERIA
     # ========================================
@@ -98,6 +170,45 @@ class SupabaseClient:
             logger.error(f"❌ Error loading search criteria: {e}")
             return []
 
+    def get_pending_backfills(self) -> List[Dict]:
+        """
+        Get active criteria that were added or changed since their last backfill
+        (columns added by migration 006)
+
+        Returns:
+            List of criteria rows, oldest change first
+        """
+        try:
+            response = self.client.table('watch_search_criteria').select('*').eq('active', True).execute()
+            pending = [
+                c for c in response.data
+                if not c.get('backfilled_at')
+                or parse_timestamp(c.get('updated_at')) > parse_timestamp(c['backfilled_at'])
+            ]
+            return sorted(pending, key=lambda c: parse_timestamp(c.get('updated_at') or c.get('created_at')))
+        except Exception as e:
+            logger.error(f"❌ Error loading pending backfills: {e}")
+            return []
+
+    def mark_criteria_backfilled(self, criteria: Dict, first_results_at: Optional[datetime] = None):
+        """
+        Record that a criteria version was backfilled
+
+        backfilled_at is set to the criteria's updated_at, so a change made
+        while the backfill ran triggers another one.
+
+        Args:
+            criteria: Criteria row as loaded before the backfill
+            first_results_at: When the first listing of the criteria was saved
+        """
+        try:
+            update_data = {'backfilled_at': criteria.get('updated_at') or criteria.get('created_at')}
+            if first_results_at and not criteria.get('first_results_at'):
+                update_data['first_results_at'] = first_results_at.isoformat()
+            self.client.table('watch_search_criteria').update(update_data).eq('id', criteria['id']).execute()
+        except Exception as e:
+            logger.error(f"❌ Error marking criteria backfilled: {e}")
+
     # ========================================
     # LISTINGS
     # ========================================
@@ -116,12 +227,13 @@ class SupabaseClient:
             logger.error(f"❌ Error loading URL hashes: {e}")
             return []
 
-    def create_listing(self, data: Dict) -> Optional[str]:
+    def create_listing(self, data: Dict, raise_duplicates: bool = False) -> Optional[str]:
         """
         Create new watch listing
 
         Args:
             data: Dictionary with listing properties
+            raise_duplicates: Raise DuplicateListingError on a url_hash conflict
 
         Returns:
             UUID of created listing or None if failed
@@ -148,6 +260,16 @@ class SupabaseClient:
                 'availability': 'Available',
                 'last_checked': datetime.now().isoformat(),
                 'url_hash': data['url_hash'],  # Required
+                'fingerprint': data.get('fingerprint'),
+                'deal_score': data.get('deal_score'),
+                'market_median': data.get('market_median'),
+                'market_p10': data.get('market_p10'),
+                'market_p90': data.get('market_p90'),
+                'market_samples': data.get('market_samples'),
+                'dedup_signature': data.get('dedup_signature'),
+                'canonical_id': data.get('canonical_id'),
+                'image_url': data.get('image_url'),
+                'image_hash': data.get('image_hash'),
                 'search_criteria_id': data.get('search_criteria_id'),
                 'created_at': datetime.now().isoformat(),
                 'updated_at': datetime.now().isoformat()
@@ -157,10 +279,103 @@ class SupabaseClient:
             listing_id = response.data[0]['id']
             logger.info(f"✅ Created listing: {data.get('name')} from {data['source']}")
             return listing_id
+        except APIError as e:
+            if e.code == UNIQUE_VIOLATION and raise_duplicates:
+                raise DuplicateListingError(data['url_hash']) from e
+            logger.error(f"❌ Error creating listing: {e}")
+            return None
         except Exception as e:
             logger.error(f"❌ Error creating listing: {e}")
             return None
 
+    def get_known_listings(self, url_hashes: List[str]) -> Dict[str, Dict]:
+        """
+        Get fingerprint, price and availability of known listings (migration 009)
+
+        Args:
+            url_hashes: URL hashes seen on a result page
+
+        Returns:
+            Dict of url_hash -> listing row
+        """
+        if not url_hashes:
+            return {}
+        try:
+            response = (
+                self.client.table('watch_listings')
+                .select('id, url_hash, fingerprint, name, link, source, reference_number, price, currency, availability')
+                .in_('url_hash', list(url_hashes))
+                .execute()
+            )
+            return {row['url_hash']: row for row in response.data}
+        except Exception as e:
+            logger.error(f"❌ Error loading known listings: {e}")
+            return {}
+
+    def update_listing_change(self, listing_id: str, fingerprint: str, price: Optional[float] = None,
+                              currency: Optional[str] = None, previous_price: Optional[float] = None,
+                              relisted: bool = False) -> bool:
+        """
+        Store a changed fingerprint, a new price, or a relisting
+
+        Args:
+            listing_id: UUID of the listing
+            fingerprint: New result card fingerprint
+            price: New price (None = price unchanged)
+            currency: Currency of the new price
+            previous_price: Price before the change
+            relisted: Listing marked Sold is offered again
+
+        Returns:
+            True if the update succeeded
+        """
+        try:
+            now = datetime.now().isoformat()
+            update_data = {'fingerprint': fingerprint, 'updated_at': now}
+            if price is not None:
+                update_data.update(price=price, currency=currency or 'EUR',
+                                   previous_price=previous_price, price_changed_at=now)
+            if relisted:
+                update_data.update(availability='Available', sold_at=None, relisted_at=now,
+                                   last_checked=now, probably_sold_at=None, missed_crawls=0)
+
+            self.client.table('watch_listings').update(update_data).eq('id', listing_id).execute()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error updating listing {listing_id}: {e}")
+            return False
+
+    def get_dedup_index(self, days: float) -> List[Dict]:
+        """
+        Get signatures and image hashes of recent listings for duplicate detection (migrations 012, 013)
+
+        Args:
+            days: Window in days
+
+        Returns:
+            Rows with id, canonical_id, source, reference_number, year, price,
+            currency, seller_name, dedup_signature and image_hash
+        """
+        try:
+            rows = []
+            page_size = 1000
+            cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+            while True:
+                response = (
+                    self.client.table('watch_listings')
+                    .select('id, canonical_id, source, reference_number, year, price, currency, seller_name, '
+                            'dedup_signature, image_hash')
+                    .gte('date_found', cutoff).or_('dedup_signature.not.is.null,image_hash.not.is.null')
+                    .order('date_found')
+                    .range(len(rows), len(rows) + page_size - 1).execute()
+                )
+                rows.extend(response.data)
+                if len(response.data) < page_size:
+                    return rows
+        except Exception as e:
+            logger.error(f"❌ Error loading duplicate index: {e}")
+            return []
+
     def get_available_listings(self) -> List[Dict]:
         """
         Get all listings marked as Available
@@ -175,6 +390,87 @@ class SupabaseClient:
             logger.error(f"❌ Error loading available listings: {e}")
             return []
 
+    def get_listings_to_confirm(self, recheck_hours: float) -> List[Dict]:
+        """
+        Get Available listings that need a detail-page check (migration 007):
+        flagged as probably sold, or neither seen by a complete crawl nor
+        checked within recheck_hours
+
+        Args:
+            recheck_hours: Hours without sighting or check before a listing is checked anyway
+
+        Returns:
+            List of listings, flagged ones first
+        """
+        try:
+            cutoff = (datetime.now() - timedelta(hours=recheck_hours)).isoformat()
+            rows = self._select_all(
+                lambda: self.client.table('watch_listings').select('*')
+                .eq('availability', 'Available')
+                .or_(
+                    f'probably_sold_at.not.is.null,'
+                    f'and(or(last_checked.is.null,last_checked.lt.{cutoff}),'
+                    f'or(last_seen_at.is.null,last_seen_at.lt.{cutoff}))'
+                )
+            )
+            listings = sorted(rows, key=lambda l: l.get('probably_sold_at') is None)
+            flagged = sum(1 for l in listings if l.get('probably_sold_at'))
+            logger.info(f"📋 Loaded {len(listings)} listings to confirm ({flagged} probably sold)")
+            return listings
+        except Exception as e:
+            logger.error(f"❌ Error loading listings to confirm: {e}")
+            return []
+
+    def get_sell_through_data(self, days: float) -> Dict[str, List[Dict]]:
+        """
+        Get listing ages and recent sales for sell-through statistics
+
+        Args:
+            days: Window for sold listings
+
+        Returns:
+            Dict with 'available' and 'sold' lists (source, source_type, date_found, sold_at)
+        """
+        try:
+            columns = 'source, source_type, date_found, sold_at'
+            cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+            available = self._select_all(
+                lambda: self.client.table('watch_listings').select(columns).eq('availability', 'Available')
+            )
+            sold = self._select_all(
+                lambda: self.client.table('watch_listings').select(columns)
+                .eq('availability', 'Sold').gte('sold_at', cutoff)
+            )
+            return {'available': available, 'sold': sold}
+        except Exception as e:
+            logger.error(f"❌ Error loading sell-through data: {e}")
+            return {'available': [], 'sold': []}
+
+    def record_crawl(self, source: str, criteria_id: str, seen_hashes: List[str], threshold: int) -> int:
+        """
+        Record a complete crawl of a (source, criteria) result set (migration 007)
+
+        Args:
+            source: Source name as stored in watch_listings.source
+            criteria_id: UUID of the search criteria
+            seen_hashes: URL hashes of all listings on the crawled result pages
+            threshold: Missed complete crawls before a listing is flagged
+
+        Returns:
+            Number of listings newly flagged as probably sold
+        """
+        try:
+            response = self.client.rpc('watch_record_crawl', {
+                'p_source': source,
+                'p_criteria_id': criteria_id,
+                'p_seen': list(seen_hashes),
+                'p_threshold': threshold
+            }).execute()
+            return int(response.data or 0)
+        except Exception as e:
+            logger.error(f"❌ Error recording crawl: {e}")
+            return 0
+
     def update_availability(self, listing_id: str, status: str, sold_at: Optional[datetime] = None):
         """
         Update listing availability status
@@ -199,6 +495,214 @@ class SupabaseClient:
         except Exception as e:
             logger.error(f"❌ Error updating availability: {e}")
 
+    def update_availability_batch(
+        self,
+        listing_ids: List[str],
+        status: str,
+        sold_at: Optional[datetime] = None,
+        clear_flags: bool = False
+    ) -> bool:
+        """
+        Update availability of several listings with one request
+
+        Args:
+            listing_ids: UUIDs of the listings
+            status: 'Available', 'Sold', or 'Unknown' (same for all)
+            sold_at: Timestamp when marked as sold
+            clear_flags: Reset probably-sold flags of confirmed listings (migration 007)
+
+        Returns:
+            True if the update succeeded
+        """
+        if not listing_ids:
+            return True
+        try:
+            update_data = {
+                'availability': status,
+                'last_checked': datetime.now().isoformat(),
+                'updated_at': datetime.now().isoformat()
+            }
+
+            if status == 'Sold' and sold_at:
+                update_data['sold_at'] = sold_at.isoformat()
+            if clear_flags and status == 'Available':
+                update_data.update(probably_sold_at=None, missed_crawls=0)
+
+            self.client.table('watch_listings').update(update_data).in_('id', list(listing_ids)).execute()
+            logger.info(f"✅ Updated availability for {len(listing_ids)} listings: {status}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error updating availability batch: {e}")
+            return False
+
+    # ========================================
+    # PRICE HISTORY
+    # ========================================
+
+    def record_price_observations(self, observations: List[Dict]) -> bool:
+        """
+        Append price observations to watch_price_history (migration 010)
+        Observations equal to the listing's latest price are dropped server-side
+
+        Args:
+            observations: Dicts with listing_id, price, currency, run_id
+
+        Returns:
+            True if the insert succeeded
+        """
+        if not observations:
+            return True
+        try:
+            response = self.client.rpc('watch_record_prices', {'p_rows': observations}).execute()
+            logger.debug(f"💶 Recorded {response.data} of {len(observations)} price observations")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error recording price history: {e}")
+            return False
+
+    def compact_price_history(self, keep_days: int) -> Optional[int]:
+        """
+        Fold raw price observations into daily min/max/last rows
+
+        Args:
+            keep_days: Days of raw observations to keep
+
+        Returns:
+            Number of raw observations compacted, or None if compaction failed
+        """
+        try:
+            response = self.client.rpc('watch_compact_price_history', {'p_keep_days': keep_days}).execute()
+            return int(response.data or 0)
+        except Exception as e:
+            logger.error(f"❌ Error compacting price history: {e}")
+            return None
+
+    def get_price_history(
+        self,
+        listing_id: Optional[str] = None,
+        reference_number: Optional[str] = None,
+        since: Optional[datetime] = None
+    ) -> List[Dict]:
+        """
+        Get the price series of a listing, or of a reference across sources
+
+        Args:
+            listing_id: UUID of the listing
+            reference_number: Reference number (used if no listing_id is given)
+            since: Oldest observation to return
+
+        Returns:
+            Rows with listing_id, source, observed_at, currency, min_price,
+            max_price, last_price, observations and granularity ('daily' or
+            'raw'), oldest first
+        """
+        try:
+            response = self.client.rpc('watch_price_series', {
+                'p_listing_id': listing_id,
+                'p_reference': reference_number,
+                'p_since': since.isoformat() if since else None
+            }).execute()
+            return response.data or []
+        except Exception as e:
+            logger.error(f"❌ Error loading price history: {e}")
+            return []
+
+    # ========================================
+    # MARKET STATISTICS
+    # ========================================
+
+    def get_market_sketches(self, since_day: date) -> List[Dict]:
+        """
+        Get daily market sketches (migration 011)
+
+        Args:
+            since_day: Oldest day to load
+
+        Returns:
+            Rows with key, day, bins and count
+        """
+        try:
+            rows = []
+            page_size = 1000
+            while True:
+                response = (
+                    self.client.table('watch_market_sketches').select('key, day, bins, count')
+                    .gte('day', since_day.isoformat())
+                    .order('key').order('day')
+                    .range(len(rows), len(rows) + page_size - 1).execute()
+                )
+                rows.extend(response.data)
+                if len(response.data) < page_size:
+                    return rows
+        except Exception as e:
+            logger.error(f"❌ Error loading market sketches: {e}")
+            return []
+
+    def merge_market_sketches(self, rows: List[Dict]) -> bool:
+        """
+        Add sketch deltas to the stored daily sketches
+
+        Args:
+            rows: Dicts with key, day (ISO date), bins and count
+
+        Returns:
+            True if the merge succeeded
+        """
+        if not rows:
+            return True
+        try:
+            self.client.rpc('watch_merge_market_sketches', {'p_rows': rows}).execute()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error saving market sketches: {e}")
+            return False
+
+    def replace_market_sketches(self, rows: List[Dict]) -> bool:
+        """
+        Replace all stored sketches with a batch recompute
+
+        Args:
+            rows: Dicts with key, day (ISO date), bins and count
+
+        Returns:
+            True if the replacement succeeded
+        """
+        try:
+            self.client.rpc('watch_replace_market_sketches', {'p_rows': rows}).execute()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error replacing market sketches: {e}")
+            return False
+
+    def get_market_listings(self, days: float) -> List[Dict]:
+        """
+        Get priced listings of the market window for a batch recompute
+
+        Args:
+            days: Window in days
+
+        Returns:
+            Rows with manufacturer, model, reference_number, price, currency, date_found
+        """
+        try:
+            rows = []
+            page_size = 1000
+            cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+            while True:
+                response = (
+                    self.client.table('watch_listings')
+                    .select('manufacturer, model, reference_number, price, currency, date_found')
+                    .gte('date_found', cutoff).not_.is_('price', 'null')
+                    .order('date_found')
+                    .range(len(rows), len(rows) + page_size - 1).execute()
+                )
+                rows.extend(response.data)
+                if len(response.data) < page_size:
+                    return rows
+        except Exception as e:
+            logger.error(f"❌ Error loading market listings: {e}")
+            return []
+
     # ========================================
     # SYNC HISTORY
     # ========================================
@@ -225,11 +729,34 @@ class SupabaseClient:
                 'created_at': datetime.now().isoformat()
             }
 
+            # Sharded runs only (columns added by migration 005)
+            if stats.get('run_id'):
+                log_data['run_id'] = stats['run_id']
+                log_data['shard'] = stats.get('shard')
+                log_data['name'] += f" [{stats.get('shard') or 'all'}]"
+
             self.client.table('watch_sync_history').insert(log_data).execute()
             logger.info(f"📊 Logged search run: {stats.get('listings_found', 0)} found, {stats.get('listings_saved', 0)} saved")
         except Exception as e:
             logger.error(f"❌ Error logging search run: {e}")
 
+    def get_run_history(self, run_id: str) -> List[Dict]:
+        """
+        Get sync_history rows of all shards of a run
+
+        Args:
+            run_id: Shared run ID
+
+        Returns:
+            List of sync_history rows
+        """
+        try:
+            response = self.client.table('watch_sync_history').select('*').eq('run_id', run_id).execute()
+            return response.data
+        except Exception as e:
+            logger.error(f"❌ Error fetching run history: {e}")
+            return []
+
     # ========================================
     # UTILITY METHODS
     # ========================================
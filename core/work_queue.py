@@ -0,0 +1,409 @@
+"""
+Postgres work queue for distributed searching
+The coordinator enqueues one task per (source, criteria) pair; workers claim
+tasks with FOR UPDATE SKIP LOCKED, fetch one result page each and enqueue the
+next page themselves. A task is only claimable while its domain lease is free,
+so request spacing holds across all workers. Workers heartbeat running tasks;
+tasks of crashed workers are requeued once their heartbeat goes stale.
+"""
+import os
+import threading
+from typing import List, Dict, Any, Optional
+import psycopg2
+from psycopg2.extras import Json, RealDictCursor
+from utils.logger import get_logger
+from utils.sharding import source_domain
+
+logger = get_logger(__name__)
+
+
+class WorkQueue:
+    """Task queue on watch_search_tasks / watch_domain_leases"""
+
+    def __init__(self, connection_string: str = None):
+        """
+        Initialize queue connection
+
+        Args:
+            connection_string: Postgres DSN (default: WORK_QUEUE_URL, POSTGRES_URL_NON_POOLING, POSTGRES_URL)
+        """
+        self.connection_string = (
+            connection_string
+            or os.getenv('WORK_QUEUE_URL')
+            or os.getenv('POSTGRES_URL_NON_POOLING')
+            or os.getenv('POSTGRES_URL')
+        )
+        if not self.connection_string:
+            raise ValueError("Work queue connection string not found in environment variables")
+
+        self.max_attempts = int(os.getenv('WORK_QUEUE_MAX_ATTEMPTS', '3'))
+        self.retry_seconds = float(os.getenv('WORK_QUEUE_RETRY_SECONDS', '30'))
+        self.conn = psycopg2.connect(self.connection_string)
+
+    def close(self):
+        """Close connection"""
+        if self.conn:
+            self.conn.close()
+
+    def _execute(self, query: str, params: tuple = None) -> List[Dict]:
+        """Run statement in its own transaction, returning rows if any"""
+        try:
+            with self.conn, self.conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(query, params)
+                return [dict(row) for row in cursor.fetchall()] if cursor.description else []
+        except Exception as e:
+            logger.error(f"Work queue query failed: {e}")
+            raise
+
+    # ==================== COORDINATOR ====================
+
+    def register_domains(self, sources: List[Dict[str, Any]]):
+        """
+        Create or update domain leases with the sources' request spacing
+
+        Several sources on one domain share a lease - the largest interval wins.
+
+        Args:
+            sources: Active sources
+        """
+        intervals: Dict[str, float] = {}
+        for source in sources:
+            domain = source_domain(source)
+            interval = float(source.get('rate_limit_seconds') or 2)
+            intervals[domain] = max(intervals.get(domain, 0), interval)
+
+        for domain, interval in intervals.items():
+            self._execute(
+                """
+                INSERT INTO watch_domain_leases (domain, interval_seconds) VALUES (%s, %s)
+                ON CONFLICT (domain) DO UPDATE SET interval_seconds = EXCLUDED.interval_seconds, updated_at = NOW()
+                """,
+                (domain, interval)
+            )
+
+    def enqueue(self, run_id: str, items: List[Dict[str, Any]]) -> int:
+        """
+        Enqueue page 1 of each (source, criteria) pair
+
+        Args:
+            run_id: Run the tasks belong to
+            items: Dicts with source, criteria and priority
+
+        Returns:
+            Number of tasks enqueued
+        """
+        count = 0
+        with self.conn, self.conn.cursor() as cursor:
+            for item in items:
+                source, criteria = item['source'], item['criteria']
+                cursor.execute(
+                    """
+                    INSERT INTO watch_search_tasks
+                        (run_id, source_id, criteria_id, page, domain, priority, payload, max_attempts)
+                    VALUES (%s, %s, %s, 1, %s, %s, %s, %s)
+                    ON CONFLICT (run_id, source_id, criteria_id, page) DO NOTHING
+                    """,
+                    (run_id, source.get('id'), criteria.get('id'), source_domain(source),
+                     item.get('priority', 0), Json({'source': source, 'criteria': criteria}), self.max_attempts)
+                )
+                count += cursor.rowcount
+        return count
+
+    def run_status(self, run_id: str) -> Dict[str, int]:
+        """
+        Count tasks of a run by status
+
+        Args:
+            run_id: Run ID
+
+        Returns:
+            Dict of status -> count
+        """
+        rows = self._execute(
+            "SELECT status, COUNT(*) AS count FROM watch_search_tasks WHERE run_id = %s GROUP BY status",
+            (run_id,)
+        )
+        return {row['status']: row['count'] for row in rows}
+
+    def run_results(self, run_id: str) -> List[Dict]:
+        """
+        Finished tasks of a run with results and time spent
+
+        Args:
+            run_id: Run ID
+
+        Returns:
+            Rows with source_id, criteria_id, page, status, result, seconds, error
+        """
+        return self._execute(
+            """
+            SELECT source_id::text, criteria_id::text, page, status, result, error,
+                   EXTRACT(EPOCH FROM (finished_at - claimed_at)) AS seconds
+            FROM watch_search_tasks WHERE run_id = %s ORDER BY id
+            """,
+            (run_id,)
+        )
+
+    def cancel_run(self, run_id: str) -> List[Dict]:
+        """
+        Cancel queued tasks of a run (budget used up)
+
+        Args:
+            run_id: Run ID
+
+        Returns:
+            Cancelled rows with source_id, criteria_id and page
+        """
+        return self._execute(
+            """
+            UPDATE watch_search_tasks SET status = 'cancelled', finished_at = NOW()
+            WHERE run_id = %s AND status = 'queued'
+            RETURNING source_id::text, criteria_id::text, page
+            """,
+            (run_id,)
+        )
+
+    def requeue_stale(self, heartbeat_timeout: float) -> int:
+        """
+        Requeue running tasks whose worker stopped heartbeating
+
+        Args:
+            heartbeat_timeout: Seconds without heartbeat before a task counts as orphaned
+
+        Returns:
+            Number of tasks requeued or failed
+        """
+        rows = self._execute(
+            """
+            UPDATE watch_search_tasks
+            SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+                claimed_by = NULL, available_at = NOW(), error = 'Worker heartbeat lost',
+                finished_at = CASE WHEN attempts >= max_attempts THEN NOW() END
+            WHERE status = 'running' AND heartbeat_at < NOW() - make_interval(secs => %s)
+            RETURNING id
+            """,
+            (heartbeat_timeout,)
+        )
+        if rows:
+            logger.warning(f"Requeued {len(rows)} tasks of lost workers")
+        return len(rows)
+
+    # ==================== WORKER ====================
+
+    def claim(self, worker_id: str, skip_sources: List[str] = None) -> Optional[Dict]:
+        """
+        Claim the next task whose domain lease is free
+
+        The task and its domain lease are locked together with SKIP LOCKED, so
+        concurrent workers never block each other or claim two requests to
+        the same domain within its interval.
+
+        Args:
+            worker_id: Unique worker name (host:pid)
+            skip_sources: Source IDs not to claim (e.g. circuit open)
+
+        Returns:
+            Task row or None if nothing is claimable right now
+        """
+        with self.conn, self.conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(
+                """
+                SELECT t.id, t.run_id::text, t.source_id::text, t.page, t.domain, t.payload, t.attempts,
+                       d.interval_seconds
+                FROM watch_search_tasks t
+                JOIN watch_domain_leases d ON d.domain = t.domain
+                WHERE t.status = 'queued' AND t.available_at <= NOW() AND d.next_at <= NOW()
+                  AND NOT (t.source_id = ANY(%s::uuid[]))
+                ORDER BY t.priority, t.id
+                LIMIT 1
+                FOR UPDATE OF t, d SKIP LOCKED
+                """,
+                (list(skip_sources or []),)
+            )
+            task = cursor.fetchone()
+            if task is None:
+                return None
+
+            cursor.execute(
+                """
+                UPDATE watch_domain_leases
+                SET next_at = NOW() + make_interval(secs => interval_seconds), holder = %s, updated_at = NOW()
+                WHERE domain = %s
+                """,
+                (worker_id, task['domain'])
+            )
+            cursor.execute(
+                """
+                UPDATE watch_search_tasks
+                SET status = 'running', claimed_by = %s, claimed_at = NOW(), heartbeat_at = NOW(),
+                    attempts = attempts + 1, error = NULL
+                WHERE id = %s
+                """,
+                (worker_id, task['id'])
+            )
+            return dict(task)
+
+    def heartbeat(self, task_id: int, worker_id: str) -> bool:
+        """
+        Extend a running task
+
+        Args:
+            task_id: Task ID
+            worker_id: Worker holding the task
+
+        Returns:
+            False if the task was requeued meanwhile (worker should drop it)
+        """
+        rows = self._execute(
+            """
+            UPDATE watch_search_tasks SET heartbeat_at = NOW()
+            WHERE id = %s AND claimed_by = %s AND status = 'running'
+            RETURNING id
+            """,
+            (task_id, worker_id)
+        )
+        return bool(rows)
+
+    def complete(self, task: Dict, worker_id: str, result: Dict[str, Any], next_page: bool = False) -> bool:
+        """
+        Mark task done and enqueue its next page
+
+        Args:
+            task: Claimed task row
+            worker_id: Worker holding the task
+            result: listings_found, listings_saved and new listing rows
+            next_page: Whether page + 1 should be searched
+
+        Returns:
+            False if the task was no longer held by this worker
+        """
+        with self.conn, self.conn.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE watch_search_tasks SET status = 'done', result = %s, finished_at = NOW()
+                WHERE id = %s AND claimed_by = %s AND status = 'running'
+                """,
+                (Json(result), task['id'], worker_id)
+            )
+            if cursor.rowcount == 0:
+                return False
+
+            if next_page:
+                # Same priority and payload, so a criteria's pages stay together
+                cursor.execute(
+                    """
+                    INSERT INTO watch_search_tasks
+                        (run_id, source_id, criteria_id, page, domain, priority, payload, max_attempts)
+                    SELECT run_id, source_id, criteria_id, page + 1, domain, priority, payload, max_attempts
+                    FROM watch_search_tasks WHERE id = %s
+                    ON CONFLICT (run_id, source_id, criteria_id, page) DO NOTHING
+                    """,
+                    (task['id'],)
+                )
+            return True
+
+    def fail(self, task: Dict, worker_id: str, error: str):
+        """
+        Release a failed task for retry with backoff (or fail it for good)
+
+        Args:
+            task: Claimed task row
+            worker_id: Worker holding the task
+            error: Error message
+        """
+        self._execute(
+            """
+            UPDATE watch_search_tasks
+            SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+                finished_at = CASE WHEN attempts >= max_attempts THEN NOW() END,
+                available_at = NOW() + make_interval(secs => %s * POWER(2, attempts - 1)),
+                claimed_by = NULL, error = %s
+            WHERE id = %s AND claimed_by = %s AND status = 'running'
+            """,
+            (self.retry_seconds, error[:2000], task['id'], worker_id)
+        )
+
+
+class Heartbeat:
+    """
+    Background heartbeat for the task a worker currently holds
+
+    One thread and one connection per worker, kept across tasks. The
+    connection is separate from the worker's, because a psycopg2 connection
+    runs one transaction at a time and the worker commits while the
+    heartbeat ticks.
+    """
+
+    def __init__(self, connection_string: str, worker_id: str, interval: float):
+        """
+        Start heartbeat thread
+
+        Args:
+            connection_string: Postgres DSN
+            worker_id: Worker holding the tasks
+            interval: Seconds between heartbeats
+        """
+        self.connection_string = connection_string
+        self.worker_id = worker_id
+        self.interval = interval
+        self.task_id: Optional[int] = None
+        self.lost = False
+        self._queue: Optional[WorkQueue] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='heartbeat', daemon=True)
+        self._thread.start()
+
+    def track(self, task_id: int):
+        """
+        Heartbeat a newly claimed task
+
+        Args:
+            task_id: Claimed task
+        """
+        with self._lock:
+            self.task_id = task_id
+            self.lost = False
+
+    def release(self):
+        """Stop heartbeating the current task"""
+        with self._lock:
+            self.task_id = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                task_id = self.task_id
+            if task_id is None:
+                continue
+
+            try:
+                self._queue = self._queue or WorkQueue(self.connection_string)
+                alive = self._queue.heartbeat(task_id, self.worker_id)
+            except Exception as e:
+                logger.error(f"Heartbeat for task {task_id} failed: {e}")
+                self._reset_connection()
+                continue
+
+            if not alive:
+                with self._lock:
+                    if self.task_id != task_id:
+                        continue  # Finished meanwhile
+                    self.lost = True
+                    self.task_id = None
+                logger.warning(f"Task {task_id} was requeued - result will be discarded")
+
+    def _reset_connection(self):
+        """Drop a broken connection (reconnects on the next tick)"""
+        if self._queue:
+            try:
+                self._queue.close()
+            except Exception:
+                pass
+            self._queue = None
+
+    def close(self):
+        """Stop the thread and close its connection"""
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._reset_connection()
@@ -0,0 +1,346 @@
+"""
+Long-running daemon - schedules search and availability checks internally
+Alternative to the two cron jobs: services, HTTP sessions, browsers, the parse
+pool and the URL hash index stay warm between runs. New or changed search
+criteria are backfilled immediately by a separate thread. Stops gracefully on
+SIGTERM/SIGINT and serves /health and /metrics on a local port.
+"""
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional
+from dotenv import load_dotenv
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.supabase_client import SupabaseClient
+from core.openai_extractor import OpenAIExtractor
+from core.email_sender import EmailSender
+from core.criteria_watcher import CriteriaWatcher
+from scrapers import ScraperCache
+from scrapers.listing_parser import shutdown_parse_pool
+from utils import setup_logger
+from utils.latency import get_latency_tracker
+from utils.run_lock import RunLock
+from watch_searcher import WatchSearcher
+from availability_checker import AvailabilityChecker
+from price_history import compact as compact_price_history
+
+# Load environment variables
+load_dotenv()
+
+# Setup logging
+logger = setup_logger('watch_daemon', 'watch_service.log')
+
+
+class WatchDaemon:
+    """Runs searches and availability checks on an internal schedule"""
+
+    def __init__(self):
+        """Initialize warm services and schedule"""
+        self.db = SupabaseClient()
+        self.openai = OpenAIExtractor()
+        self.email = EmailSender()
+        self.scrapers = ScraperCache()
+        self.stop_event = threading.Event()
+
+        self.search_interval = float(os.getenv('DAEMON_SEARCH_INTERVAL', '3600'))
+        self.availability_interval = float(os.getenv('DAEMON_AVAILABILITY_INTERVAL', '3600'))
+        # First availability check half an interval after start, like the :30 cron offset
+        self.availability_offset = float(os.getenv('DAEMON_AVAILABILITY_OFFSET', '1800'))
+        self.hash_refresh_interval = float(os.getenv('DAEMON_HASH_REFRESH_INTERVAL', str(6 * 3600)))
+        self.compaction_interval = float(os.getenv('DAEMON_COMPACTION_INTERVAL', str(24 * 3600)))
+        self.intervals = {
+            'search': self.search_interval,
+            'availability': self.availability_interval,
+            'price_compaction': self.compaction_interval,
+        }
+
+        self.url_hashes: Optional[set] = None
+        self.hashes_loaded_at = 0.0
+
+        now = time.monotonic()
+        self.started_at = now
+        self.jobs: Dict[str, Dict[str, Any]] = {
+            'search': {'next_at': now, 'runs': 0, 'failures': 0, 'last_status': None,
+                       'last_started': None, 'last_duration': None},
+            'availability': {'next_at': now + self.availability_offset, 'runs': 0, 'failures': 0,
+                             'last_status': None, 'last_started': None, 'last_duration': None},
+            # Cheap, so a restart may simply run it again
+            'price_compaction': {'next_at': now + self.availability_offset, 'runs': 0, 'failures': 0,
+                                 'last_status': None, 'last_started': None, 'last_duration': None},
+        }
+        self.totals = {'listings_saved': 0, 'listings_found': 0, 'marked_sold': 0, 'checked': 0,
+                       'prices_compacted': 0}
+        self.current_job: Optional[str] = None
+
+        # Criteria backfills run beside the scheduled jobs with their own scrapers
+        # (request spacing is shared per domain by the rate limiter registry)
+        self.backfill_enabled = os.getenv('DAEMON_BACKFILL', 'true').lower() == 'true'
+        self.backfill_scrapers = ScraperCache()
+        self.backfill = {'runs': 0, 'failures': 0, 'last_status': None, 'listening': False,
+                         'criteria_backfilled': 0, 'last_first_results_seconds': None}
+
+    def run(self):
+        """Main loop until SIGTERM/SIGINT"""
+        lock = RunLock('watch_daemon')
+        if not lock.acquire():
+            logger.error("Another daemon is already running")
+            return
+
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+        server = self._start_health_server()
+        backfill_thread = self._start_backfill_thread()
+
+        logger.info("=" * 60)
+        logger.info("🚀 Watch Service - Daemon started")
+        logger.info("=" * 60)
+
+        try:
+            while not self.stop_event.is_set():
+                name, job = min(self.jobs.items(), key=lambda entry: entry[1]['next_at'])
+                wait = job['next_at'] - time.monotonic()
+                if wait > 0:
+                    # Wakes up immediately on SIGTERM
+                    self.stop_event.wait(wait)
+                    continue
+
+                self._run_job(name)
+                job['next_at'] = max(job['next_at'] + self.intervals[name], time.monotonic())
+
+        finally:
+            logger.info("🛑 Daemon stopping - closing scrapers and worker pools")
+            if server:
+                server.shutdown()
+            if backfill_thread:
+                backfill_thread.join(timeout=60)
+            self.backfill_scrapers.close_all()
+            self.scrapers.close_all()
+            shutdown_parse_pool()
+            lock.release()
+            logger.info("✅ Daemon stopped")
+
+    def _handle_signal(self, signum, frame):
+        """Finish the current step and stop"""
+        logger.info(f"Received signal {signum} - stopping after the current step")
+        self.stop_event.set()
+
+    def _run_job(self, name: str):
+        """
+        Run one scheduled job, never letting it kill the daemon
+
+        Args:
+            name: 'search', 'availability' or 'price_compaction'
+        """
+        job = self.jobs[name]
+        job['last_started'] = datetime.now().isoformat()
+        self.current_job = name
+        start = time.monotonic()
+
+        try:
+            if name == 'price_compaction':
+                self.totals['prices_compacted'] += compact_price_history(self.db)
+                job['last_status'] = 'Success'
+                return
+
+            self._refresh_config()
+
+            if name == 'search':
+                searcher = WatchSearcher(
+                    db=self.db, openai=self.openai, email=self.email, scrapers=self.scrapers,
+                    url_hashes=self.url_hashes, stop_event=self.stop_event
+                )
+                searcher.run()
+                self.totals['listings_found'] += searcher.stats['listings_found']
+                self.totals['listings_saved'] += searcher.stats['listings_saved']
+            else:
+                checker = AvailabilityChecker(db=self.db, scrapers=self.scrapers, stop_event=self.stop_event)
+                checker.run()
+                self.totals['checked'] += checker.stats['checked']
+                self.totals['marked_sold'] += checker.stats['marked_sold']
+
+            job['last_status'] = 'Success'
+
+        except Exception as e:
+            logger.error(f"💥 {name} run failed: {e}", exc_info=True)
+            job['last_status'] = 'Failed'
+            job['failures'] += 1
+
+        finally:
+            job['runs'] += 1
+            job['last_duration'] = round(time.monotonic() - start, 1)
+            self.current_job = None
+
+    def _refresh_config(self):
+        """
+        Refresh warm state incrementally
+
+        Scrapers of removed or deactivated sources are closed, changed sources
+        are reloaded on next use by the scraper cache. The URL hash index is
+        kept current by saved listings and fully reloaded only periodically.
+        """
+        self.scrapers.prune(self.db.get_active_sources())
+
+        if self.url_hashes is None or time.monotonic() - self.hashes_loaded_at > self.hash_refresh_interval:
+            self.url_hashes = set(self.db.get_existing_url_hashes())
+            self.hashes_loaded_at = time.monotonic()
+            logger.info(f"🔄 Loaded {len(self.url_hashes)} URL hashes")
+
+    def _start_backfill_thread(self) -> Optional[threading.Thread]:
+        """Watch for criteria changes in a background thread"""
+        if not self.backfill_enabled:
+            return None
+        thread = threading.Thread(target=self._watch_criteria, name='criteria-backfill', daemon=True)
+        thread.start()
+        return thread
+
+    def _watch_criteria(self):
+        """Backfill new or changed criteria as soon as they are announced or polled"""
+        watcher = CriteriaWatcher()
+
+        try:
+            while not self.stop_event.is_set():
+                self.backfill['listening'] = watcher.listening
+                try:
+                    pending = self.db.get_pending_backfills()
+                    if pending:
+                        self._run_backfill(pending)
+                except Exception as e:
+                    logger.error(f"💥 Criteria backfill failed: {e}", exc_info=True)
+                    self.backfill['last_status'] = 'Failed'
+                    self.backfill['failures'] += 1
+
+                watcher.wait(self.stop_event)
+        finally:
+            watcher.close()
+
+    def _run_backfill(self, pending: list):
+        """
+        Backfill criteria with the warm services and the backfill scraper cache
+
+        Args:
+            pending: Criteria rows from get_pending_backfills()
+        """
+        self.backfill_scrapers.prune(self.db.get_active_sources())
+
+        # Until the first scheduled run loaded the shared hash index, the searcher loads its own
+        searcher = WatchSearcher(
+            db=self.db, openai=self.openai, email=self.email, scrapers=self.backfill_scrapers,
+            url_hashes=self.url_hashes, stop_event=self.stop_event
+        )
+        first_results = searcher.run_backfill(pending)
+
+        self.backfill['runs'] += 1
+        self.backfill['last_status'] = 'Success'
+        self.backfill['criteria_backfilled'] += len(pending)
+        if first_results:
+            self.backfill['last_first_results_seconds'] = round(max(first_results.values()), 1)
+        self.totals['listings_found'] += searcher.stats['listings_found']
+        self.totals['listings_saved'] += searcher.stats['listings_saved']
+
+    # ========================================
+    # HEALTH & METRICS
+    # ========================================
+
+    def health(self) -> Dict[str, Any]:
+        """Health snapshot for /health"""
+        now = time.monotonic()
+        failing = any(job['last_status'] == 'Failed' for job in [*self.jobs.values(), self.backfill])
+        return {
+            'status': 'degraded' if failing else 'ok',
+            'uptime_seconds': int(now - self.started_at),
+            'current_job': self.current_job,
+            'stopping': self.stop_event.is_set(),
+            'cached_scrapers': len(self.scrapers),
+            'url_hashes': len(self.url_hashes or ()),
+            'jobs': {
+                name: {**{k: v for k, v in job.items() if k != 'next_at'},
+                       'next_in_seconds': max(0, int(job['next_at'] - now))}
+                for name, job in self.jobs.items()
+            },
+            'backfill': self.backfill,
+        }
+
+    def metrics(self) -> str:
+        """Metrics in Prometheus text format for /metrics"""
+        lines = [f"watch_daemon_uptime_seconds {int(time.monotonic() - self.started_at)}"]
+
+        for name, job in self.jobs.items():
+            lines.append(f'watch_daemon_job_runs_total{{job="{name}"}} {job["runs"]}')
+            lines.append(f'watch_daemon_job_failures_total{{job="{name}"}} {job["failures"]}')
+            if job['last_duration'] is not None:
+                lines.append(f'watch_daemon_job_last_duration_seconds{{job="{name}"}} {job["last_duration"]}')
+
+        for key, value in self.totals.items():
+            lines.append(f"watch_daemon_{key}_total {value}")
+
+        lines.append(f"watch_daemon_backfill_runs_total {self.backfill['runs']}")
+        lines.append(f"watch_daemon_backfill_failures_total {self.backfill['failures']}")
+        lines.append(f"watch_daemon_criteria_backfilled_total {self.backfill['criteria_backfilled']}")
+        if self.backfill['last_first_results_seconds'] is not None:
+            lines.append(f"watch_criteria_first_results_seconds {self.backfill['last_first_results_seconds']}")
+
+        for domain, stats in get_latency_tracker().report().items():
+            for q in ('p50', 'p95', 'p99'):
+                if stats[q] is not None:
+                    lines.append(f'watch_fetch_latency_seconds{{domain="{domain}",quantile="{q[1:]}"}} {stats[q]:.3f}')
+
+        return '\n'.join(lines) + '\n'
+
+    def _start_health_server(self) -> Optional[ThreadingHTTPServer]:
+        """Serve /health and /metrics in a background thread"""
+        port = int(os.getenv('DAEMON_HEALTH_PORT', '8787'))
+        if not port:
+            return None
+
+        daemon = self
+
+        class HealthHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/health':
+                    body = json.dumps(daemon.health()).encode()
+                    content_type = 'application/json'
+                elif self.path == '/metrics':
+                    body = daemon.metrics().encode()
+                    content_type = 'text/plain; version=0.0.4'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep probes out of the service log
+
+        try:
+            server = ThreadingHTTPServer((os.getenv('DAEMON_HEALTH_HOST', '127.0.0.1'), port), HealthHandler)
+        except OSError as e:
+            logger.warning(f"Health endpoint unavailable on port {port}: {e}")
+            return None
+
+        threading.Thread(target=server.serve_forever, name='health-server', daemon=True).start()
+        logger.info(f"🩺 Health endpoint on http://{server.server_address[0]}:{port}/health")
+        return server
+
+
+def main():
+    """Entry point"""
+    try:
+        WatchDaemon().run()
+    except Exception as e:
+        logger.error(f"Fatal error: {e}", exc_info=True)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
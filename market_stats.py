@@ -0,0 +1,87 @@
+"""
+Market statistics maintenance and lookup (migrations/011_market_stats.sql)
+  python market_stats.py rebuild                   # Recompute all sketches from listings
+  python market_stats.py rebuild --days 180
+  python market_stats.py show --reference 116610LN  # Median, p10, p90 per market
+Searches keep the sketches up to date; a rebuild is only needed after
+imports or bulk backfills that bypassed the searcher, or to change the window.
+"""
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.supabase_client import SupabaseClient
+from core.market_stats import MarketStats
+from utils import setup_logger, normalize_reference
+
+# Load environment variables
+load_dotenv()
+
+# Setup logging
+logger = setup_logger('market_stats', 'watch_service.log')
+
+
+def rebuild(db: SupabaseClient = None, days: int = None) -> int:
+    """
+    Recompute the market sketches of the last days from listings
+
+    Args:
+        db: Supabase client (default: new client)
+        days: Window in days (default: MARKET_WINDOW_DAYS)
+
+    Returns:
+        Number of daily sketches written
+    """
+    db = db or SupabaseClient()
+    market = MarketStats(db, window_days=days)
+    listings = db.get_market_listings(market.window_days)
+    logger.info(f"📈 Rebuilding market statistics from {len(listings)} listings ({market.window_days} days)")
+    return market.rebuild(listings)
+
+
+def show(db: SupabaseClient, reference: str):
+    """Print the statistics of every market of a reference"""
+    market = MarketStats(db)
+    market.load()
+    reference = normalize_reference(reference)
+    keys = sorted(key for key in market.windows if key.split('|')[2] == reference)
+    if not keys:
+        print("No market statistics")
+        return
+
+    for key in keys:
+        sketch = market.windows[key]
+        brand, _, _, currency = key.split('|')
+        print(
+            f"{brand:<20} {reference:<15} median {sketch.quantile(0.5):,.0f} {currency}  "
+            f"p10 {sketch.quantile(0.1):,.0f}  p90 {sketch.quantile(0.9):,.0f}  ({sketch.count} listings)"
+        )
+
+
+def main():
+    """Entry point"""
+    parser = argparse.ArgumentParser(description='Market statistics maintenance and lookup')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    rebuild_parser = subparsers.add_parser('rebuild', help='Recompute all sketches from listings')
+    rebuild_parser.add_argument('--days', type=int, help='Window in days')
+    show_parser = subparsers.add_parser('show', help='Print the market statistics of a reference')
+    show_parser.add_argument('--reference', required=True, help='Reference number')
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'rebuild':
+            if rebuild(days=args.days) < 0:
+                sys.exit(1)
+        else:
+            show(SupabaseClient(), args.reference)
+    except Exception as e:
+        logger.error(f"Fatal error: {e}", exc_info=True)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
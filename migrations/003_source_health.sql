@@ -0,0 +1,14 @@
+-- Circuit breaker state per source
+-- Sources with an open circuit are skipped until next_probe_at
+
+CREATE TABLE IF NOT EXISTS watch_source_health (
+  source_id UUID PRIMARY KEY REFERENCES watch_sources(id) ON DELETE CASCADE,
+  state VARCHAR(20) NOT NULL DEFAULT 'closed' CHECK (state IN ('closed', 'open', 'half_open')),
+  recent_outcomes JSONB DEFAULT '[]'::jsonb, -- 1 = ok, 0 = failed/slow, newest last
+  cooldown_seconds INTEGER DEFAULT 3600,
+  opened_at TIMESTAMP,
+  next_probe_at TIMESTAMP,
+  updated_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_source_health_state ON watch_source_health(state);
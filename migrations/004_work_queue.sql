@@ -0,0 +1,41 @@
+-- Distributed search work queue
+-- A coordinator enqueues (source, criteria, page) tasks; workers on any node
+-- claim them with SELECT ... FOR UPDATE SKIP LOCKED. Per-domain leases keep
+-- request spacing polite across all workers.
+
+CREATE TABLE IF NOT EXISTS watch_search_tasks (
+  id BIGSERIAL PRIMARY KEY,
+  run_id UUID NOT NULL,
+  source_id UUID NOT NULL REFERENCES watch_sources(id) ON DELETE CASCADE,
+  criteria_id UUID NOT NULL REFERENCES watch_search_criteria(id) ON DELETE CASCADE,
+  page INTEGER NOT NULL DEFAULT 1,
+  domain VARCHAR(255) NOT NULL,
+  priority INTEGER NOT NULL DEFAULT 0, -- Lower runs first
+  payload JSONB NOT NULL, -- Source config and criteria snapshot
+  status VARCHAR(20) NOT NULL DEFAULT 'queued'
+    CHECK (status IN ('queued', 'running', 'done', 'failed', 'cancelled')),
+  attempts INTEGER NOT NULL DEFAULT 0,
+  max_attempts INTEGER NOT NULL DEFAULT 3,
+  available_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  claimed_by VARCHAR(255),
+  claimed_at TIMESTAMPTZ,
+  heartbeat_at TIMESTAMPTZ,
+  finished_at TIMESTAMPTZ,
+  result JSONB, -- listings_found, listings_saved, new listing rows
+  error TEXT,
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  UNIQUE (run_id, source_id, criteria_id, page)
+);
+
+CREATE INDEX IF NOT EXISTS idx_search_tasks_claim ON watch_search_tasks(priority, id) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_search_tasks_running ON watch_search_tasks(heartbeat_at) WHERE status = 'running';
+CREATE INDEX IF NOT EXISTS idx_search_tasks_run ON watch_search_tasks(run_id, status);
+
+-- Next free request slot per domain, shared by all workers
+CREATE TABLE IF NOT EXISTS watch_domain_leases (
+  domain VARCHAR(255) PRIMARY KEY,
+  interval_seconds REAL NOT NULL DEFAULT 2,
+  next_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  holder VARCHAR(255),
+  updated_at TIMESTAMPTZ DEFAULT NOW()
+);
@@ -0,0 +1,8 @@
+-- Shared run ID for sharded search runs
+-- Each shard (watch_searcher.py --shard i/N) logs its own row; rows with the
+-- same run_id are merged by watch_searcher.py --combine RUN_ID
+
+ALTER TABLE watch_sync_history ADD COLUMN IF NOT EXISTS run_id VARCHAR(64);
+ALTER TABLE watch_sync_history ADD COLUMN IF NOT EXISTS shard VARCHAR(16);
+
+CREATE INDEX IF NOT EXISTS idx_sync_history_run_id ON watch_sync_history(run_id);
@@ -0,0 +1,43 @@
+-- Immediate backfill of new and changed search criteria
+-- updated_at only moves when a search-relevant field changes; the searcher
+-- backfills criteria whose backfilled_at is missing or older than updated_at
+-- and records when their first listing was saved. Changes are announced on
+-- the watch_criteria_changed channel for LISTEN-ing daemons.
+
+ALTER TABLE watch_search_criteria ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT NOW();
+ALTER TABLE watch_search_criteria ADD COLUMN IF NOT EXISTS backfilled_at TIMESTAMP;
+ALTER TABLE watch_search_criteria ADD COLUMN IF NOT EXISTS first_results_at TIMESTAMP;
+
+-- Existing criteria are covered by the regular schedule already
+UPDATE watch_search_criteria SET updated_at = COALESCE(updated_at, created_at, NOW());
+UPDATE watch_search_criteria SET backfilled_at = NOW() WHERE backfilled_at IS NULL;
+
+CREATE OR REPLACE FUNCTION watch_criteria_touch() RETURNS TRIGGER AS $$
+BEGIN
+  IF (NEW.manufacturer, NEW.model, NEW.reference_number, NEW.year, NEW.allowed_countries, NEW.active)
+     IS DISTINCT FROM
+     (OLD.manufacturer, OLD.model, OLD.reference_number, OLD.year, OLD.allowed_countries, OLD.active) THEN
+    NEW.updated_at := NOW();
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_watch_criteria_touch ON watch_search_criteria;
+CREATE TRIGGER trg_watch_criteria_touch
+  BEFORE UPDATE ON watch_search_criteria
+  FOR EACH ROW EXECUTE FUNCTION watch_criteria_touch();
+
+CREATE OR REPLACE FUNCTION watch_criteria_notify() RETURNS TRIGGER AS $$
+BEGIN
+  IF NEW.active AND (TG_OP = 'INSERT' OR NEW.updated_at IS DISTINCT FROM OLD.updated_at) THEN
+    PERFORM pg_notify('watch_criteria_changed', NEW.id::text);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_watch_criteria_notify ON watch_search_criteria;
+CREATE TRIGGER trg_watch_criteria_notify
+  AFTER INSERT OR UPDATE ON watch_search_criteria
+  FOR EACH ROW EXECUTE FUNCTION watch_criteria_notify();
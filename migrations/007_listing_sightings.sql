@@ -0,0 +1,45 @@
+-- Sold inference from search-result disappearance
+-- Each complete crawl of a (source, criteria) result set resets missed_crawls
+-- of the listings it saw and increments it for the Available ones it didn't.
+-- After SEEN_MISSED_CRAWLS misses a listing is flagged (probably_sold_at) and
+-- availability_checker.py confirms it with a detail-page check.
+
+ALTER TABLE watch_listings ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMP;
+ALTER TABLE watch_listings ADD COLUMN IF NOT EXISTS missed_crawls INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE watch_listings ADD COLUMN IF NOT EXISTS probably_sold_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS idx_listings_crawl
+  ON watch_listings(source, search_criteria_id) WHERE availability = 'Available';
+CREATE INDEX IF NOT EXISTS idx_listings_probably_sold
+  ON watch_listings(probably_sold_at) WHERE probably_sold_at IS NOT NULL;
+
+-- Record one complete crawl, returns the number of listings flagged by it
+CREATE OR REPLACE FUNCTION watch_record_crawl(
+  p_source TEXT,
+  p_criteria_id UUID,
+  p_seen TEXT[],
+  p_threshold INTEGER
+) RETURNS INTEGER AS $$
+DECLARE
+  flagged INTEGER;
+BEGIN
+  UPDATE watch_listings
+  SET last_seen_at = NOW(), missed_crawls = 0, probably_sold_at = NULL
+  WHERE source = p_source AND search_criteria_id = p_criteria_id
+    AND availability = 'Available' AND url_hash = ANY(p_seen);
+
+  WITH missed AS (
+    UPDATE watch_listings
+    SET missed_crawls = missed_crawls + 1,
+        probably_sold_at = CASE
+          WHEN missed_crawls + 1 >= p_threshold THEN COALESCE(probably_sold_at, NOW())
+        END
+    WHERE source = p_source AND search_criteria_id = p_criteria_id
+      AND availability = 'Available' AND NOT (url_hash = ANY(p_seen))
+    RETURNING probably_sold_at, missed_crawls
+  )
+  SELECT COUNT(*) INTO flagged FROM missed WHERE missed_crawls = p_threshold;
+
+  RETURN flagged;
+END;
+$$ LANGUAGE plpgsql;
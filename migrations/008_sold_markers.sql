@@ -0,0 +1,6 @@
+-- Per-source sold markers scanned by availability checks
+-- sold_selector: comma-separated CSS selectors of sold badges (tag, .class, #id, [attr=value])
+-- sold_keywords: comma-separated keywords in page text (empty = built-in German/English defaults)
+
+ALTER TABLE watch_sources ADD COLUMN IF NOT EXISTS sold_selector TEXT;
+ALTER TABLE watch_sources ADD COLUMN IF NOT EXISTS sold_keywords TEXT;
@@ -0,0 +1,20 @@
+-- Price-change and relisting detection for known listings
+-- fingerprint hashes the price text and title of a listing's result card.
+-- When a search sees a known listing with a different fingerprint, its price
+-- is re-extracted and the observation appended to watch_price_history.
+
+ALTER TABLE watch_listings ADD COLUMN IF NOT EXISTS fingerprint VARCHAR(16);
+ALTER TABLE watch_listings ADD COLUMN IF NOT EXISTS previous_price NUMERIC(10, 2);
+ALTER TABLE watch_listings ADD COLUMN IF NOT EXISTS price_changed_at TIMESTAMP;
+ALTER TABLE watch_listings ADD COLUMN IF NOT EXISTS relisted_at TIMESTAMP;
+
+CREATE TABLE IF NOT EXISTS watch_price_history (
+  id BIGSERIAL PRIMARY KEY,
+  listing_id UUID NOT NULL REFERENCES watch_listings(id) ON DELETE CASCADE,
+  price NUMERIC(10, 2),
+  currency VARCHAR(10) DEFAULT 'EUR',
+  observed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+  run_id VARCHAR(64)
+);
+
+CREATE INDEX IF NOT EXISTS idx_price_history_listing ON watch_price_history(listing_id, observed_at);
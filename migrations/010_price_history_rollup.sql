@@ -0,0 +1,151 @@
+-- Append-only price history with daily rollups
+-- Observations are only appended when the price differs from the listing's
+-- latest one (watch_record_prices). watch_compact_price_history folds raw
+-- observations older than p_keep_days into one row per listing and day
+-- (min, max, last) and deletes them; watch_price_series reads both levels
+-- for a listing or a reference across sources.
+
+ALTER TABLE watch_price_history ADD COLUMN IF NOT EXISTS source VARCHAR(100);
+ALTER TABLE watch_price_history ADD COLUMN IF NOT EXISTS reference_key VARCHAR(50);
+
+-- Reference numbers as matched across sources: '116610 LN' = '116610-ln' = '116610LN'
+CREATE OR REPLACE FUNCTION watch_reference_key(p_reference TEXT) RETURNS TEXT AS $$
+  SELECT NULLIF(UPPER(REGEXP_REPLACE(p_reference, '[^A-Za-z0-9]', '', 'g')), '')
+$$ LANGUAGE sql IMMUTABLE;
+
+UPDATE watch_price_history h
+SET source = l.source, reference_key = watch_reference_key(l.reference_number)
+FROM watch_listings l
+WHERE l.id = h.listing_id AND h.source IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_price_history_reference
+  ON watch_price_history(reference_key, observed_at) WHERE reference_key IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_price_history_observed ON watch_price_history(observed_at);
+
+CREATE OR REPLACE FUNCTION watch_price_history_append_only() RETURNS TRIGGER AS $$
+BEGIN
+  RAISE EXCEPTION 'watch_price_history is append-only';
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_watch_price_history_append_only ON watch_price_history;
+CREATE TRIGGER trg_watch_price_history_append_only
+  BEFORE UPDATE ON watch_price_history
+  FOR EACH ROW EXECUTE FUNCTION watch_price_history_append_only();
+
+CREATE TABLE IF NOT EXISTS watch_price_daily (
+  listing_id UUID NOT NULL REFERENCES watch_listings(id) ON DELETE CASCADE,
+  day DATE NOT NULL,
+  currency VARCHAR(10) NOT NULL DEFAULT 'EUR',
+  source VARCHAR(100),
+  reference_key VARCHAR(50),
+  min_price NUMERIC(10, 2),
+  max_price NUMERIC(10, 2),
+  last_price NUMERIC(10, 2),
+  last_observed_at TIMESTAMP NOT NULL,
+  observations INTEGER NOT NULL DEFAULT 1,
+  PRIMARY KEY (listing_id, day, currency)
+);
+
+CREATE INDEX IF NOT EXISTS idx_price_daily_reference
+  ON watch_price_daily(reference_key, day) WHERE reference_key IS NOT NULL;
+
+-- Append observations whose price differs from the listing's latest one, returns rows appended
+CREATE OR REPLACE FUNCTION watch_record_prices(p_rows JSONB) RETURNS INTEGER AS $$
+DECLARE
+  appended INTEGER;
+BEGIN
+  INSERT INTO watch_price_history (listing_id, price, currency, run_id, source, reference_key)
+  SELECT r.listing_id, r.price, COALESCE(r.currency, 'EUR'), r.run_id,
+         l.source, watch_reference_key(l.reference_number)
+  FROM jsonb_to_recordset(p_rows) AS r(listing_id UUID, price NUMERIC, currency TEXT, run_id TEXT)
+  JOIN watch_listings l ON l.id = r.listing_id
+  LEFT JOIN LATERAL (
+    SELECT o.price, o.currency FROM (
+      (SELECT h.price, h.currency, h.observed_at FROM watch_price_history h
+       WHERE h.listing_id = r.listing_id ORDER BY h.observed_at DESC LIMIT 1)
+      UNION ALL
+      (SELECT d.last_price, d.currency, d.last_observed_at FROM watch_price_daily d
+       WHERE d.listing_id = r.listing_id ORDER BY d.day DESC LIMIT 1)
+    ) o
+    ORDER BY o.observed_at DESC
+    LIMIT 1
+  ) latest ON TRUE
+  WHERE r.price IS NOT NULL
+    AND (latest.price IS DISTINCT FROM r.price OR latest.currency IS DISTINCT FROM COALESCE(r.currency, 'EUR'));
+
+  GET DIAGNOSTICS appended = ROW_COUNT;
+  RETURN appended;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Fold raw observations older than p_keep_days into daily rows, returns raw rows compacted
+CREATE OR REPLACE FUNCTION watch_compact_price_history(p_keep_days INTEGER) RETURNS INTEGER AS $$
+DECLARE
+  cutoff TIMESTAMP := DATE_TRUNC('day', NOW()) - MAKE_INTERVAL(days => p_keep_days);
+  compacted INTEGER;
+BEGIN
+  INSERT INTO watch_price_daily (listing_id, day, currency, source, reference_key,
+                                 min_price, max_price, last_price, last_observed_at, observations)
+  SELECT listing_id, observed_at::date, currency, MAX(source), MAX(reference_key),
+         MIN(price), MAX(price), (ARRAY_AGG(price ORDER BY observed_at DESC))[1],
+         MAX(observed_at), COUNT(*)
+  FROM watch_price_history
+  WHERE observed_at < cutoff
+  GROUP BY listing_id, observed_at::date, currency
+  ON CONFLICT (listing_id, day, currency) DO UPDATE SET
+    min_price = LEAST(watch_price_daily.min_price, EXCLUDED.min_price),
+    max_price = GREATEST(watch_price_daily.max_price, EXCLUDED.max_price),
+    last_price = CASE WHEN EXCLUDED.last_observed_at >= watch_price_daily.last_observed_at
+                      THEN EXCLUDED.last_price ELSE watch_price_daily.last_price END,
+    last_observed_at = GREATEST(watch_price_daily.last_observed_at, EXCLUDED.last_observed_at),
+    observations = watch_price_daily.observations + EXCLUDED.observations;
+
+  DELETE FROM watch_price_history WHERE observed_at < cutoff;
+  GET DIAGNOSTICS compacted = ROW_COUNT;
+  RETURN compacted;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Price series of one listing or of a reference across sources (daily rollups, then raw observations)
+CREATE OR REPLACE FUNCTION watch_price_series(p_listing_id UUID, p_reference TEXT, p_since TIMESTAMP)
+RETURNS TABLE (
+  listing_id UUID,
+  source VARCHAR,
+  observed_at TIMESTAMP,
+  currency VARCHAR,
+  min_price NUMERIC,
+  max_price NUMERIC,
+  last_price NUMERIC,
+  observations INTEGER,
+  granularity TEXT
+) AS $$
+DECLARE
+  ref_key TEXT := watch_reference_key(p_reference);
+  since TIMESTAMP := COALESCE(p_since, '-infinity'::timestamp);
+BEGIN
+  IF p_listing_id IS NOT NULL THEN
+    RETURN QUERY
+      SELECT d.listing_id, d.source, d.day::timestamp, d.currency, d.min_price, d.max_price,
+             d.last_price, d.observations, 'daily'::text
+      FROM watch_price_daily d
+      WHERE d.listing_id = p_listing_id AND d.day >= since::date
+      UNION ALL
+      SELECT h.listing_id, h.source, h.observed_at, h.currency, h.price, h.price, h.price, 1, 'raw'::text
+      FROM watch_price_history h
+      WHERE h.listing_id = p_listing_id AND h.observed_at >= since
+      ORDER BY 3;
+  ELSIF ref_key IS NOT NULL THEN
+    RETURN QUERY
+      SELECT d.listing_id, d.source, d.day::timestamp, d.currency, d.min_price, d.max_price,
+             d.last_price, d.observations, 'daily'::text
+      FROM watch_price_daily d
+      WHERE d.reference_key = ref_key AND d.day >= since::date
+      UNION ALL
+      SELECT h.listing_id, h.source, h.observed_at, h.currency, h.price, h.price, h.price, 1, 'raw'::text
+      FROM watch_price_history h
+      WHERE h.reference_key = ref_key AND h.observed_at >= since
+      ORDER BY 1, 3;
+  END IF;
+END;
+$$ LANGUAGE plpgsql STABLE;
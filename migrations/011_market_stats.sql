@@ -0,0 +1,70 @@
+-- Market statistics per reference (core/market_stats.py)
+-- Prices of saved listings are kept as mergeable quantile sketches (log
+-- buckets, utils/quantile_sketch.py), one per market key and day. Writers
+-- send bucket-count deltas that are added server-side, so shards and queue
+-- workers never overwrite each other; readers merge the days of the window.
+-- New listings store their deal score against the market at save time.
+
+ALTER TABLE watch_listings ADD COLUMN IF NOT EXISTS deal_score NUMERIC(6, 1);
+ALTER TABLE watch_listings ADD COLUMN IF NOT EXISTS market_median NUMERIC(10, 2);
+ALTER TABLE watch_listings ADD COLUMN IF NOT EXISTS market_p10 NUMERIC(10, 2);
+ALTER TABLE watch_listings ADD COLUMN IF NOT EXISTS market_p90 NUMERIC(10, 2);
+ALTER TABLE watch_listings ADD COLUMN IF NOT EXISTS market_samples INTEGER;
+
+CREATE TABLE IF NOT EXISTS watch_market_sketches (
+  key TEXT NOT NULL,  -- manufacturer|model|reference|currency (normalized)
+  day DATE NOT NULL,
+  bins JSONB NOT NULL DEFAULT '{}',  -- bucket index -> count
+  count INTEGER NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (key, day)
+);
+
+CREATE INDEX IF NOT EXISTS idx_market_sketches_day ON watch_market_sketches(day);
+
+-- Add the bucket counts of two sketches
+CREATE OR REPLACE FUNCTION watch_merge_bins(a JSONB, b JSONB) RETURNS JSONB AS $$
+  SELECT COALESCE(jsonb_object_agg(k, total), '{}'::jsonb)
+  FROM (
+    SELECT k, SUM(v::bigint) AS total
+    FROM (
+      SELECT key AS k, value AS v FROM jsonb_each_text(COALESCE(a, '{}'::jsonb))
+      UNION ALL
+      SELECT key, value FROM jsonb_each_text(COALESCE(b, '{}'::jsonb))
+    ) s
+    GROUP BY k
+  ) t
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Merge sketch deltas [{key, day, bins, count}], returns rows merged
+CREATE OR REPLACE FUNCTION watch_merge_market_sketches(p_rows JSONB) RETURNS INTEGER AS $$
+DECLARE
+  merged INTEGER;
+BEGIN
+  INSERT INTO watch_market_sketches (key, day, bins, count, updated_at)
+  SELECT r.key, r.day, r.bins, r.count, NOW()
+  FROM jsonb_to_recordset(p_rows) AS r(key TEXT, day DATE, bins JSONB, count INTEGER)
+  ON CONFLICT (key, day) DO UPDATE
+  SET bins = watch_merge_bins(watch_market_sketches.bins, EXCLUDED.bins),
+      count = watch_market_sketches.count + EXCLUDED.count,
+      updated_at = NOW();
+
+  GET DIAGNOSTICS merged = ROW_COUNT;
+  RETURN merged;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Replace all sketches with a batch recompute (market_stats.py rebuild), returns rows written
+CREATE OR REPLACE FUNCTION watch_replace_market_sketches(p_rows JSONB) RETURNS INTEGER AS $$
+DECLARE
+  written INTEGER;
+BEGIN
+  DELETE FROM watch_market_sketches;
+  INSERT INTO watch_market_sketches (key, day, bins, count, updated_at)
+  SELECT r.key, r.day, r.bins, r.count, NOW()
+  FROM jsonb_to_recordset(p_rows) AS r(key TEXT, day DATE, bins JSONB, count INTEGER);
+
+  GET DIAGNOSTICS written = ROW_COUNT;
+  RETURN written;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,10 @@
+-- Cross-source duplicate clusters (core/dedup.py)
+-- dedup_signature is the MinHash signature of a listing's title and card
+-- text; listings found to be the same watch as an earlier one point to the
+-- cluster's canonical listing (the first one saved) and aren't notified.
+
+ALTER TABLE watch_listings ADD COLUMN IF NOT EXISTS dedup_signature BIGINT[];
+ALTER TABLE watch_listings ADD COLUMN IF NOT EXISTS canonical_id UUID
+  REFERENCES watch_listings(id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS idx_listings_canonical ON watch_listings(canonical_id) WHERE canonical_id IS NOT NULL;
@@ -0,0 +1,6 @@
+-- Listing photos for duplicate detection and web app thumbnails
+-- image_url (migration 002) is now filled from the source's image_selector.
+-- image_hash is the 64-bit dHash of the photo (utils/image_hash.py), stored
+-- signed; lookups run in memory (core/dedup.py), so no index is needed.
+
+ALTER TABLE watch_listings ADD COLUMN IF NOT EXISTS image_hash BIGINT;
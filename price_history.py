@@ -0,0 +1,92 @@
+"""
+Price history maintenance and lookup (migrations/010_price_history_rollup.sql)
+  python price_history.py compact                  # Fold old observations into daily min/max/last
+  python price_history.py show --listing <uuid>    # Price series of one listing
+  python price_history.py show --reference 116610LN --days 180
+Compaction runs daily from cron or the daemon (DAEMON_COMPACTION_INTERVAL).
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.supabase_client import SupabaseClient
+from utils import setup_logger
+
+# Load environment variables
+load_dotenv()
+
+# Setup logging
+logger = setup_logger('price_history', 'watch_service.log')
+
+
+def compact(db: SupabaseClient = None, keep_days: int = None) -> int:
+    """
+    Fold raw observations older than keep_days into daily rows
+
+    Args:
+        db: Supabase client (default: new client)
+        keep_days: Days of raw observations to keep (default: PRICE_HISTORY_KEEP_DAYS)
+
+    Returns:
+        Number of raw observations compacted
+
+    Raises:
+        RuntimeError if the compaction failed (the daemon job and cron exit report it)
+    """
+    db = db or SupabaseClient()
+    if keep_days is None:
+        keep_days = int(os.getenv('PRICE_HISTORY_KEEP_DAYS', '30'))
+
+    compacted = db.compact_price_history(keep_days)
+    if compacted is None:
+        raise RuntimeError("Price history compaction failed")
+    logger.info(f"🗜️  Compacted {compacted} price observations older than {keep_days} days into daily rows")
+    return compacted
+
+
+def show(db: SupabaseClient, listing_id: str = None, reference: str = None, days: int = None):
+    """Print a price series, one line per point"""
+    since = datetime.now() - timedelta(days=days) if days else None
+    rows = db.get_price_history(listing_id=listing_id, reference_number=reference, since=since)
+    if not rows:
+        print("No price history")
+        return
+
+    for row in rows:
+        if row['granularity'] == 'daily':
+            price = f"{row['last_price']} (min {row['min_price']}, max {row['max_price']}, {row['observations']} obs)"
+        else:
+            price = f"{row['last_price']}"
+        print(f"{row['observed_at'][:16]}  {row['source'] or '':<25} {price} {row['currency']}")
+
+
+def main():
+    """Entry point"""
+    parser = argparse.ArgumentParser(description='Price history maintenance and lookup')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    compact_parser = subparsers.add_parser('compact', help='Fold old observations into daily rows')
+    compact_parser.add_argument('--keep-days', type=int, help='Days of raw observations to keep')
+    show_parser = subparsers.add_parser('show', help='Print the price series of a listing or reference')
+    target = show_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--listing', help='Listing UUID')
+    target.add_argument('--reference', help='Reference number (all sources)')
+    show_parser.add_argument('--days', type=int, help='Only the last N days')
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'compact':
+            compact(keep_days=args.keep_days)
+        else:
+            show(SupabaseClient(), listing_id=args.listing, reference=args.reference, days=args.days)
+    except Exception as e:
+        logger.error(f"Fatal error: {e}", exc_info=True)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
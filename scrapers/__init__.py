@@ -3,11 +3,13 @@ from .base_scraper import BaseScraper
 from .static_scraper import StaticScraper
 from .dynamic_scraper import DynamicScraper
 from .generic_scraper import GenericScraper, CustomScraperLoader
+from .scraper_cache import ScraperCache
 
 __all__ = [
     'BaseScraper',
     'StaticScraper',
     'DynamicScraper',
     'GenericScraper',
-    'CustomScraperLoader'
+    'CustomScraperLoader',
+    'ScraperCache'
 ]
@@ -1,9 +1,13 @@
 """
 Abstract base class for all scrapers
 """
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, AsyncIterator, Tuple, Optional
 from utils.text_utils import generate_url_hash
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class BaseScraper(ABC):
@@ -21,6 +25,25 @@ class BaseScraper(ABC):
         self.domain = source_config.get('Domain', '')
         self.rate_limit = source_config.get('Rate_Limit_Seconds', 2)
 
+        # Optional utils.circuit_breaker.CircuitBreaker set by the searcher
+        self.breaker = None
+
+        # Optional utils.deadline.Deadline bounding all requests of this source
+        self.deadline = None
+
+        # Criteria IDs whose last search_many() crawl may have missed part of the
+        # result set (errors, budget, page limit) - listings absent from such a
+        # crawl say nothing about being sold
+        self.incomplete_crawls = set()
+
+        # Criteria IDs whose last search_many() crawl stopped because the time
+        # budget ran out - a partial search says nothing about its yield
+        self.budget_exhausted = set()
+
+        # Criteria IDs whose last search_many() crawl lost a page to an error
+        # or an open circuit - not to be mistaken for an empty search
+        self.failed_searches = set()
+
     @abstractmethod
     def search(self, criteria: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
@@ -40,8 +63,91 @@ class BaseScraper(ABC):
         """
         pass
 
+    def iter_search(self, criteria: Dict[str, Any]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Search for watches matching criteria, page by page
+
+        Base implementation yields the result of search() as a single page -
+        override to yield each result page as soon as it is parsed.
+
+        Args:
+            criteria: Search criteria from Notion
+
+        Yields:
+            List of raw listings per result page (same keys as search())
+        """
+        yield self.search(criteria)
+
+    async def aiter_search(self, criteria: Dict[str, Any]) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Async variant of iter_search - pages are fetched in a worker thread
+
+        Args:
+            criteria: Search criteria from Notion
+
+        Yields:
+            List of raw listings per result page
+        """
+        pages = self.iter_search(criteria)
+        done = object()
+
+        while True:
+            page = await asyncio.to_thread(next, pages, done)
+            if page is done:
+                return
+            yield page
+
+    def search_many(
+        self,
+        criteria_list: List[Dict[str, Any]],
+        max_pages: int = None
+    ) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Search for several criteria, page by page
+
+        Base implementation walks iter_search() for each criteria - override
+        to overlap fetching and parsing.
+
+        Args:
+            criteria_list: List of search criteria
+            max_pages: Result pages to walk per criteria (ignored - custom
+                scrapers paginate themselves)
+
+        Yields:
+            Tuple of (criteria, list of raw listings of one result page)
+        """
+        for criteria in criteria_list:
+            # Custom scrapers can't tell whether they saw the whole result set
+            self.incomplete_crawls.add(criteria.get('id'))
+            try:
+                for page in self.iter_search(criteria):
+                    yield criteria, page
+            except Exception as e:
+                logger.error(f"Search failed for {self.source_name}: {e}")
+                self.failed_searches.add(criteria.get('id'))
+
+    def search_page(self, criteria: Dict[str, Any], page: int = 1) -> List[Dict[str, Any]]:
+        """
+        Fetch a single result page
+
+        Base implementation only knows page 1 (= search()) - override for
+        paginated sources.
+
+        Args:
+            criteria: Search criteria
+            page: Result page number
+
+        Returns:
+            List of raw listings
+        """
+        return self.search(criteria) if page == 1 else []
+
+    def has_next_page(self, page: int) -> bool:
+        """Check if a page after page may exist"""
+        return False
+
     @abstractmethod
-    def check_availability(self, url: str) -> bool:
+    def check_availability(self, url: str) -> Optional[bool]:
         """
         Check if listing is still available
 
@@ -49,10 +155,31 @@ class BaseScraper(ABC):
             url: Full URL to listing
 
         Returns:
-            True if listing is still available, False if sold/removed
+            True if listing is still available, False if sold/removed,
+            None if the check was inconclusive (rate limited, server error, timeout)
         """
         pass
 
+    def fetch_allowed(self) -> bool:
+        """
+        Check circuit breaker before sending a request
+
+        Returns:
+            True if no breaker is attached or it lets the request through
+        """
+        return self.breaker is None or self.breaker.allow_request()
+
+    def record_fetch(self, success: bool, seconds: float):
+        """
+        Report outcome of a request to the circuit breaker
+
+        Args:
+            success: Whether the request succeeded
+            seconds: Request latency
+        """
+        if self.breaker is not None:
+            self.breaker.record(success, seconds)
+
     def generate_url_hash(self, url: str) -> str:
         """
         Generate hash for URL (for duplicate detection)
@@ -14,9 +14,16 @@ from selenium.common.exceptions import TimeoutException, WebDriverException
 from typing import Optional
 from utils.logger import get_logger
 from utils.rate_limiter import RateLimiter
+from utils.adaptive_rate import get_rate_controller, looks_blocked
+from utils.deadline import Deadline, bounded_timeout
+from utils.latency import get_latency_tracker
+from utils.sold_detector import SoldDetector
 
 logger = get_logger(__name__)
 
+# Page load timeout of the driver outside deadline-capped fetches
+PAGE_LOAD_TIMEOUT = 30
+
 
 class DynamicScraper:
     """Scraper for JavaScript-heavy pages using Selenium"""
@@ -30,7 +37,11 @@ class DynamicScraper:
             rate_limit: Seconds between requests
         """
         self.domain = domain
+        self.rate_limit = rate_limit
         self.rate_limiter = RateLimiter(default_delay=rate_limit)
+        self.rate_control = get_rate_controller()
+        self.rate_control.configure(domain, rate_limit)
+        self.latency = get_latency_tracker()
         self.driver = None
         self._init_driver()
 
@@ -55,7 +66,7 @@ class DynamicScraper:
             options.add_experimental_option('prefs', prefs)
 
             self.driver = webdriver.Chrome(options=options)
-            self.driver.set_page_load_timeout(30)
+            self.driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
 
             logger.info("Selenium WebDriver initialized")
 
@@ -63,13 +74,14 @@ class DynamicScraper:
             logger.error(f"Failed to initialize Selenium: {e}")
             raise
 
-    def fetch_page(self, url: str, wait_for_selector: str = None) -> BeautifulSoup:
+    def fetch_page(self, url: str, wait_for_selector: str = None, deadline: Optional[Deadline] = None) -> BeautifulSoup:
         """
         Fetch page with Selenium and return BeautifulSoup object
 
         Args:
             url: URL to fetch
             wait_for_selector: Optional CSS selector to wait for before returning
+            deadline: Optional time budget
 
         Returns:
             BeautifulSoup object
@@ -77,17 +89,42 @@ class DynamicScraper:
         Raises:
             WebDriverException on failure
         """
+        return BeautifulSoup(self.fetch_page_source(url, wait_for_selector, deadline), 'lxml')
+
+    def fetch_page_source(self, url: str, wait_for_selector: str = None, deadline: Optional[Deadline] = None) -> str:
+        """
+        Fetch page with Selenium and return the rendered HTML
+
+        Args:
+            url: URL to fetch
+            wait_for_selector: Optional CSS selector to wait for before returning
+            deadline: Optional time budget capping page load and waits
+
+        Returns:
+            Rendered page source
+
+        Raises:
+            DeadlineExceeded if the time budget was used up
+            WebDriverException on failure
+        """
         if not self.driver:
             self._init_driver()
 
-        self.rate_limiter.wait(self.domain)
+        bounded_timeout(deadline, PAGE_LOAD_TIMEOUT)
+        self.rate_limiter.wait(self.domain, self.rate_control.current_delay(self.domain, self.rate_limit))
 
+        # Page load timeout is per driver - cap it to what is left of the budget
+        capped = deadline is not None
+        if capped:
+            self.driver.set_page_load_timeout(bounded_timeout(deadline, PAGE_LOAD_TIMEOUT))
+
+        start = time.monotonic()
         try:
             self.driver.get(url)
 
             # Wait for specific element if specified
             if wait_for_selector:
-                WebDriverWait(self.driver, 10).until(
+                WebDriverWait(self.driver, max(1, bounded_timeout(deadline, 10))).until(
                     EC.presence_of_element_located((By.CSS_SELECTOR, wait_for_selector))
                 )
             else:
@@ -96,32 +133,66 @@ class DynamicScraper:
 
             # Get page source
             html = self.driver.page_source
-            return BeautifulSoup(html, 'lxml')
+            self._record(html, start)
+            return html
 
         except TimeoutException:
             logger.warning(f"Timeout waiting for {wait_for_selector}")
             # Return what we have
-            return BeautifulSoup(self.driver.page_source, 'lxml')
+            html = self.driver.page_source
+            self._record(html, start)
+            return html
 
         except Exception as e:
+            self.rate_control.record(self.domain, None, time.monotonic() - start)
             logger.error(f"Selenium fetch failed: {e}")
             raise
 
-    def check_availability(self, url: str) -> bool:
+        finally:
+            # The driver is shared by later fetches and availability checks
+            if capped and self.driver:
+                try:
+                    self.driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+                except Exception as e:
+                    logger.debug(f"Could not restore page load timeout: {e}")
+
+    def _record(self, html: str, start: float):
+        """Feed page load outcome to adaptive rate control (no status code in Selenium)"""
+        self.latency.record(self.domain, time.monotonic() - start)
+        blocked = looks_blocked(html[:20000].encode('utf-8', 'ignore'))
+        self.rate_control.record(self.domain, 200, time.monotonic() - start, blocked=blocked)
+
+    def fetch_raw(self, url: str, wait_for_selector: str = None, deadline: Optional[Deadline] = None) -> bytes:
+        """
+        Fetch page with Selenium and return the rendered HTML as bytes
+
+        Args:
+            url: URL to fetch
+            wait_for_selector: Optional CSS selector to wait for before returning
+            deadline: Optional time budget
+
+        Returns:
+            Rendered page source encoded as UTF-8
+        """
+        return self.fetch_page_source(url, wait_for_selector, deadline).encode('utf-8')
+
+    def check_availability(self, url: str, detector: Optional[SoldDetector] = None) -> Optional[bool]:
         """
-        Check if URL is still accessible
+        Check if a listing is still available
 
         Args:
             url: URL to check
+            detector: Sold markers of the source (default: generic markers)
 
         Returns:
-            True if page loads successfully
+            False if redirected away or the rendered page is marked sold,
+            None if the page couldn't be loaded or is a block page
         """
         try:
             if not self.driver:
                 self._init_driver()
 
-            self.rate_limiter.wait(self.domain)
+            self.rate_limiter.wait(self.domain, self.rate_control.current_delay(self.domain, self.rate_limit))
             self.driver.get(url)
             time.sleep(1)
 
@@ -130,10 +201,16 @@ class DynamicScraper:
             if url not in current_url and self.domain not in current_url:
                 return False
 
-            return True
+            # The rendered page is already in memory - scan it without parsing
+            html = self.driver.page_source.encode('utf-8')
+            if looks_blocked(html[:20000]):
+                logger.warning(f"Block page while checking {url} - result unknown")
+                return None
+            return not (detector or SoldDetector()).scan_text(html)
 
-        except Exception:
-            return False
+        except Exception as e:
+            logger.warning(f"Could not check {url}: {e}")
+            return None
 
     def close(self):
         """Close WebDriver"""
@@ -3,12 +3,17 @@ GAME CHANGER: Generic scraper that reads configuration from Notion Sources DB
 Eliminates need for custom scrapers for 80% of sources
 """
 import os
-from typing import List, Dict, Any
-from urllib.parse import urljoin
+import time
+from collections import deque
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from .base_scraper import BaseScraper
 from .static_scraper import StaticScraper
 from .dynamic_scraper import DynamicScraper
+from .region_parser import parse_region, region_selector
+from .listing_parser import ListingSpec, ListingRecord, extract_records, get_parse_pool
+from utils.deadline import Deadline, DeadlineExceeded, paused
 from utils.logger import get_logger
+from utils.sold_detector import SoldDetector
 
 logger = get_logger(__name__)
 
@@ -39,6 +44,28 @@ class GenericScraper(BaseScraper):
         self.link_selector = source_config.get('Link_Selector', '')
         self.image_selector = source_config.get('Image_Selector', '')
 
+        # Sold markers scanned on listing pages by availability checks
+        self.sold_detector = SoldDetector.from_config(source_config)
+
+        # Time budget per criteria, nested in the source budget (self.deadline)
+        self.criteria_budget = float(os.getenv('CRITERIA_TIME_BUDGET', '180'))
+
+        # Result pages per search - templates paginate via a {page} placeholder
+        self.max_pages = int(source_config.get('Max_Pages') or os.getenv('SEARCH_MAX_PAGES', '1'))
+
+        # Only materialize the listing subtrees of result pages
+        self.restrict_parsing = os.getenv('PARSE_RESTRICTION', 'true').lower() == 'true'
+
+        self.spec = ListingSpec(
+            listing_selector=self.listing_selector,
+            title_selector=self.title_selector,
+            price_selector=self.price_selector,
+            link_selector=self.link_selector,
+            image_selector=self.image_selector,
+            base_url=source_config.get('URL', ''),
+            restrict=self.restrict_parsing
+        )
+
         # Initialize appropriate engine
         if self.scraper_type == 'Dynamic':
             self.engine = DynamicScraper(self.domain, self.rate_limit)
@@ -58,34 +85,197 @@ class GenericScraper(BaseScraper):
         Returns:
             List of raw listings
         """
-        try:
-            # Build search URL from template
-            search_url = self._build_search_url(criteria)
-            if not search_url:
-                logger.warning(f"No search URL template configured for {self.source_name}")
-                return []
+        return [listing for page in self.iter_search(criteria) for listing in page]
 
-            logger.info(f"Searching {self.source_name}: {search_url}")
+    def iter_search(self, criteria: Dict[str, Any], max_pages: int = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Search for watches page by page using configured selectors
 
-            # Fetch page using configured engine
-            soup = self.engine.fetch_page(search_url)
+        Args:
+            criteria: Search criteria with Manufacturer, Model, etc.
+            max_pages: Result pages to walk (default: source Max_Pages)
 
-            # Extract listings using CSS selectors
-            listings = self._extract_listings(soup)
+        Yields:
+            List of raw listings per result page
+        """
+        max_pages = max_pages or self.max_pages
+        deadline = Deadline.within(self.deadline, self.criteria_budget)
 
-            logger.info(f"Found {len(listings)} listings from {self.source_name}")
-            return listings
+        for page in range(1, max_pages + 1):
+            try:
+                listings = self.search_page(criteria, page, deadline)
+
+            except DeadlineExceeded:
+                logger.warning(f"Time budget exhausted for {self.source_name} - stopping at page {page}")
+                return
+            except Exception as e:
+                logger.error(f"Search failed for {self.source_name}: {e}")
+                return
+
+            logger.info(f"Found {len(listings)} listings from {self.source_name} (page {page})")
+            if not listings:
+                return
+
+            # Extraction and saving by the consumer don't count against the fetch budgets
+            with paused(deadline, self.deadline):
+                yield listings
+
+            if not self._has_next_page(page, max_pages):
+                return
+
+    def search_page(self, criteria: Dict[str, Any], page: int = 1, deadline: Deadline = None) -> List[Dict[str, Any]]:
+        """
+        Fetch and extract a single result page
+
+        Args:
+            criteria: Search criteria
+            page: Result page number
+            deadline: Optional time budget
+
+        Returns:
+            List of raw listings (empty if no template or circuit open)
+
+        Raises:
+            Exception from fetching (e.g. requests errors, DeadlineExceeded)
+        """
+        # Build search URL from template
+        search_url = self._build_search_url(criteria, page)
+        if not search_url:
+            logger.warning(f"No search URL template configured for {self.source_name}")
+            return []
+
+        if not self.fetch_allowed():
+            logger.info(f"Circuit open for {self.source_name} - skipping {search_url}")
+            return []
+
+        logger.info(f"Searching {self.source_name}: {search_url}")
+
+        # Fetch page using configured engine
+        soup, selector = self._timed(self._fetch_results, search_url, deadline)
+
+        # Extract listings using CSS selectors
+        return self._extract_listings(soup, selector)
+
+    def has_next_page(self, page: int) -> bool:
+        """Check if a page after page may exist (template paginates, Max_Pages not reached)"""
+        return self._has_next_page(page, self.max_pages)
+
+    def search_many(
+        self,
+        criteria_list: List[Dict[str, Any]],
+        max_pages: int = None
+    ) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Search for several criteria, parsing pages in the process pool
 
+        Raw page bytes are handed to the parse pool while the next page is
+        fetched, so CPU-bound parsing no longer serializes with fetching. The
+        next page of a criteria is only requested once its previous page
+        turned out non-empty.
+
+        Args:
+            criteria_list: List of search criteria
+            max_pages: Result pages to walk per criteria (default: source Max_Pages)
+
+        Yields:
+            Tuple of (criteria, list of raw listings of one result page),
+            in completion order
+        """
+        pool = get_parse_pool()
+        max_pages = max_pages or self.max_pages
+        todo = deque((criteria, 1, None) for criteria in criteria_list)
+        in_flight = deque()
+        for criteria in criteria_list:
+            self.incomplete_crawls.discard(criteria.get('id'))
+            self.budget_exhausted.discard(criteria.get('id'))
+            self.failed_searches.discard(criteria.get('id'))
+
+        while todo or in_flight:
+            if todo:
+                criteria, page, deadline = todo.popleft()
+                # The criteria budget starts with its first request
+                deadline = deadline or Deadline.within(self.deadline, self.criteria_budget)
+                in_flight.append((criteria, page, deadline, self._submit_page(pool, criteria, page, deadline)))
+
+            # Hand back finished pages while later ones are still being fetched
+            while in_flight and (not todo or in_flight[0][3] is None or in_flight[0][3].done()):
+                criteria, page, deadline, future = in_flight.popleft()
+                listings = self._collect(future, page)
+                if listings is None or (not listings and page == 1):
+                    # Failed page, or nothing at all (possibly a block page)
+                    self.incomplete_crawls.add(criteria.get('id'))
+                if listings is None and criteria.get('id') not in self.budget_exhausted:
+                    self.failed_searches.add(criteria.get('id'))
+                if listings:
+                    with paused(deadline, self.deadline):
+                        yield criteria, listings
+                    if self._has_next_page(page, max_pages):
+                        todo.append((criteria, page + 1, deadline))
+                    else:
+                        # Page limit reached, or a template without {page} - only an
+                        # empty page shows that no further results exist
+                        self.incomplete_crawls.add(criteria.get('id'))
+
+    def _submit_page(self, pool, criteria: Dict[str, Any], page: int, deadline: Deadline):
+        """Fetch one result page and submit it to the parse pool"""
+        search_url = self._build_search_url(criteria, page)
+        if not search_url:
+            logger.warning(f"No search URL template configured for {self.source_name}")
+            return None
+
+        if not self.fetch_allowed():
+            logger.info(f"Circuit open for {self.source_name} - skipping {search_url}")
+            return None
+
+        try:
+            logger.info(f"Searching {self.source_name}: {search_url}")
+            raw, spec = self._timed(self._fetch_raw, search_url, deadline)
+            return pool.submit(raw, spec)
+        except DeadlineExceeded:
+            logger.warning(f"Time budget exhausted for {self.source_name} - stopping at page {page}")
+            self.budget_exhausted.add(criteria.get('id'))
+            return None
         except Exception as e:
             logger.error(f"Search failed for {self.source_name}: {e}")
-            return []
+            return None
+
+    def _collect(self, future, page: int) -> Optional[List[Dict[str, Any]]]:
+        """Resolve a parse future into raw listings (None if the page failed)"""
+        if future is None:
+            return None
+
+        try:
+            listings = [self._to_listing(record) for record in future.result()]
+            logger.info(f"Found {len(listings)} listings from {self.source_name} (page {page})")
+            return listings
+        except Exception as e:
+            logger.error(f"Parsing failed for {self.source_name}: {e}")
+            return None
 
-    def _build_search_url(self, criteria: Dict[str, Any]) -> str:
+    def _timed(self, fetch, *args):
+        """Run a fetch and report its outcome and latency to the circuit breaker"""
+        start = time.monotonic()
+        try:
+            result = fetch(*args)
+        except DeadlineExceeded:
+            raise  # Budget ran out before sending - not the source's fault
+        except Exception:
+            self.record_fetch(False, time.monotonic() - start)
+            raise
+        self.record_fetch(True, time.monotonic() - start)
+        return result
+
+    def _has_next_page(self, page: int, max_pages: int) -> bool:
+        """Check if the template paginates and the page limit isn't reached"""
+        return page < max_pages and '{page}' in self.search_url_template
+
+    def _build_search_url(self, criteria: Dict[str, Any], page: int = 1) -> str:
         """
         Build search URL from template and criteria
 
         Args:
             criteria: Search criteria
+            page: Result page number (for templates with {page})
 
         Returns:
             Formatted search URL
@@ -102,94 +292,102 @@ class GenericScraper(BaseScraper):
         url = url.replace('{model}', model)
         url = url.replace('{Manufacturer}', manufacturer)
         url = url.replace('{Model}', model)
+        url = url.replace('{page}', str(page))
 
         # URL encode spaces
         url = url.replace(' ', '+')
 
         return url
 
-    def _extract_listings(self, soup) -> List[Dict[str, Any]]:
+    def _fetch_results(self, search_url: str, deadline: Deadline = None):
+        """
+        Fetch search result page, restricted to the listing region if possible
+
+        Args:
+            search_url: Search URL
+            deadline: Optional time budget
+
+        Returns:
+            Tuple of (BeautifulSoup object, listing selector to use on it)
+        """
+        restricted = region_selector(self.listing_selector) if self.restrict_parsing else None
+
+        if not restricted:
+            return self.engine.fetch_page(search_url, deadline=deadline), self.listing_selector
+
+        if isinstance(self.engine, StaticScraper):
+            soup = self.engine.fetch_region(search_url, self.listing_selector, deadline=deadline)
+        else:
+            # Selenium already holds the full page - still skip building its DOM
+            html = self.engine.fetch_page_source(search_url, deadline=deadline)
+            soup = parse_region([html.encode('utf-8')], self.listing_selector, encoding='utf-8')
+
+        return soup, restricted
+
+    def _fetch_raw(self, search_url: str, deadline: Deadline = None) -> Tuple[bytes, ListingSpec]:
+        """
+        Fetch search result page for the parse pool
+
+        Static pages are streamed and cut down to the listing region while
+        downloading (stopping once the region has ended), so the pool only
+        extracts the fragments.
+
+        Args:
+            search_url: Search URL
+            deadline: Optional time budget
+
+        Returns:
+            Tuple of (raw HTML bytes, spec to parse them with)
+        """
+        restricted = region_selector(self.listing_selector) if self.restrict_parsing else None
+
+        if restricted and isinstance(self.engine, StaticScraper):
+            html = self.engine.fetch_region_html(search_url, self.listing_selector, deadline=deadline)
+            return html.encode('utf-8'), self.spec._replace(listing_selector=restricted, restrict=False)
+
+        # Selenium already holds the full page - the worker restricts parsing
+        return self.engine.fetch_raw(search_url, deadline=deadline), self.spec
+
+    def _extract_listings(self, soup, selector: str = None) -> List[Dict[str, Any]]:
         """
         Extract listings from page using CSS selectors
 
         Args:
             soup: BeautifulSoup object
+            selector: Listing selector override (region-restricted soups)
 
         Returns:
             List of raw listings
         """
-        listings = []
-
         if not self.listing_selector:
             logger.warning(f"No listing selector configured for {self.source_name}")
             return []
 
-        # Find all listing containers
-        listing_elements = soup.select(self.listing_selector)
-
-        for element in listing_elements:
-            try:
-                listing = self._extract_single_listing(element)
-                if listing:
-                    listings.append(listing)
-            except Exception as e:
-                logger.warning(f"Failed to extract listing: {e}")
-                continue
-
-        return listings
+        return [self._to_listing(record) for record in extract_records(soup, self.spec, selector)]
 
-    def _extract_single_listing(self, element) -> Dict[str, Any]:
+    def _to_listing(self, record: ListingRecord) -> Dict[str, Any]:
         """
-        Extract data from single listing element
+        Build raw listing from a compact listing record
 
         Args:
-            element: BeautifulSoup element
+            record: (title, price_text, link, raw_html, image_url) tuple
 
         Returns:
-            Listing dictionary or None if extraction failed
+            Listing dictionary
         """
-        # Extract title
-        title = ""
-        if self.title_selector:
-            title_elem = element.select_one(self.title_selector)
-            if title_elem:
-                title = title_elem.get_text(strip=True)
-
-        # Extract price
-        price_text = ""
-        if self.price_selector:
-            price_elem = element.select_one(self.price_selector)
-            if price_elem:
-                price_text = price_elem.get_text(strip=True)
-
-        # Extract link
-        link = ""
-        if self.link_selector:
-            link_elem = element.select_one(self.link_selector)
-            if link_elem:
-                link = link_elem.get('href', '')
-                # Make absolute URL if relative
-                if link and not link.startswith('http'):
-                    base_url = self.config.get('URL', '')
-                    link = urljoin(base_url, link)
-
-        # Validation
-        if not title and not link:
-            return None
+        title, price_text, link, raw_html, image_url = record
 
-        # Build listing
-        listing = {
+        return {
             'title': title,
             'price': price_text,
             'link': link,
-            'raw_html': str(element),
+            'raw_html': raw_html,
+            'image_url': image_url,
             'source_name': self.source_name,
             'source_type': self.config.get('Type', 'Unknown')
         }
 
-        return listing
-
-    def check_availability(self, url: str) -> bool:
+    def check_availability(self, url: str) -> Optional[bool]:
         """
         Check if listing is still available
 
@@ -197,13 +395,13 @@ class GenericScraper(BaseScraper):
             url: Listing URL
 
         Returns:
-            True if available
+            True if available, False if sold or gone, None if unknown
         """
         try:
-            return self.engine.check_availability(url)
+            return self.engine.check_availability(url, self.sold_detector)
         except Exception as e:
             logger.error(f"Availability check failed: {e}")
-            return False
+            return None
 
     def close_driver(self):
         """Close underlying engine"""
@@ -255,3 +453,23 @@ class CustomScraperLoader:
 
         # Use generic scraper
         return GenericScraper(source_config)
+
+    @staticmethod
+    def iter_search(scraper, criteria: Dict[str, Any]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Iterate result pages of any loaded scraper
+
+        Custom scrapers that only implement search() are wrapped so callers
+        can always consume results page by page.
+
+        Args:
+            scraper: Scraper returned by load_scraper
+            criteria: Search criteria
+
+        Yields:
+            List of raw listings per result page
+        """
+        if hasattr(scraper, 'iter_search'):
+            yield from scraper.iter_search(criteria)
+        else:
+            yield scraper.search(criteria)
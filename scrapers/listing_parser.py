@@ -0,0 +1,267 @@
+"""
+CPU-bound listing extraction that can run in worker processes
+Raw page bytes go in, compact listing records come out - no scraper, session
+or browser state is needed, so pages can be parsed in a ProcessPoolExecutor
+while the next page is being fetched.
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import List, Optional, NamedTuple, Tuple, Iterable, Iterator
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from .region_parser import parse_region, region_selector
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# (title, price_text, link, raw_html, image_url)
+ListingRecord = Tuple[str, str, str, str, str]
+
+# Image attributes in order of preference - lazy-loading pages keep the real URL in data-*
+_IMAGE_ATTRS = ('data-src', 'data-lazy-src', 'data-original', 'src', 'srcset', 'data-srcset', 'content', 'href')
+
+_WHITESPACE_BETWEEN_TAGS_RE = re.compile(r'>\s+<')
+_WHITESPACE_RE = re.compile(r'\s{2,}')
+
+
+class ListingSpec(NamedTuple):
+    """Picklable selector configuration of a source"""
+    listing_selector: str
+    title_selector: str = ''
+    price_selector: str = ''
+    link_selector: str = ''
+    image_selector: str = ''
+    base_url: str = ''
+    restrict: bool = True
+
+
+def minimize_html(html: str) -> str:
+    """
+    Collapse whitespace in listing HTML (smaller IPC payloads and prompts)
+
+    Args:
+        html: Raw listing HTML
+
+    Returns:
+        Minimized HTML
+    """
+    html = _WHITESPACE_BETWEEN_TAGS_RE.sub('><', html)
+    return _WHITESPACE_RE.sub(' ', html).strip()
+
+
+def extract_image_url(element, spec: ListingSpec) -> str:
+    """
+    Extract the image URL of a listing element
+
+    Args:
+        element: BeautifulSoup element
+        spec: Selector configuration
+
+    Returns:
+        Absolute image URL or empty string
+    """
+    if not spec.image_selector:
+        return ""
+
+    image_elem = element.select_one(spec.image_selector)
+    if not image_elem:
+        return ""
+
+    # The selector may point at a wrapper (<picture>, <a>) instead of the <img>
+    if image_elem.name not in ('img', 'source', 'meta', 'link'):
+        image_elem = image_elem.find(['img', 'source']) or image_elem
+
+    for attr in _IMAGE_ATTRS:
+        value = (image_elem.get(attr) or '').strip()
+        if attr.endswith('srcset'):
+            value = value.split(',')[0].strip().split(' ')[0]
+        if value and not value.startswith('data:'):
+            return urljoin(spec.base_url, value)
+    return ""
+
+
+def extract_record(element, spec: ListingSpec) -> Optional[ListingRecord]:
+    """
+    Extract data from single listing element
+
+    Args:
+        element: BeautifulSoup element
+        spec: Selector configuration
+
+    Returns:
+        Listing record or None if neither title nor link was found
+    """
+    # Extract title
+    title = ""
+    if spec.title_selector:
+        title_elem = element.select_one(spec.title_selector)
+        if title_elem:
+            title = title_elem.get_text(strip=True)
+
+    # Extract price
+    price_text = ""
+    if spec.price_selector:
+        price_elem = element.select_one(spec.price_selector)
+        if price_elem:
+            price_text = price_elem.get_text(strip=True)
+
+    # Extract link
+    link = ""
+    if spec.link_selector:
+        link_elem = element.select_one(spec.link_selector)
+        if link_elem:
+            link = link_elem.get('href', '')
+            # Make absolute URL if relative
+            if link and not link.startswith('http'):
+                link = urljoin(spec.base_url, link)
+
+    # Validation
+    if not title and not link:
+        return None
+
+    return (title, price_text, link, minimize_html(str(element)), extract_image_url(element, spec))
+
+
+def extract_records(soup, spec: ListingSpec, selector: str = None) -> List[ListingRecord]:
+    """
+    Extract all listing records from a parsed page
+
+    Args:
+        soup: BeautifulSoup object
+        spec: Selector configuration
+        selector: Listing selector override (region-restricted soups)
+
+    Returns:
+        List of listing records
+    """
+    records = []
+
+    for element in soup.select(selector or spec.listing_selector):
+        try:
+            record = extract_record(element, spec)
+            if record:
+                records.append(record)
+        except Exception as e:
+            logger.warning(f"Failed to extract listing: {e}")
+            continue
+
+    return records
+
+
+def parse_listings(raw: bytes, spec: ListingSpec) -> List[ListingRecord]:
+    """
+    Parse raw page bytes into listing records (worker entry point)
+
+    Args:
+        raw: Raw HTML of a search result page
+        spec: Selector configuration
+
+    Returns:
+        List of listing records
+    """
+    if not raw or not spec.listing_selector:
+        return []
+
+    restricted = region_selector(spec.listing_selector) if spec.restrict else None
+    if restricted:
+        return extract_records(parse_region([raw], spec.listing_selector), spec, restricted)
+
+    return extract_records(BeautifulSoup(raw, 'lxml'), spec)
+
+
+def _parse_batch(batch: List[Tuple[bytes, ListingSpec]]) -> List[List[ListingRecord]]:
+    """Parse several pages in one task to amortize IPC overhead"""
+    return [parse_listings(raw, spec) for raw, spec in batch]
+
+
+class ParsePool:
+    """Process pool for the parse/extract-listings stage"""
+
+    def __init__(self, workers: int = None):
+        """
+        Initialize parse pool
+
+        Args:
+            workers: Number of worker processes (default: PARSE_WORKERS or CPU count).
+                     1 or less parses inline without a pool.
+        """
+        if workers is None:
+            workers = int(os.getenv('PARSE_WORKERS', '0')) or os.cpu_count() or 1
+
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def submit(self, raw: bytes, spec: ListingSpec) -> Future:
+        """
+        Parse a single page in the background
+
+        Args:
+            raw: Raw HTML bytes
+            spec: Selector configuration
+
+        Returns:
+            Future resolving to the list of listing records
+        """
+        if self.executor:
+            return self.executor.submit(parse_listings, raw, spec)
+
+        future = Future()
+        try:
+            future.set_result(parse_listings(raw, spec))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def map(self, pages: Iterable[Tuple[bytes, ListingSpec]], batch_size: int = None) -> Iterator[List[ListingRecord]]:
+        """
+        Parse many pages, preserving order
+
+        Pages are grouped into batches so each task carries several pages -
+        this keeps per-task pickling and scheduling overhead low.
+
+        Args:
+            pages: Iterable of (raw bytes, spec) tuples
+            batch_size: Pages per task (default: spread evenly, 4 tasks per worker)
+
+        Yields:
+            List of listing records per page
+        """
+        pages = list(pages)
+        if not self.executor:
+            for raw, spec in pages:
+                yield parse_listings(raw, spec)
+            return
+
+        if batch_size is None:
+            batch_size = max(1, len(pages) // (self.workers * 4))
+
+        batches = [pages[i:i + batch_size] for i in range(0, len(pages), batch_size)]
+        for results in self.executor.map(_parse_batch, batches):
+            yield from results
+
+    def close(self):
+        """Shut down worker processes"""
+        if self.executor:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+
+_shared_pool: Optional[ParsePool] = None
+
+
+def get_parse_pool() -> ParsePool:
+    """Get the process-wide parse pool (created on first use)"""
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = ParsePool()
+        logger.info(f"Parse pool started with {_shared_pool.workers} workers")
+    return _shared_pool
+
+
+def shutdown_parse_pool():
+    """Shut down the process-wide parse pool"""
+    global _shared_pool
+    if _shared_pool is not None:
+        _shared_pool.close()
+        _shared_pool = None
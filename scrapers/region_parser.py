@@ -0,0 +1,362 @@
+"""
+Region-restricted HTML parsing for search result pages
+Only the listing subtrees matched by the source's listing selector are
+materialized - navigation, filter facets and inline scripts are dropped while
+streaming, and parsing stops once the result region has ended.
+"""
+import codecs
+import re
+import time
+import tracemalloc
+from functools import lru_cache
+from typing import Iterable, List, Optional, Dict, Any, Tuple
+from bs4 import BeautifulSoup
+from lxml import etree
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Matches one compound selector: optional tag followed by .class, #id or [attr] parts
+_COMPOUND_RE = re.compile(r'^(?P<tag>[a-zA-Z][\w-]*|\*)?(?P<rest>(?:[.#][\w-]+|\[[^\]]+\])*)$')
+_PART_RE = re.compile(r'([.#])([\w-]+)|\[\s*([\w-]+)\s*(?:=\s*["\']?([^"\'\]]*)["\']?\s*)?\]')
+_COMBINATOR_RE = re.compile(r'\s*([>+~])\s*|\s+')
+_CHARSET_RE = re.compile(rb'charset\s*=\s*["\']?([\w-]+)', re.IGNORECASE)
+
+# Elements started after the last listing before the region counts as ended
+DEFAULT_IDLE_LIMIT = 500
+
+
+class CompoundMatcher:
+    """Matches lxml elements against a single compound CSS selector"""
+
+    def __init__(self, selector: str, tag: Optional[str], element_id: Optional[str],
+                 classes: List[str], attrs: List[Tuple[str, Optional[str]]]):
+        self.selector = selector
+        self.tag = tag
+        self.element_id = element_id
+        self.classes = classes
+        self.attrs = attrs
+
+    def matches(self, element) -> bool:
+        """
+        Check if element matches this compound selector
+
+        Args:
+            element: lxml element
+
+        Returns:
+            True if tag, id, classes and attributes all match
+        """
+        if not isinstance(element.tag, str):
+            return False  # Comments / processing instructions
+
+        if self.tag and element.tag.lower() != self.tag:
+            return False
+
+        if self.element_id and element.get('id') != self.element_id:
+            return False
+
+        if self.classes:
+            element_classes = (element.get('class') or '').split()
+            if not all(c in element_classes for c in self.classes):
+                return False
+
+        for name, value in self.attrs:
+            actual = element.get(name)
+            if actual is None:
+                return False
+            if value is not None and actual != value:
+                return False
+
+        return True
+
+
+class SelectorMatcher:
+    """Matches lxml elements against a compound chain joined by descendant / child combinators"""
+
+    def __init__(self, compounds: List[CompoundMatcher], combinators: List[str]):
+        self.compounds = compounds
+        self.combinators = combinators  # combinators[i] joins compounds[i] and compounds[i + 1]
+        self.selector = compounds[-1].selector
+
+    def matches(self, element) -> bool:
+        """
+        Check if element matches the selector
+
+        Ancestors are still open while streaming (only finished siblings are
+        discarded), so the chain is checked on the element's parents.
+
+        Args:
+            element: lxml element
+
+        Returns:
+            True if the element and its ancestors match the chain
+        """
+        if not self.compounds[-1].matches(element):
+            return False
+        return self._matches_ancestors(element.getparent(), len(self.compounds) - 2)
+
+    def _matches_ancestors(self, element, index: int) -> bool:
+        """Match compounds[:index + 1] against element and its ancestors"""
+        if index < 0:
+            return True
+        while element is not None:
+            if self.compounds[index].matches(element) and self._matches_ancestors(element.getparent(), index - 1):
+                return True
+            if self.combinators[index] == '>':
+                return False
+            element = element.getparent()
+        return False
+
+
+def _parse_compound(compound: str) -> Optional[CompoundMatcher]:
+    """
+    Parse a compound selector like 'div.product-item[data-id]'
+
+    Args:
+        compound: Compound selector without combinators
+
+    Returns:
+        CompoundMatcher or None if selector uses unsupported syntax
+    """
+    match = _COMPOUND_RE.match(compound)
+    if not match or not compound:
+        return None
+
+    tag = match.group('tag')
+    tag = tag.lower() if tag and tag != '*' else None
+
+    element_id = None
+    classes = []
+    attrs = []
+
+    for part in _PART_RE.finditer(match.group('rest')):
+        prefix, name, attr_name, attr_value = part.groups()
+        if prefix == '.':
+            classes.append(name)
+        elif prefix == '#':
+            element_id = name
+        else:
+            attrs.append((attr_name, attr_value))
+
+    # Reject operators like ~= or ^= that the part regex could not consume
+    if _PART_RE.sub('', match.group('rest')):
+        return None
+
+    return CompoundMatcher(compound, tag, element_id, classes, attrs)
+
+
+@lru_cache(maxsize=256)
+def build_matchers(listing_selector: str) -> Optional[Tuple[SelectorMatcher, ...]]:
+    """
+    Build streaming matchers from a listing selector
+
+    Descendant and child combinators are matched against the ancestors of
+    each element, so 'div.results > div.item' skips items in sidebars just
+    like the full parse does. Sibling combinators (+, ~) can't be checked
+    while streaming and fall back to full parsing. Results are cached per
+    selector, so long-running processes compile each once.
+
+    Args:
+        listing_selector: CSS selector configured for the source
+
+    Returns:
+        Tuple of matchers or None if the selector can't be restricted
+    """
+    if not listing_selector or not listing_selector.strip():
+        return None
+
+    matchers = []
+    for group in listing_selector.split(','):
+        # Alternating compounds and combinators (None for whitespace)
+        tokens = _COMBINATOR_RE.split(group.strip())
+        compounds = [_parse_compound(token) for token in tokens[::2]]
+        combinators = [token or ' ' for token in tokens[1::2]]
+        if any(c is None for c in compounds) or any(c in '+~' for c in combinators):
+            return None
+        matchers.append(SelectorMatcher(compounds, combinators))
+
+    return tuple(matchers)
+
+
+def region_selector(listing_selector: str) -> Optional[str]:
+    """
+    Selector to use on a region soup (the listing fragments are its top level)
+
+    Args:
+        listing_selector: CSS selector configured for the source
+
+    Returns:
+        Selector string or None if the selector can't be restricted
+    """
+    matchers = build_matchers(listing_selector)
+    if not matchers:
+        return None
+    return ', '.join(f"body > {m.selector}" for m in matchers)
+
+
+def sniff_encoding(head: bytes) -> str:
+    """
+    Detect document encoding from a meta charset declaration
+
+    Args:
+        head: First bytes of the document
+
+    Returns:
+        Declared encoding or 'utf-8'
+    """
+    match = _CHARSET_RE.search(head[:4096])
+    if match:
+        encoding = match.group(1).decode('ascii', 'ignore')
+        try:
+            codecs.lookup(encoding)
+            return encoding
+        except LookupError:
+            pass
+    return 'utf-8'
+
+
+def extract_region(
+    chunks: Iterable[bytes],
+    listing_selector: str,
+    idle_limit: int = DEFAULT_IDLE_LIMIT,
+    stats: Optional[Dict[str, Any]] = None,
+    encoding: Optional[str] = None
+) -> Optional[str]:
+    """
+    Stream HTML chunks and return only the listing subtrees
+
+    Args:
+        chunks: Iterable of raw HTML byte chunks (e.g. response.iter_content())
+        listing_selector: CSS selector configured for the source
+        idle_limit: Elements seen after the last listing before stopping early
+        stats: Optional dict that receives bytes_read, listings and stopped_early
+        encoding: Document encoding (default: sniffed from the first chunk)
+
+    Returns:
+        HTML string with the listing fragments or None if the selector can't
+        be restricted (caller should fall back to full parsing)
+    """
+    matchers = build_matchers(listing_selector)
+    if not matchers:
+        return None
+
+    parser = None
+    fragments = []
+    current = None  # Listing element currently being built
+    idle = 0
+    bytes_read = 0
+    stopped_early = False
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        bytes_read += len(chunk)
+        if parser is None:
+            parser = etree.HTMLPullParser(events=('start', 'end'), encoding=encoding or sniff_encoding(chunk))
+        parser.feed(chunk)
+
+        for event, element in parser.read_events():
+            if event == 'start':
+                if current is None and any(m.matches(element) for m in matchers):
+                    current = element
+                elif current is None and fragments:
+                    idle += 1
+                continue
+
+            # 'end' event
+            if element is current:
+                fragments.append(etree.tostring(element, encoding='unicode', method='html', with_tail=False))
+                current = None
+                idle = 0
+                element.clear()
+            elif current is None:
+                # Outside any listing - free memory as soon as the element closed
+                element.clear()
+                parent = element.getparent()
+                if parent is not None:
+                    while element.getprevious() is not None:
+                        del parent[0]
+
+        if fragments and current is None and idle >= idle_limit:
+            stopped_early = True
+            break
+
+    if parser is not None and not stopped_early:
+        try:
+            parser.close()
+        except etree.XMLSyntaxError:
+            pass  # Empty or truncated document
+
+    if stats is not None:
+        stats.update({
+            'bytes_read': bytes_read,
+            'listings': len(fragments),
+            'stopped_early': stopped_early
+        })
+
+    return '<html><body>' + ''.join(fragments) + '</body></html>'
+
+
+def parse_region(
+    chunks: Iterable[bytes],
+    listing_selector: str,
+    idle_limit: int = DEFAULT_IDLE_LIMIT,
+    stats: Optional[Dict[str, Any]] = None,
+    encoding: Optional[str] = None
+) -> Optional[BeautifulSoup]:
+    """
+    Stream HTML chunks into a BeautifulSoup object holding only the listings
+
+    Args:
+        chunks: Iterable of raw HTML byte chunks
+        listing_selector: CSS selector configured for the source
+        idle_limit: Elements seen after the last listing before stopping early
+        stats: Optional dict that receives parse statistics
+        encoding: Document encoding (default: sniffed from the first chunk)
+
+    Returns:
+        BeautifulSoup object or None if the selector can't be restricted
+    """
+    html = extract_region(chunks, listing_selector, idle_limit, stats, encoding)
+    if html is None:
+        return None
+    return BeautifulSoup(html, 'lxml')
+
+
+def compare_parse_modes(raw: bytes, listing_selector: str, chunk_size: int = 65536) -> Dict[str, Any]:
+    """
+    Measure parse time and peak memory of full vs region-restricted parsing
+
+    Args:
+        raw: Raw HTML of a recorded search result page
+        listing_selector: CSS selector configured for the source
+        chunk_size: Chunk size used to simulate streaming
+
+    Returns:
+        Dict with seconds, peak_bytes and listings for 'full' and 'region'
+    """
+    def measure(fn):
+        tracemalloc.start()
+        start = time.perf_counter()
+        count = fn()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {'seconds': elapsed, 'peak_bytes': peak, 'listings': count}
+
+    def full():
+        return len(BeautifulSoup(raw, 'lxml').select(listing_selector))
+
+    def region():
+        chunks = (raw[i:i + chunk_size] for i in range(0, len(raw), chunk_size))
+        soup = parse_region(chunks, listing_selector)
+        if soup is None:
+            return 0
+        return len(soup.select(region_selector(listing_selector)))
+
+    return {
+        'bytes': len(raw),
+        'full': measure(full),
+        'region': measure(region)
+    }
@@ -0,0 +1,127 @@
+"""
+Cache of loaded scrapers for long-running processes
+Keeps HTTP sessions and browsers warm between runs. A scraper is rebuilt only
+when a field it is built from changed (run statistics like error_count don't
+count), and closed when its source is gone.
+Scrapers load outside the cache lock (one future per source), so a Chrome
+starting for one source doesn't hold up threads asking for another.
+"""
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, Iterable, Tuple
+from .base_scraper import BaseScraper
+from .generic_scraper import CustomScraperLoader
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Source fields scrapers are built from (compared case-insensitively - rows use
+# lowercase columns, scrapers read capitalized keys)
+SCRAPER_CONFIG_FIELDS = (
+    'name', 'type', 'url', 'domain', 'scraper_type', 'custom_scraper', 'rate_limit_seconds', 'max_pages',
+    'search_url_template', 'listing_selector', 'title_selector', 'price_selector', 'link_selector',
+    'image_selector', 'sold_selector', 'sold_keywords', 'requires_auth', 'auth_username_env', 'auth_password_env'
+)
+
+
+def scraper_config_key(source_config: Dict[str, Any]) -> Tuple:
+    """
+    Fields of a source configuration that affect its scraper
+
+    Args:
+        source_config: Source configuration
+
+    Returns:
+        Comparable tuple of the scraper-relevant values
+    """
+    values = {key.lower(): value for key, value in source_config.items()}
+    return tuple(values.get(field) for field in SCRAPER_CONFIG_FIELDS)
+
+
+class ScraperCache:
+    """Scrapers keyed by source ID"""
+
+    def __init__(self):
+        """Initialize empty cache"""
+        self._scrapers: Dict[str, Tuple[Tuple, Future]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, source_config: Dict[str, Any]) -> BaseScraper:
+        """
+        Get scraper for a source, loading it on first use or config change
+
+        Threads asking for a scraper that is still loading wait for that load
+        instead of starting another one.
+
+        Args:
+            source_config: Source configuration
+
+        Returns:
+            Scraper instance
+
+        Raises:
+            Exception of the failed load (the next call loads again)
+        """
+        key = source_config.get('id') or source_config.get('name')
+        config_key = scraper_config_key(source_config)
+        stale = None
+
+        with self._lock:
+            cached = self._scrapers.get(key)
+            if cached and cached[0] == config_key:
+                return cached[1].result()
+
+            if cached:
+                logger.info(f"Source config of {source_config.get('name')} changed - reloading scraper")
+                stale = cached[1]
+            future = Future()
+            self._scrapers[key] = (config_key, future)
+
+        if stale is not None:
+            self._close_when_loaded(stale)
+
+        try:
+            future.set_result(CustomScraperLoader.load_scraper(source_config))
+        except Exception as e:
+            with self._lock:
+                if self._scrapers.get(key, (None, None))[1] is future:
+                    del self._scrapers[key]
+            future.set_exception(e)
+        return future.result()
+
+    def prune(self, active_sources: Iterable[Dict[str, Any]]):
+        """
+        Close scrapers of sources that are no longer active
+
+        Args:
+            active_sources: Currently active source configurations
+        """
+        keep = {s.get('id') or s.get('name') for s in active_sources}
+        with self._lock:
+            removed = [self._scrapers.pop(k)[1] for k in list(self._scrapers) if k not in keep]
+        for future in removed:
+            self._close_when_loaded(future)
+
+    def close_all(self):
+        """Close all scrapers"""
+        with self._lock:
+            removed = [future for _, future in self._scrapers.values()]
+            self._scrapers.clear()
+        for future in removed:
+            self._close_when_loaded(future)
+
+    def __len__(self) -> int:
+        return len(self._scrapers)
+
+    @classmethod
+    def _close_when_loaded(cls, future: Future):
+        """Close a cached scraper now, or once its load finishes"""
+        future.add_done_callback(lambda f: f.exception() is None and cls._close(f.result()))
+
+    @staticmethod
+    def _close(scraper: BaseScraper):
+        """Close a scraper, ignoring errors"""
+        try:
+            scraper.close_driver()
+        except Exception as e:
+            logger.warning(f"Closing scraper failed: {e}")
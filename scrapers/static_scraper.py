@@ -1,14 +1,50 @@
 """
 Static scraper using BeautifulSoup for simple HTML pages
 """
+import itertools
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import requests
 from bs4 import BeautifulSoup
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from utils.logger import get_logger
 from utils.rate_limiter import RateLimiter
+from utils.adaptive_rate import get_rate_controller, looks_blocked, parse_retry_after
+from utils.deadline import Deadline, bounded_timeout
+from utils.latency import get_latency_tracker
+from utils.sold_detector import SoldDetector
+from .region_parser import extract_region, build_matchers
 
 logger = get_logger(__name__)
 
+# Statuses that say a listing page is gone - anything else non-200 is inconclusive
+GONE_STATUS_CODES = {404, 410}
+
+
+class BlockedError(requests.RequestException):
+    """Response was a captcha or bot-protection page"""
+
+
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+_hedge_executor_lock = threading.Lock()
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    """Threads running hedged request pairs (shared by all static scrapers)"""
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='hedge')
+        return _hedge_executor
+
+
+def _close_response(future):
+    """Release the connection of a request that lost the hedge race"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
 
 class StaticScraper:
     """Scraper for static HTML pages using requests + BeautifulSoup"""
@@ -22,18 +58,151 @@ class StaticScraper:
             rate_limit: Seconds between requests
         """
         self.domain = domain
+        self.rate_limit = rate_limit
         self.rate_limiter = RateLimiter(default_delay=rate_limit)
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.rate_control = get_rate_controller()
+        self.rate_control.configure(domain, rate_limit)
+        self.latency = get_latency_tracker()
+        self.hedging = os.getenv('HEDGE_REQUESTS', 'false').lower() == 'true'
+        self.session = self._new_session()
+        self._hedge_session = None
+
+    @staticmethod
+    def _new_session() -> requests.Session:
+        """Create HTTP session with default headers"""
+        session = requests.Session()
+        session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
         })
+        return session
+
+    def _request(self, method: str, url: str, timeout: float = 30,
+                 deadline: Optional[Deadline] = None, **kwargs) -> requests.Response:
+        """
+        Send rate-limited request and feed the outcome to adaptive rate control
+
+        Args:
+            method: HTTP method
+            url: URL to request
+            timeout: Request timeout without a deadline
+            deadline: Optional time budget capping the timeout
+            **kwargs: Arguments for requests (stream, allow_redirects, ...)
+
+        Returns:
+            Response object
+
+        Raises:
+            BlockedError if a captcha / block page was returned
+            DeadlineExceeded if the time budget was used up
+            requests.RequestException on failure
+        """
+        bounded_timeout(deadline, timeout)
+        self.rate_limiter.wait(self.domain, self.rate_control.current_delay(self.domain, self.rate_limit))
+
+        # Rate limiting may have eaten into the budget
+        timeout = bounded_timeout(deadline, timeout)
+        hedge_after = self._hedge_after(method)
+
+        start = time.monotonic()
+        try:
+            if hedge_after is None:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            else:
+                response = self._hedged_get(url, timeout, hedge_after, **kwargs)
+        except (requests.Timeout, requests.ConnectionError):
+            self.rate_control.record(self.domain, None, time.monotonic() - start)
+            raise
+
+        self.latency.record(self.domain, time.monotonic() - start)
+
+        # Streamed bodies are checked by their consumer
+        blocked = method == 'GET' and not kwargs.get('stream') and looks_blocked(response.content, response.status_code)
+
+        self.rate_control.record(
+            self.domain,
+            response.status_code,
+            time.monotonic() - start,
+            retry_after=parse_retry_after(response.headers.get('Retry-After')),
+            blocked=blocked
+        )
+
+        if blocked:
+            raise BlockedError(f"Block page returned for {url}")
+
+        return response
+
+    def _hedge_after(self, method: str) -> Optional[float]:
+        """
+        Seconds after which a duplicate request is sent
+
+        Returns:
+            p95 latency of the domain, or None if hedging doesn't apply
+        """
+        if not self.hedging or method != 'GET':
+            return None
+        return self.latency.percentile(self.domain, 95, min_samples=20)
+
+    def _hedged_get(self, url: str, timeout: float, hedge_after: float, **kwargs) -> requests.Response:
+        """
+        GET with a duplicate request once the first exceeds hedge_after
+
+        Both requests stream, so the loser's body is never downloaded - its
+        connection is released as soon as it returns. The duplicate is only
+        sent if the domain's rate limit has a free slot right now.
+
+        Args:
+            url: URL to fetch
+            timeout: Request timeout
+            hedge_after: Seconds to wait for the first request
+            **kwargs: Arguments for requests
+
+        Returns:
+            Response of whichever request finished first successfully
+        """
+        executor = _get_hedge_executor()
+        stream = kwargs.pop('stream', False)
+
+        primary = executor.submit(self.session.request, 'GET', url, timeout=timeout, stream=True, **kwargs)
+        pending = {primary}
+
+        done, _ = wait(pending, timeout=hedge_after)
+        if not done and self.rate_limiter.registry.try_reserve(self.domain):
+            if self._hedge_session is None:
+                self._hedge_session = self._new_session()
+            self.latency.count(self.domain, 'hedges_sent')
+            pending.add(executor.submit(self._hedge_session.request, 'GET', url, timeout=timeout, stream=True, **kwargs))
+
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((f for f in done if f.exception() is None), None)
+
+            if winner is None:
+                error = next(iter(done)).exception()
+                continue
+
+            # Cancel stragglers cleanly
+            for future in pending | (done - {winner}):
+                future.cancel()
+                future.add_done_callback(_close_response)
 
-    def fetch_page(self, url: str) -> BeautifulSoup:
+            if winner is not primary:
+                self.latency.count(self.domain, 'hedges_won')
+
+            response = winner.result()
+            if not stream:
+                response.content  # Read body now, like a non-streamed request
+            return response
+
+        raise error
+
+    def fetch_page(self, url: str, deadline: Optional[Deadline] = None) -> BeautifulSoup:
         """
         Fetch page and return BeautifulSoup object
 
         Args:
             url: URL to fetch
+            deadline: Optional time budget
 
         Returns:
             BeautifulSoup object
@@ -41,30 +210,130 @@ class StaticScraper:
         Raises:
             requests.RequestException on failure
         """
-        self.rate_limiter.wait(self.domain)
-
-        response = self.session.get(url, timeout=30)
+        response = self._request('GET', url, timeout=30, deadline=deadline)
         response.raise_for_status()
 
         return BeautifulSoup(response.content, 'lxml')
 
-    def check_availability(self, url: str) -> bool:
+    def fetch_raw(self, url: str, deadline: Optional[Deadline] = None) -> bytes:
+        """
+        Fetch page and return the undecoded body
+
+        Args:
+            url: URL to fetch
+            deadline: Optional time budget
+
+        Returns:
+            Raw response bytes
+
+        Raises:
+            requests.RequestException on failure
+        """
+        response = self._request('GET', url, timeout=30, deadline=deadline)
+        response.raise_for_status()
+
+        return response.content
+
+    def fetch_region(self, url: str, listing_selector: str, deadline: Optional[Deadline] = None) -> BeautifulSoup:
         """
-        Check if URL is still accessible
+        Fetch page and parse only the subtrees matching listing_selector
+
+        The body is streamed and parsing stops once the result region has
+        ended. Falls back to full parsing if the selector can't be restricted.
+
+        Args:
+            url: URL to fetch
+            listing_selector: CSS selector of a single listing
+            deadline: Optional time budget
+
+        Returns:
+            BeautifulSoup object (listing fragments only, or the full page)
+
+        Raises:
+            requests.RequestException on failure
+        """
+        html = self.fetch_region_html(url, listing_selector, deadline)
+        if html is None:
+            return self.fetch_page(url, deadline)
+
+        return BeautifulSoup(html, 'lxml')
+
+    def fetch_region_html(self, url: str, listing_selector: str, deadline: Optional[Deadline] = None) -> Optional[str]:
+        """
+        Stream a page and keep only the subtrees matching listing_selector
+
+        Args:
+            url: URL to fetch
+            listing_selector: CSS selector of a single listing
+            deadline: Optional time budget
+
+        Returns:
+            HTML of the listing fragments, or None if the selector can't be
+            restricted (nothing is fetched then)
+
+        Raises:
+            requests.RequestException on failure
+        """
+        if not build_matchers(listing_selector):
+            return None
+
+        stats = {}
+        with self._request('GET', url, timeout=30, deadline=deadline, stream=True) as response:
+            response.raise_for_status()
+            html = extract_region(response.iter_content(chunk_size=65536), listing_selector, stats=stats)
+
+        logger.debug(
+            f"Region parse {url}: {stats.get('listings', 0)} listings, "
+            f"{stats.get('bytes_read', 0)} bytes read, stopped early: {stats.get('stopped_early')}"
+        )
+        return html
+
+    def check_availability(self, url: str, detector: Optional[SoldDetector] = None) -> Optional[bool]:
+        """
+        Check if a listing is still available
+
+        The page is streamed and scanned for sold markers; reading stops at
+        the first decisive one (sold badge, schema.org availability).
 
         Args:
             url: URL to check
+            detector: Sold markers of the source (default: generic markers)
 
         Returns:
-            True if page loads successfully (status 200)
+            False if the page is gone (404/410) or marked sold, None if the
+            check failed (429, 5xx, block page, timeouts - the listing is
+            checked again)
         """
+        detector = detector or SoldDetector()
         try:
-            self.rate_limiter.wait(self.domain)
-            response = self.session.head(url, timeout=10, allow_redirects=True)
-            return response.status_code == 200
-        except Exception:
-            return False
+            with self._request('GET', url, timeout=10, stream=True) as response:
+                if response.status_code in GONE_STATUS_CODES:
+                    return False
+                if response.status_code != 200:
+                    logger.warning(f"Status {response.status_code} while checking {url} - result unknown")
+                    return None
+
+                chunks = response.iter_content(chunk_size=16384)
+                first = next(chunks, b'')
+                if looks_blocked(first):
+                    # A captcha says nothing about the listing - keep its sold-inference evidence
+                    logger.warning(f"Block page while checking {url} - result unknown")
+                    return None
+
+                stats = {}
+                sold = detector.scan(itertools.chain([first], chunks), stats=stats)
+
+            logger.debug(
+                f"Sold scan {url}: {stats.get('signal')}, {stats.get('bytes_read', 0)} bytes read, "
+                f"stopped early: {stats.get('stopped_early')}"
+            )
+            return not sold
+        except Exception as e:
+            logger.warning(f"Could not check {url}: {e}")
+            return None
 
     def close(self):
         """Close session"""
         self.session.close()
+        if self._hedge_session is not None:
+            self._hedge_session.close()
@@ -0,0 +1,299 @@
+"""
+Distributed search via the Postgres work queue
+  python search_queue.py coordinator   # Enqueue due searches, wait, email and log the run
+  python search_queue.py worker        # Claim and run search tasks (start on any number of nodes)
+Requires migrations/004_work_queue.sql and WORK_QUEUE_URL (or POSTGRES_URL).
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Any, List, Tuple
+from dotenv import load_dotenv
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.supabase_client import SupabaseClient
+from core.dedup import DuplicateDetector
+from core.email_sender import EmailSender
+from core.scheduler import BudgetScheduler
+from core.work_queue import WorkQueue, Heartbeat
+from scrapers import ScraperCache
+from scrapers.listing_parser import shutdown_parse_pool
+from utils import setup_logger
+from utils.circuit_breaker import CircuitBreaker
+from utils.run_lock import RunLock
+from watch_searcher import WatchSearcher
+
+# Load environment variables
+load_dotenv()
+
+# Setup logging
+logger = setup_logger('search_queue', 'watch_service.log')
+
+HEARTBEAT_SECONDS = float(os.getenv('WORK_QUEUE_HEARTBEAT', '15'))
+HEARTBEAT_TIMEOUT = float(os.getenv('WORK_QUEUE_HEARTBEAT_TIMEOUT', '120'))
+# Breaker states of other workers are picked up this often
+HEALTH_REFRESH_SECONDS = float(os.getenv('WORK_QUEUE_HEALTH_REFRESH', '60'))
+
+
+def run_coordinator():
+    """Enqueue due (source, criteria) searches and wait for workers to finish them"""
+    lock = RunLock('watch_searcher')
+    if not lock.acquire():
+        logger.warning("⏭️  Previous search run still active - skipping this run")
+        return
+
+    db = SupabaseClient()
+    queue = WorkQueue()
+    run_id = str(uuid.uuid4())
+    start = datetime.now()
+    stats = {'sources_checked': 0, 'sources_failed': 0, 'listings_found': 0, 'listings_saved': 0,
+             'duplicates_skipped': 0, 'duration_seconds': 0, 'status': 'Success'}
+
+    try:
+        sources = db.get_active_sources()
+        criteria_list = db.get_search_criteria()
+        if not sources or not criteria_list:
+            logger.warning("No active sources or search criteria configured in database")
+            return
+
+        scheduler = BudgetScheduler()
+        plan = scheduler.plan(sources, criteria_list)
+        queue.register_domains(sources)
+        enqueued = queue.enqueue(run_id, [
+            {'source': item.source, 'criteria': item.criteria, 'priority': rank}
+            for rank, item in enumerate(plan)
+        ])
+        logger.info(f"📋 Run {run_id}: enqueued {enqueued} searches ({scheduler.not_due} not due)")
+
+        # Wait for workers, requeueing tasks of crashed ones
+        while True:
+            queue.requeue_stale(HEARTBEAT_TIMEOUT)
+            status = queue.run_status(run_id)
+            if not status.get('queued') and not status.get('running'):
+                break
+            if scheduler.exhausted():
+                cancelled = queue.cancel_run(run_id)
+                logger.warning(f"⏳ Run budget used up - cancelled {len(cancelled)} queued tasks")
+                break
+            time.sleep(5)
+
+        # Workers may still finish running tasks - give them until the reserve is used
+        while queue.run_status(run_id).get('running') and scheduler.deadline.remaining() > 0:
+            time.sleep(5)
+
+        items = {item.key: item for item in plan}
+        new_listings, price_drops = _collect_results(queue, run_id, items, scheduler, stats)
+        # Workers only see their own listings - the same watch may come from two of them
+        new_listings = DuplicateDetector().unique(new_listings)
+
+        if new_listings:
+            logger.info(f"📧 Sending email with {len(new_listings)} new listings")
+            EmailSender().send_new_watches_email(new_listings)
+        if price_drops:
+            logger.info(f"📧 Sending email with {len(price_drops)} price drops")
+            EmailSender().send_price_drops_email(price_drops)
+
+        stats['duration_seconds'] = int((datetime.now() - start).total_seconds())
+        db.log_search_run(stats)
+        logger.info(f"✅ Run {run_id}: {stats['listings_found']} found, {stats['listings_saved']} saved")
+
+    except Exception as e:
+        logger.error(f"💥 Fatal error: {e}", exc_info=True)
+        stats['status'] = 'Failed'
+        stats['error_message'] = str(e)
+        db.log_search_run(stats)
+        raise
+
+    finally:
+        queue.close()
+        lock.release()
+
+
+def _collect_results(
+    queue: WorkQueue,
+    run_id: str,
+    items: Dict[Tuple[str, str], Any],
+    scheduler: BudgetScheduler,
+    stats: Dict[str, Any]
+) -> Tuple[list, list]:
+    """Aggregate task results into run stats and scheduler history (returns new listings, price drops)"""
+    pairs: Dict[Tuple[str, str], Dict[str, float]] = {}
+    new_listings = []
+    price_drops = []
+    sources_seen, sources_failed = set(), set()
+    incomplete = set()
+
+    for row in queue.run_results(run_id):
+        key = (row['source_id'], row['criteria_id'])
+        if row['status'] == 'cancelled':
+            if row['page'] == 1 and key in items:
+                scheduler.defer(items[key])
+            incomplete.add(key)
+            continue
+
+        sources_seen.add(row['source_id'])
+        if row['status'] == 'failed':
+            sources_failed.add(row['source_id'])
+            incomplete.add(key)
+            continue
+
+        result = row['result'] or {}
+        pair = pairs.setdefault(key, {'saved': 0, 'seconds': 0.0})
+        pair['saved'] += result.get('listings_saved', 0)
+        pair['seconds'] += float(row['seconds'] or 0)
+        stats['listings_found'] += result.get('listings_found', 0)
+        stats['listings_saved'] += result.get('listings_saved', 0)
+        new_listings.extend(result.get('listings', []))
+        price_drops.extend(result.get('price_drops', []))
+
+    # Pairs with a failed or cancelled page didn't complete - they'd count as (nearly) empty
+    for key, pair in pairs.items():
+        if key in items and key not in incomplete:
+            scheduler.record(items[key], int(pair['saved']), pair['seconds'])
+
+    stats['sources_checked'] = len(sources_seen)
+    stats['sources_failed'] = len(sources_failed)
+    stats['searches_deferred'] = len(scheduler.deferred)
+    return new_listings, price_drops
+
+
+def run_worker(drain: bool = False):
+    """
+    Claim and run search tasks until SIGTERM
+
+    Args:
+        drain: Exit once no task is claimable instead of polling
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+
+    db = SupabaseClient()
+    queue = WorkQueue()
+    scrapers = ScraperCache()
+    url_hashes = set(db.get_existing_url_hashes())
+    # Email is sent once per run by the coordinator - the searcher only extracts and saves
+    searcher = WatchSearcher(db=db, scrapers=scrapers, url_hashes=url_hashes)
+    heartbeat = Heartbeat(queue.connection_string, worker_id, HEARTBEAT_SECONDS)
+    poll_seconds = float(os.getenv('WORK_QUEUE_POLL_SECONDS', '2'))
+    breakers: Dict[str, CircuitBreaker] = {}
+    health_loaded_at = None
+
+    logger.info(f"👷 Worker {worker_id} started")
+
+    try:
+        while not stop_event.is_set():
+            if health_loaded_at is None or time.monotonic() - health_loaded_at > HEALTH_REFRESH_SECONDS:
+                breakers = _load_breakers(db)
+                health_loaded_at = time.monotonic()
+
+            # Sources with an open circuit are left to their probe time
+            task = queue.claim(worker_id, skip_sources=_open_circuits(breakers))
+            if task is None:
+                if drain:
+                    break
+                stop_event.wait(poll_seconds)
+                continue
+            _run_task(queue, task, worker_id, searcher, heartbeat, breakers)
+
+    finally:
+        heartbeat.close()
+        searcher.market.flush()
+        searcher.close()
+        scrapers.close_all()
+        shutdown_parse_pool()
+        queue.close()
+        logger.info(f"👷 Worker {worker_id} stopped")
+
+
+def _load_breakers(db: SupabaseClient) -> Dict[str, CircuitBreaker]:
+    """Circuit breakers of all sources from watch_source_health"""
+    return {source_id: CircuitBreaker(source_id, health) for source_id, health in db.get_source_health().items()}
+
+
+def _open_circuits(breakers: Dict[str, CircuitBreaker]) -> List[str]:
+    """Source IDs whose circuit is open and not yet due for a probe"""
+    return [source_id for source_id, breaker in breakers.items() if breaker.should_skip()]
+
+
+def _run_task(
+    queue: WorkQueue,
+    task: Dict,
+    worker_id: str,
+    searcher: WatchSearcher,
+    heartbeat: Heartbeat,
+    breakers: Dict[str, CircuitBreaker]
+):
+    """Fetch one result page, extract and save its listings, report the result"""
+    source = task['payload']['source']
+    criteria = task['payload']['criteria']
+    page = task['page']
+    source_id = source.get('id')
+    breaker = breakers.setdefault(source_id, CircuitBreaker(source_id))
+    heartbeat.track(task['id'])
+    # Only this task's listings go into its result
+    searcher.reset_results()
+
+    try:
+        logger.info(f"🌐 {source.get('name')} / {criteria.get('manufacturer')} {criteria.get('model')} page {page}")
+        scraper = searcher.scrapers.get(source)
+        scraper.breaker = breaker
+        findings = scraper.search_page(criteria, page)
+
+        found_before = searcher.stats['listings_found']
+        searcher.prices.run_id = task.get('run_id')
+        saved = searcher.process_page(criteria, findings, searcher.url_hashes) if findings else []
+        # Drops are emailed by the coordinator too
+        price_drops, searcher.prices.drops = searcher.prices.drops, []
+
+        if heartbeat.lost:
+            return
+        if queue.complete(task, worker_id, {
+            'listings_found': searcher.stats['listings_found'] - found_before,
+            'listings_saved': len(saved),
+            'listings': saved,
+            'price_drops': price_drops,
+        }, next_page=bool(findings) and scraper.has_next_page(page)):
+            # The coordinator emails them with the run
+            searcher.mark_notified()
+
+    except Exception as e:
+        logger.error(f"  ❌ Task {task['id']} failed: {e}")
+        queue.fail(task, worker_id, str(e))
+
+    finally:
+        heartbeat.release()
+        # Other workers pick the state up on their next refresh
+        searcher.db.save_source_health(breaker.to_dict())
+
+
+def main():
+    """Entry point"""
+    parser = argparse.ArgumentParser(description='Distributed watch search')
+    subparsers = parser.add_subparsers(dest='role', required=True)
+    subparsers.add_parser('coordinator', help='Enqueue due searches and wait for results')
+    worker = subparsers.add_parser('worker', help='Claim and run search tasks')
+    worker.add_argument('--drain', action='store_true', help='Exit when the queue is empty')
+    args = parser.parse_args()
+
+    try:
+        if args.role == 'coordinator':
+            run_coordinator()
+        else:
+            run_worker(drain=args.drain)
+    except Exception as e:
+        logger.error(f"Fatal error: {e}", exc_info=True)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Test of the daemon's scraper cache
+Scrapers must survive run statistics being written back to their source row
+(update_source_stats after every run) and be rebuilt only when a field they
+are built from changed. No network access - scrapers are constructed, not used.
+Usage: python test_scraper_cache.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from scrapers import ScraperCache
+
+
+def check(condition: bool, message: str):
+    """Print a check result, abort on failure"""
+    print(f"{'✅' if condition else '❌'} {message}")
+    if not condition:
+        raise AssertionError(message)
+
+
+def source_row(**changes) -> dict:
+    """Source row as returned by get_active_sources() (select('*'))"""
+    row = {
+        'id': '00000000-0000-0000-0000-000000000001',
+        'name': 'Example Dealer',
+        'url': 'https://example.com',
+        'domain': 'example.com',
+        'type': 'Dealer',
+        'scraper_type': 'Static',
+        'active': True,
+        'rate_limit_seconds': 2,
+        'search_url_template': 'https://example.com/search?q={manufacturer}+{model}',
+        'listing_selector': '.product',
+        'title_selector': '.title',
+        'price_selector': '.price',
+        'link_selector': 'a',
+        'last_successful_scrape': '2026-10-19T10:00:00',
+        'error_count': 0,
+        'updated_at': '2026-10-19T10:00:00',
+    }
+    row.update(changes)
+    return row
+
+
+def test_scraper_cache():
+    """Run the test"""
+    cache = ScraperCache()
+    try:
+        scraper = cache.get(source_row())
+        check(cache.get(source_row()) is scraper, "unchanged row returns the cached scraper")
+
+        bumped = source_row(last_successful_scrape='2026-10-19T11:00:00', error_count=3,
+                            updated_at='2026-10-19T11:00:00')
+        check(cache.get(bumped) is scraper, "run statistics don't rebuild the scraper")
+        check(len(cache) == 1, "one scraper per source")
+
+        changed = cache.get(source_row(listing_selector='.result'))
+        check(changed is not scraper, "a changed selector rebuilds the scraper")
+        check(cache.get(source_row(listing_selector='.result', error_count=1)) is changed,
+              "the rebuilt scraper is cached in turn")
+
+        cache.prune([])
+        check(len(cache) == 0, "pruned sources are dropped")
+
+        print("\n✅ Scraper cache works")
+        return True
+
+    finally:
+        cache.close_all()
+
+
+if __name__ == '__main__':
+    sys.exit(0 if test_scraper_cache() else 1)
@@ -0,0 +1,66 @@
+"""
+Test of searching one source for one criteria
+A custom scraper may return an empty result page (nothing matched) - that is
+an empty search, not a failure of the source. No network or database access -
+services are stand-ins, the pipeline store is a temporary file.
+Usage: python test_search_pair.py
+"""
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.pipeline_state import PipelineStore
+from scrapers.base_scraper import BaseScraper
+from watch_searcher import WatchSearcher
+
+
+def check(condition: bool, message: str):
+    """Print a check result, abort on failure"""
+    print(f"{'✅' if condition else '❌'} {message}")
+    if not condition:
+        raise AssertionError(message)
+
+
+class EmptyScraper(BaseScraper):
+    """Custom scraper whose search matches nothing"""
+
+    def search(self, criteria):
+        return []
+
+    def check_availability(self, url):
+        return None
+
+
+def test_search_pair():
+    """Run the test"""
+    os.environ['IMAGE_HASHING'] = 'false'
+    crawls = []
+    db = SimpleNamespace(record_crawl=lambda *args: crawls.append(args) or 0)
+    scraper = EmptyScraper({'Name': 'Example Dealer'})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        searcher = WatchSearcher(
+            db=db, openai=object(), email=object(),
+            scrapers=SimpleNamespace(get=lambda source_config: scraper),
+            pipeline=PipelineStore(os.path.join(tmp, 'pipeline_state.db'))
+        )
+        source_run = searcher._open_source({'id': 'source-1', 'name': 'Example Dealer'})
+        check(source_run is not None, "source opened")
+
+        saved = searcher._search_pair(source_run, {'id': 'criteria-1'}, set())
+        check(saved == 0, "empty page saves nothing and is not a failed search")
+        check(not source_run['failed'], "source is not marked failed")
+        check(searcher.stats['sources_failed'] == 0, "no failed source counted")
+        check(0 not in source_run['breaker'].window, "no breaker failure recorded")
+        check(source_run['raw'] == 0, "no raw findings counted")
+        check(not crawls, "no crawl recorded without seen listings")
+
+        print("\n✅ Empty result pages are handled")
+        return True
+
+
+if __name__ == '__main__':
+    sys.exit(0 if test_search_pair() else 1)
@@ -0,0 +1,152 @@
+"""
+Smoke test of the work queue SQL against a real Postgres
+Runs migrations/004_work_queue.sql in a throwaway schema and exercises
+claiming, domain leases, circuit skips, paging, retries, stale requeueing and
+cancellation. Nothing outside the schema is touched; it is dropped at the end.
+Usage: WORK_QUEUE_URL=postgresql://... python test_work_queue.py
+"""
+import os
+import sys
+import time
+import uuid
+from dotenv import load_dotenv
+from psycopg2.extensions import make_dsn
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.work_queue import WorkQueue, Heartbeat
+
+load_dotenv()
+
+MIGRATION = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations', '004_work_queue.sql')
+
+
+def check(condition: bool, message: str):
+    """Print a check result, abort on failure"""
+    print(f"{'✅' if condition else '❌'} {message}")
+    if not condition:
+        raise AssertionError(message)
+
+
+def setup_schema(dsn: str, schema: str) -> str:
+    """
+    Create the queue tables and their referenced tables in a fresh schema
+
+    Returns:
+        DSN whose connections use the schema
+    """
+    queue = WorkQueue(dsn)
+    try:
+        with queue.conn, queue.conn.cursor() as cursor:
+            cursor.execute(f'CREATE SCHEMA {schema}')
+            cursor.execute(f'SET search_path TO {schema}')
+            cursor.execute('CREATE TABLE watch_sources (id UUID PRIMARY KEY)')
+            cursor.execute('CREATE TABLE watch_search_criteria (id UUID PRIMARY KEY)')
+            with open(MIGRATION) as f:
+                cursor.execute(f.read())
+    finally:
+        queue.close()
+    return make_dsn(dsn, options=f'-c search_path={schema}')
+
+
+def insert_ids(queue: WorkQueue, table: str, count: int) -> list:
+    """Insert rows with random UUIDs"""
+    ids = [str(uuid.uuid4()) for _ in range(count)]
+    with queue.conn, queue.conn.cursor() as cursor:
+        for row_id in ids:
+            cursor.execute(f'INSERT INTO {table} (id) VALUES (%s)', (row_id,))
+    return ids
+
+
+def test_work_queue():
+    """Run the smoke test"""
+    os.environ.setdefault('WORK_QUEUE_RETRY_SECONDS', '0')
+    dsn = os.getenv('WORK_QUEUE_URL') or os.getenv('POSTGRES_URL_NON_POOLING') or os.getenv('POSTGRES_URL')
+    if not dsn:
+        print("❌ Set WORK_QUEUE_URL (or POSTGRES_URL) to a database the test may create a schema in")
+        return False
+    schema = f"work_queue_smoke_{os.getpid()}"
+    queue = other = None
+
+    try:
+        schema_dsn = setup_schema(dsn, schema)
+        queue, other = WorkQueue(schema_dsn), WorkQueue(schema_dsn)
+        print(f"Schema {schema} created")
+
+        a, b = insert_ids(queue, 'watch_sources', 2)
+        criteria = insert_ids(queue, 'watch_search_criteria', 2)
+        sources = [
+            {'id': a, 'name': 'A', 'domain': 'a.example', 'rate_limit_seconds': 60},
+            {'id': b, 'name': 'B', 'domain': 'b.example', 'rate_limit_seconds': 0.1}
+        ]
+        queue.register_domains(sources)
+
+        run_id = str(uuid.uuid4())
+        items = [{'source': s, 'criteria': {'id': c}, 'priority': rank}
+                 for rank, (s, c) in enumerate((s, c) for s in sources for c in criteria)]
+        check(queue.enqueue(run_id, items) == 4, "enqueue creates one task per pair")
+        check(queue.enqueue(run_id, items) == 0, "enqueue is idempotent per run")
+
+        # Domain lease: one request per interval on a.example across workers
+        first = queue.claim('w1')
+        check(first is not None and first['source_id'] == a, "claim takes the highest priority task")
+        second = other.claim('w2')
+        check(second is not None and second['source_id'] == b, "a held domain lease is skipped")
+
+        # Circuit skip
+        check(queue.claim('w1', skip_sources=[b]) is None, "skipped sources are not claimed")
+
+        # Heartbeat and completion with next page
+        check(queue.heartbeat(first['id'], 'w1'), "heartbeat extends a held task")
+        check(not queue.heartbeat(first['id'], 'w2'), "heartbeat of another worker is rejected")
+        check(queue.complete(first, 'w1', {'listings_saved': 1}, next_page=True), "complete marks the task done")
+        check(not queue.complete(first, 'w1', {}), "a finished task can't complete twice")
+        check(queue.run_status(run_id).get('queued') == 3, "next page was enqueued")
+
+        # Retry with backoff, then permanent failure
+        queue.fail(second, 'w2', 'boom')
+        time.sleep(0.2)
+        third = queue.claim('w3', skip_sources=[a])
+        check(third is not None and third['id'] == second['id'], "failed task is retried")
+
+        # Stale heartbeats
+        with queue.conn, queue.conn.cursor() as cursor:
+            cursor.execute("UPDATE watch_search_tasks SET heartbeat_at = NOW() - INTERVAL '1 hour' WHERE id = %s",
+                           (third['id'],))
+        check(queue.requeue_stale(120) == 1, "stale running task is requeued")
+        check(not queue.complete(third, 'w3', {}), "requeued task can't be completed by the lost worker")
+
+        # Background heartbeat keeps a task alive and notices requeueing
+        time.sleep(0.2)
+        task = queue.claim('w4', skip_sources=[a])
+        heartbeat = Heartbeat(schema_dsn, 'w4', 0.2)
+        heartbeat.track(task['id'])
+        time.sleep(0.5)
+        check(not heartbeat.lost, "heartbeat keeps the claimed task")
+        with queue.conn, queue.conn.cursor() as cursor:
+            cursor.execute("UPDATE watch_search_tasks SET status = 'queued', claimed_by = NULL WHERE id = %s",
+                           (task['id'],))
+        time.sleep(0.5)
+        check(heartbeat.lost, "heartbeat notices a requeued task")
+        heartbeat.close()
+
+        cancelled = queue.cancel_run(run_id)
+        check(len(cancelled) == queue.run_status(run_id).get('cancelled'), "cancel_run cancels queued tasks")
+        results = queue.run_results(run_id)
+        check(any(row['status'] == 'done' and row['seconds'] is not None for row in results), "run_results reports time spent")
+
+        print("\n✅ Work queue SQL works")
+        return True
+
+    finally:
+        for connection in (queue, other):
+            if connection:
+                connection.close()
+        cleanup = WorkQueue(dsn)
+        with cleanup.conn, cleanup.conn.cursor() as cursor:
+            cursor.execute(f'DROP SCHEMA IF EXISTS {schema} CASCADE')
+        cleanup.close()
+
+
+if __name__ == '__main__':
+    sys.exit(0 if test_work_queue() else 1)
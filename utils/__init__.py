@@ -6,7 +6,9 @@ from .text_utils import (
     extract_price,
     extract_currency,
     generate_url_hash,
+    html_to_text,
     normalize_manufacturer,
+    normalize_reference,
     truncate_html
 )
 
@@ -18,6 +20,8 @@ __all__ = [
     'extract_price',
     'extract_currency',
     'generate_url_hash',
+    'html_to_text',
     'normalize_manufacturer',
+    'normalize_reference',
     'truncate_html'
 ]
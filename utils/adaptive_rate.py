@@ -0,0 +1,275 @@
+"""
+Adaptive per-domain rate control driven by server feedback
+Speeds up while a domain answers fast and clean, backs off multiplicatively on
+429/503, Retry-After, timeouts or block pages. The configured
+rate_limit_seconds only bounds the learned delay; learned delays persist in a
+local SQLite file between runs.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+from .logger import get_logger
+from .rate_limiter import get_registry
+
+logger = get_logger(__name__)
+
+BACKOFF_STATUS_CODES = {429, 503}
+
+# Titles of captcha / bot-protection interstitials
+BLOCK_TITLE_RE = re.compile(
+    rb'captcha|are you a robot|unusual traffic|access denied|attention required|just a moment|'
+    rb'pardon our interruption|bot protection|sicherheitsabfrage|zugriff verweigert',
+    re.IGNORECASE
+)
+_TITLE_RE = re.compile(rb'<title[^>]*>(.*?)</title', re.IGNORECASE | re.DOTALL)
+
+# Challenge forms / widgets that only interstitials render (not e.g. a
+# reCAPTCHA script loaded for a contact form)
+CHALLENGE_RE = re.compile(
+    rb'id=["\']?challenge-form|cf-browser-verification|_cf_chl_opt|id=["\']?px-captcha|captcha-delivery\.com',
+    re.IGNORECASE
+)
+
+# Error statuses bot protection answers with - a captcha in their body is a block
+BLOCK_STATUS_CODES = {403, 429, 503}
+_CAPTCHA_RE = re.compile(rb'captcha|are you a robot|cf-challenge|challenge-platform', re.IGNORECASE)
+
+
+def looks_blocked(body_head: bytes, status: Optional[int] = None) -> bool:
+    """
+    Check if a response body looks like a captcha or block page
+
+    Markers are only trusted where block pages put them - the page title,
+    a challenge form, or anywhere in an error response - so normal pages
+    mentioning "captcha" or "access denied" don't trigger a backoff.
+
+    Args:
+        body_head: First bytes of the response body
+        status: HTTP status code (None if unknown, e.g. Selenium)
+
+    Returns:
+        True if the page is a block page
+    """
+    if not body_head:
+        return False
+    head = body_head[:20000]
+
+    title = _TITLE_RE.search(head)
+    if title and BLOCK_TITLE_RE.search(title.group(1)):
+        return True
+
+    if CHALLENGE_RE.search(head):
+        return True
+
+    return status in BLOCK_STATUS_CODES and bool(_CAPTCHA_RE.search(head))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given in seconds
+
+    Args:
+        value: Header value
+
+    Returns:
+        Seconds or None (HTTP-date values are ignored)
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+class DomainState:
+    """Learned delay and bounds of one domain"""
+
+    def __init__(self, delay: float, floor: float, ceiling: float):
+        self.delay = delay
+        self.floor = floor
+        self.ceiling = ceiling
+        self.clean_streak = 0
+
+
+class AdaptiveRateController:
+    """AIMD controller for per-domain request delays"""
+
+    def __init__(self, db_path: str = None):
+        """
+        Initialize controller
+
+        Args:
+            db_path: SQLite file for learned delays (default: ADAPTIVE_RATE_DB)
+        """
+        self.db_path = db_path or os.getenv('ADAPTIVE_RATE_DB', 'rate_state.db')
+        self.floor_factor = float(os.getenv('ADAPTIVE_RATE_FLOOR_FACTOR', '0.25'))
+        self.ceiling_factor = float(os.getenv('ADAPTIVE_RATE_CEILING_FACTOR', '10'))
+        self.slow_seconds = float(os.getenv('ADAPTIVE_RATE_SLOW_SECONDS', '5'))
+        self.speedup_after = int(os.getenv('ADAPTIVE_RATE_SPEEDUP_AFTER', '5'))
+        self.speedup_factor = 0.9
+        self.backoff_factor = 2.0
+
+        self.registry = get_registry()
+        self._states: Dict[str, DomainState] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._init_db()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Get this thread's connection (None if persistence is unavailable)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            try:
+                conn = sqlite3.connect(self.db_path, timeout=30)
+                self._local.conn = conn
+            except sqlite3.Error as e:
+                logger.warning(f"Adaptive rate state unavailable: {e}")
+                return None
+        return conn
+
+    def _init_db(self):
+        """Create state table"""
+        conn = self._connect()
+        if conn is None:
+            return
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS adaptive_delays ('
+                'domain TEXT PRIMARY KEY, delay REAL NOT NULL, updated_at REAL NOT NULL)'
+            )
+
+    def configure(self, domain: str, base_delay: float) -> float:
+        """
+        Register domain with its configured rate_limit_seconds
+
+        Args:
+            domain: Domain name
+            base_delay: Configured rate_limit_seconds of the source
+
+        Returns:
+            Current delay for the domain
+        """
+        base_delay = float(base_delay or 2)
+        floor = base_delay * self.floor_factor
+        ceiling = base_delay * self.ceiling_factor
+
+        with self._lock:
+            state = self._states.get(domain)
+            if state is None:
+                learned = self._load(domain)
+                delay = learned if learned is not None else base_delay
+                state = DomainState(min(max(delay, floor), ceiling), floor, ceiling)
+                self._states[domain] = state
+                self.registry.set_interval(domain, state.delay)
+            return state.delay
+
+    def current_delay(self, domain: str, default: float = 2.0) -> float:
+        """
+        Get delay to use for the next request to domain
+
+        Args:
+            domain: Domain name
+            default: Delay if the domain was never configured
+
+        Returns:
+            Delay in seconds
+        """
+        state = self._states.get(domain)
+        return state.delay if state else default
+
+    def record(
+        self,
+        domain: str,
+        status: Optional[int],
+        elapsed: float,
+        retry_after: Optional[float] = None,
+        blocked: bool = False
+    ):
+        """
+        Feed the outcome of one request into the controller
+
+        Args:
+            domain: Domain name
+            status: HTTP status code (None for timeouts / connection errors)
+            elapsed: Seconds the request took
+            retry_after: Parsed Retry-After header
+            blocked: Whether a captcha / block page was detected
+        """
+        state = self._states.get(domain)
+        if state is None:
+            return
+
+        with self._lock:
+            old_delay = state.delay
+            backoff = status is None or status in BACKOFF_STATUS_CODES or blocked or retry_after is not None
+
+            if backoff:
+                state.clean_streak = 0
+                delay = state.delay * self.backoff_factor
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                state.delay = min(delay, state.ceiling)
+            elif status < 400 and elapsed < self.slow_seconds:
+                state.clean_streak += 1
+                if state.clean_streak >= self.speedup_after:
+                    state.clean_streak = 0
+                    state.delay = max(state.delay * self.speedup_factor, state.floor)
+            else:
+                state.clean_streak = 0
+
+            changed = state.delay != old_delay
+            new_delay = state.delay
+
+        if backoff and retry_after:
+            # Honour Retry-After for requests already queued on this domain
+            self.registry.pause(domain, retry_after)
+
+        if changed:
+            self.registry.set_interval(domain, new_delay)
+            self._save(domain, new_delay)
+            log = logger.warning if backoff else logger.debug
+            log(f"Rate for {domain}: {old_delay:.2f}s -> {new_delay:.2f}s (status {status}, blocked {blocked})")
+
+    def _load(self, domain: str) -> Optional[float]:
+        """Load learned delay for domain"""
+        conn = self._connect()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute('SELECT delay FROM adaptive_delays WHERE domain = ?', (domain,)).fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            logger.warning(f"Could not load learned delay for {domain}: {e}")
+            return None
+
+    def _save(self, domain: str, delay: float):
+        """Persist learned delay for domain"""
+        conn = self._connect()
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.execute(
+                    'INSERT INTO adaptive_delays (domain, delay, updated_at) VALUES (?, ?, ?) '
+                    'ON CONFLICT(domain) DO UPDATE SET delay = excluded.delay, updated_at = excluded.updated_at',
+                    (domain, delay, time.time())
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not save learned delay for {domain}: {e}")
+
+
+_controller: Optional[AdaptiveRateController] = None
+_controller_lock = threading.Lock()
+
+
+def get_rate_controller() -> AdaptiveRateController:
+    """Get the process-wide adaptive rate controller (created on first use)"""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdaptiveRateController()
+        return _controller
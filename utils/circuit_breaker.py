@@ -0,0 +1,148 @@
+"""
+Per-source circuit breaker
+Sources that keep failing (or answering too slowly) are skipped entirely while
+the circuit is open. After an exponentially growing cool-down a single probe
+request decides whether the source is healthy again.
+"""
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over a window of recent requests"""
+
+    def __init__(self, source_id: str, state: Optional[Dict[str, Any]] = None):
+        """
+        Initialize breaker
+
+        Args:
+            source_id: UUID of the source
+            state: Persisted state from watch_source_health (None = closed)
+        """
+        self.source_id = source_id
+        self.window_size = int(os.getenv('CIRCUIT_WINDOW', '20'))
+        self.min_requests = int(os.getenv('CIRCUIT_MIN_REQUESTS', '5'))
+        self.failure_threshold = float(os.getenv('CIRCUIT_FAILURE_RATE', '0.5'))
+        self.slow_seconds = float(os.getenv('CIRCUIT_SLOW_SECONDS', '20'))
+        self.base_cooldown = int(os.getenv('CIRCUIT_BASE_COOLDOWN', '3600'))
+        self.max_cooldown = int(os.getenv('CIRCUIT_MAX_COOLDOWN', str(7 * 24 * 3600)))
+
+        state = state or {}
+        self.state = state.get('state') or CLOSED
+        self.window: List[int] = list(state.get('recent_outcomes') or [])
+        self.cooldown_seconds = state.get('cooldown_seconds') or self.base_cooldown
+        self.opened_at = _parse_time(state.get('opened_at'))
+        self.next_probe_at = _parse_time(state.get('next_probe_at'))
+        self.probe_in_flight = False
+
+    def allow_request(self, now: datetime = None) -> bool:
+        """
+        Check if a request to the source may be sent
+
+        Args:
+            now: Current time (default: now)
+
+        Returns:
+            True if closed, or if this is the single half-open probe
+        """
+        now = now or datetime.now()
+
+        if self.state == CLOSED:
+            return True
+
+        if self.state == OPEN:
+            if self.next_probe_at and now < self.next_probe_at:
+                return False
+            self.state = HALF_OPEN
+            self.probe_in_flight = False
+
+        # Half-open: exactly one probe until its outcome is recorded
+        if self.probe_in_flight:
+            return False
+        self.probe_in_flight = True
+        return True
+
+    def record(self, success: bool, seconds: float, now: datetime = None):
+        """
+        Record outcome of one request
+
+        Args:
+            success: Whether the request succeeded
+            seconds: Request latency (slow requests count as failures)
+            now: Current time (default: now)
+        """
+        now = now or datetime.now()
+        failed = not success or seconds > self.slow_seconds
+
+        if self.state == HALF_OPEN:
+            self.probe_in_flight = False
+            if failed:
+                self._open(now, self.cooldown_seconds * 2)
+            else:
+                self.state = CLOSED
+                self.window = []
+                self.cooldown_seconds = self.base_cooldown
+                self.opened_at = None
+                self.next_probe_at = None
+            return
+
+        self.window.append(0 if failed else 1)
+        self.window = self.window[-self.window_size:]
+
+        if self.state == CLOSED and len(self.window) >= self.min_requests:
+            if self.failure_rate() >= self.failure_threshold:
+                self._open(now, self.cooldown_seconds)
+
+    def failure_rate(self) -> float:
+        """Share of failed requests in the window"""
+        if not self.window:
+            return 0.0
+        return 1 - sum(self.window) / len(self.window)
+
+    def _open(self, now: datetime, cooldown: int):
+        """Open circuit with cool-down"""
+        self.state = OPEN
+        self.cooldown_seconds = min(int(cooldown), self.max_cooldown)
+        self.opened_at = now
+        self.next_probe_at = now + timedelta(seconds=self.cooldown_seconds)
+
+    def should_skip(self, now: datetime = None) -> bool:
+        """
+        Check if the source should be skipped without using up the probe
+
+        Args:
+            now: Current time (default: now)
+
+        Returns:
+            True while the circuit is open and the cool-down hasn't passed
+        """
+        now = now or datetime.now()
+        return self.state == OPEN and self.next_probe_at is not None and now < self.next_probe_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for watch_source_health"""
+        return {
+            'source_id': self.source_id,
+            'state': self.state,
+            'recent_outcomes': self.window,
+            'cooldown_seconds': self.cooldown_seconds,
+            'opened_at': self.opened_at.isoformat() if self.opened_at else None,
+            'next_probe_at': self.next_probe_at.isoformat() if self.next_probe_at else None,
+        }
+
+
+def _parse_time(value) -> Optional[datetime]:
+    """Parse ISO timestamp from the database"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        return None
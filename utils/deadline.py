@@ -0,0 +1,118 @@
+"""
+Deadline propagation for fetches
+A source gets a time budget, each criterion a sub-budget, and every request
+timeout is capped by what is left - a slow page can no longer hold a worker
+for the full request timeout once the budget is spent.
+"""
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+class DeadlineExceeded(Exception):
+    """Time budget used up before the request could be sent"""
+
+
+class Deadline:
+    """Point in time on the monotonic clock, optionally nested in a parent"""
+
+    def __init__(self, seconds: float, parent: Optional['Deadline'] = None):
+        """
+        Initialize deadline
+
+        Args:
+            seconds: Budget from now
+            parent: Enclosing deadline - the earlier of both applies
+        """
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + seconds
+        self.parent = parent
+        self.paused_seconds = 0.0
+
+    @classmethod
+    def within(cls, parent: Optional['Deadline'], seconds: float) -> 'Deadline':
+        """
+        Create a sub-budget of an optional parent deadline
+
+        Args:
+            parent: Enclosing deadline or None
+            seconds: Budget from now
+
+        Returns:
+            Deadline expiring at the earlier of both
+        """
+        return cls(seconds, parent)
+
+    def remaining(self) -> float:
+        """Seconds left (may be negative)"""
+        remaining = self.expires_at - time.monotonic()
+        if self.parent is not None:
+            remaining = min(remaining, self.parent.remaining())
+        return remaining
+
+    def spent(self) -> float:
+        """Seconds charged to this budget so far (paused time excluded)"""
+        return time.monotonic() - self.started_at - self.paused_seconds
+
+    @property
+    def expired(self) -> bool:
+        """True once the budget is used up"""
+        return self.remaining() <= 0
+
+    def timeout(self, cap: float) -> float:
+        """
+        Request timeout bounded by the remaining budget
+
+        Args:
+            cap: Timeout the request would use without a deadline
+
+        Returns:
+            Timeout in seconds
+
+        Raises:
+            DeadlineExceeded if nothing is left
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("Time budget exhausted")
+        return min(cap, remaining)
+
+
+def bounded_timeout(deadline: Optional[Deadline], cap: float) -> float:
+    """
+    Request timeout for an optional deadline
+
+    Args:
+        deadline: Deadline or None
+        cap: Default timeout
+
+    Returns:
+        Timeout in seconds
+
+    Raises:
+        DeadlineExceeded if the deadline has passed
+    """
+    return deadline.timeout(cap) if deadline is not None else cap
+
+
+@contextmanager
+def paused(*deadlines: Optional[Deadline]) -> Iterator[None]:
+    """
+    Don't charge the time spent in the block to the given budgets
+
+    Used while a search generator is suspended and its consumer extracts and
+    saves listings - only fetching should use up a search budget. Parents
+    that aren't passed (e.g. the run's wall-clock deadline) keep running.
+
+    Args:
+        *deadlines: Deadlines to pause (None entries are ignored)
+    """
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        elapsed = time.monotonic() - start
+        for deadline in deadlines:
+            if deadline is not None:
+                deadline.expires_at += elapsed
+                deadline.paused_seconds += elapsed
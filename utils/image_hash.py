@@ -0,0 +1,114 @@
+"""
+Perceptual image hashes and near-duplicate lookup
+dHash compares the brightness of neighbouring pixels of a 9x8 grayscale
+thumbnail, giving 64 bits that survive re-encoding, resizing and small
+watermarks - the same dealer photo on two sites ends up a few bits apart.
+MultiIndexHash splits hashes into max_distance + 1 chunks: two hashes within
+max_distance bits share at least one chunk exactly (pigeonhole), so a lookup
+is a handful of dict probes plus popcounts on their candidates.
+"""
+import io
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is in requirements.txt - without it images aren't hashed
+    Image = None
+
+HASH_BITS = 64
+
+
+def dhash(data: bytes) -> Optional[int]:
+    """
+    Difference hash of an image
+
+    Args:
+        data: Encoded image (JPEG, PNG, WebP, ...)
+
+    Returns:
+        64-bit hash, or None if the image can't be decoded
+    """
+    if Image is None or not data:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            pixels = list(image.convert('L').resize((9, 8), Image.LANCZOS).getdata())
+    except Exception:
+        return None
+
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits"""
+    return (a ^ b).bit_count()
+
+
+def to_signed(value: int) -> int:
+    """Unsigned 64-bit hash as stored in a BIGINT column"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def from_signed(value: int) -> int:
+    """BIGINT column value back to the unsigned hash"""
+    return value + (1 << 64) if value < 0 else value
+
+
+class MultiIndexHash:
+    """Hamming-radius lookup over many 64-bit hashes"""
+
+    def __init__(self, max_distance: int = 6):
+        """
+        Initialize index
+
+        Args:
+            max_distance: Largest hamming distance lookups are exact for
+        """
+        self.max_distance = max_distance
+        chunks = max_distance + 1
+        bounds = [round(i * HASH_BITS / chunks) for i in range(chunks + 1)]
+        self.chunks: List[Tuple[int, int]] = [
+            (start, (1 << (end - start)) - 1) for start, end in zip(bounds, bounds[1:])
+        ]
+        self.tables: List[Dict[int, List[Tuple[int, Hashable]]]] = [defaultdict(list) for _ in self.chunks]
+        self.size = 0
+
+    def add(self, value: int, key: Hashable):
+        """
+        Index a hash
+
+        Args:
+            value: 64-bit hash
+            key: Identifier returned by search
+        """
+        for table, (shift, mask) in zip(self.tables, self.chunks):
+            table[(value >> shift) & mask].append((value, key))
+        self.size += 1
+
+    def search(self, value: int, max_distance: int = None) -> List[Tuple[int, Hashable]]:
+        """
+        Find indexed hashes within a hamming distance
+
+        Args:
+            value: 64-bit hash
+            max_distance: Radius (at most the index's max_distance)
+
+        Returns:
+            (distance, key) pairs, closest first
+        """
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        found, checked = [], set()
+        for table, (shift, mask) in zip(self.tables, self.chunks):
+            for other, key in table.get((value >> shift) & mask, ()):
+                if key in checked:
+                    continue
+                checked.add(key)
+                distance = hamming(value, other)
+                if distance <= max_distance:
+                    found.append((distance, key))
+        return sorted(found, key=lambda item: item[0])
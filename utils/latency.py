@@ -0,0 +1,104 @@
+"""
+Per-domain fetch latency tracking
+Keeps a bounded window of recent latencies per domain for percentile reports
+and as the trigger point for hedged requests.
+"""
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+WINDOW_SIZE = 500
+
+
+class LatencyTracker:
+    """Recent fetch latencies and hedging counters per domain"""
+
+    def __init__(self, window_size: int = WINDOW_SIZE):
+        """
+        Initialize tracker
+
+        Args:
+            window_size: Latencies kept per domain
+        """
+        self.window_size = window_size
+        self._samples: Dict[str, deque] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, domain: str, seconds: float):
+        """
+        Record latency of a completed fetch
+
+        Args:
+            domain: Domain name
+            seconds: Fetch latency
+        """
+        with self._lock:
+            samples = self._samples.get(domain)
+            if samples is None:
+                samples = self._samples[domain] = deque(maxlen=self.window_size)
+            samples.append(seconds)
+
+    def count(self, domain: str, counter: str):
+        """
+        Increment a per-domain counter (e.g. hedges_sent, hedges_won)
+
+        Args:
+            domain: Domain name
+            counter: Counter name
+        """
+        with self._lock:
+            counters = self._counters.setdefault(domain, {})
+            counters[counter] = counters.get(counter, 0) + 1
+
+    def percentile(self, domain: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """
+        Latency percentile of a domain
+
+        Args:
+            domain: Domain name
+            q: Percentile between 0 and 100
+            min_samples: Return None if fewer samples are available
+
+        Returns:
+            Latency in seconds or None
+        """
+        with self._lock:
+            samples = sorted(self._samples.get(domain, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        index = min(len(samples) - 1, int(round(q / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """
+        p50/p95/p99 latency and counters of all domains
+
+        Returns:
+            Dict of domain -> {count, p50, p95, p99, hedges_sent, ...}
+        """
+        with self._lock:
+            domains = list(self._samples)
+        report = {}
+        for domain in domains:
+            report[domain] = {
+                'count': len(self._samples[domain]),
+                'p50': self.percentile(domain, 50),
+                'p95': self.percentile(domain, 95),
+                'p99': self.percentile(domain, 99),
+                **self._counters.get(domain, {})
+            }
+        return report
+
+
+_tracker: Optional[LatencyTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Get the process-wide latency tracker (created on first use)"""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = LatencyTracker()
+        return _tracker
@@ -0,0 +1,107 @@
+"""
+MinHash signatures and LSH banding for near-duplicate text
+A signature keeps, per hash function, the minimum hash over a text's
+shingles; the share of equal positions estimates the Jaccard similarity of
+the shingle sets. The LSH index splits signatures into BANDS bands of ROWS
+rows and buckets them per band, so a lookup only compares against texts
+sharing a band - likely above ~(1/BANDS)^(1/ROWS) similarity - instead of
+all of them. Signatures are stored with listings: changing the seed or the
+number of hash functions invalidates them.
+"""
+import hashlib
+import random
+import re
+from collections import defaultdict
+from typing import Dict, Hashable, List, Sequence, Set
+
+BANDS = 20
+ROWS = 3
+NUM_PERM = BANDS * ROWS
+SHINGLE_SIZE = 4
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """
+    Character shingles of lowercased alphanumeric words
+
+    Args:
+        text: Input text
+        size: Characters per shingle
+
+    Returns:
+        Set of shingles (the text itself if shorter than size)
+    """
+    text = ' '.join(re.findall(r'\w+', (text or '').lower()))
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def signature(items: Set[str]) -> List[int]:
+    """
+    MinHash signature of a shingle set
+
+    Args:
+        items: Shingles
+
+    Returns:
+        NUM_PERM integers (empty list for an empty set)
+    """
+    if not items:
+        return []
+    values = [int.from_bytes(hashlib.blake2b(item.encode(), digest_size=8).digest(), 'big') % _PRIME
+              for item in items]
+    return [min((a * x + b) % _PRIME for x in values) for a, b in _PERMUTATIONS]
+
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    if not a or len(a) != len(b):
+        return 0.0
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class LSHIndex:
+    """Banded signature buckets for candidate lookup"""
+
+    def __init__(self):
+        self.buckets: Dict[tuple, List[Hashable]] = defaultdict(list)
+
+    @staticmethod
+    def _bands(sig: Sequence[int]):
+        """Bucket keys of a signature, one per band"""
+        return [(band, tuple(sig[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+    def insert(self, key: Hashable, sig: Sequence[int]):
+        """
+        Index a signature
+
+        Args:
+            key: Identifier returned by query
+            sig: Signature of NUM_PERM values (others are ignored)
+        """
+        if len(sig) != NUM_PERM:
+            return
+        for bucket in self._bands(sig):
+            self.buckets[bucket].append(key)
+
+    def query(self, sig: Sequence[int]) -> Set[Hashable]:
+        """
+        Keys sharing at least one band with a signature
+
+        Args:
+            sig: Signature of NUM_PERM values
+
+        Returns:
+            Candidate keys (to be verified with similarity)
+        """
+        if len(sig) != NUM_PERM:
+            return set()
+        candidates = set()
+        for bucket in self._bands(sig):
+            candidates.update(self.buckets.get(bucket, ()))
+        return candidates
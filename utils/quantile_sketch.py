@@ -0,0 +1,131 @@
+"""
+Mergeable quantile sketch with relative accuracy (DDSketch-style)
+Positive values are counted in logarithmic buckets: bucket i holds values in
+(gamma^(i-1), gamma^i] with gamma = (1 + a) / (1 - a), so every quantile is
+returned within a relative error of a (1% by default). Two sketches merge by
+adding bucket counts - exactly, in any order - which lets per-day sketches of
+several processes be combined in the database and windows be built by
+merging days. numpy is used for batch builds when it is installed.
+"""
+import math
+from collections import Counter, defaultdict
+from typing import Dict, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # Optional - batch builds fall back to pure Python
+    np = None
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+
+
+def bucket_index(value: float) -> int:
+    """Bucket of a positive value"""
+    return math.ceil(math.log(value) / LOG_GAMMA)
+
+
+def bucket_value(index: int) -> float:
+    """Representative value of a bucket (relative error <= RELATIVE_ACCURACY)"""
+    return 2 * GAMMA ** index / (GAMMA + 1)
+
+
+class QuantileSketch:
+    """Log-bucketed counts of positive values"""
+
+    __slots__ = ('bins', 'count')
+
+    def __init__(self, bins: Dict[int, int] = None):
+        """
+        Initialize sketch
+
+        Args:
+            bins: Bucket index -> count (e.g. from from_dict)
+        """
+        self.bins: Dict[int, int] = dict(bins or {})
+        self.count = sum(self.bins.values())
+
+    def add(self, value: float, count: int = 1):
+        """Add a value (non-positive values are ignored)"""
+        if value is None or value <= 0:
+            return
+        index = bucket_index(value)
+        self.bins[index] = self.bins.get(index, 0) + count
+        self.count += count
+
+    def merge(self, other: 'QuantileSketch'):
+        """Add the counts of another sketch"""
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile
+
+        Args:
+            q: Quantile 0..1
+
+        Returns:
+            Value within the relative accuracy, or None if the sketch is empty
+        """
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                return bucket_value(index)
+        return bucket_value(max(self.bins))
+
+    def to_dict(self) -> Dict[str, int]:
+        """Bins with string keys (JSON object)"""
+        return {str(index): count for index, count in self.bins.items()}
+
+    @classmethod
+    def from_dict(cls, bins: Dict[str, int]) -> 'QuantileSketch':
+        """Rebuild a sketch from to_dict output"""
+        return cls({int(index): int(count) for index, count in (bins or {}).items()})
+
+
+def build_sketches(groups: Sequence[str], values: Sequence[float]) -> Dict[str, QuantileSketch]:
+    """
+    Build one sketch per group in a single pass
+
+    With numpy, values are bucketed as one array and (group, bucket) pairs
+    counted with np.unique, so a recompute over many listings doesn't run
+    the per-value Python path.
+
+    Args:
+        groups: Group label of every value
+        values: Values (non-positive ones are ignored)
+
+    Returns:
+        Group -> sketch
+    """
+    sketches: Dict[str, QuantileSketch] = {}
+    if not len(values):
+        return sketches
+
+    if np is None:
+        counts = Counter((group, bucket_index(value)) for group, value in zip(groups, values) if value > 0)
+        bins = defaultdict(dict)
+        for (group, index), count in counts.items():
+            bins[group][index] = count
+        return {group: QuantileSketch(group_bins) for group, group_bins in bins.items()}
+
+    array = np.asarray(values, dtype=float)
+    valid = array > 0
+    if not valid.any():
+        return sketches
+    labels, codes = np.unique(np.asarray(groups, dtype=str)[valid], return_inverse=True)
+    indices = np.ceil(np.log(array[valid]) / LOG_GAMMA).astype(np.int64)
+    pairs, counts = np.unique(np.stack([codes.ravel(), indices]), axis=1, return_counts=True)
+
+    for code, index, count in zip(pairs[0].tolist(), pairs[1].tolist(), counts.tolist()):
+        sketch = sketches.setdefault(str(labels[code]), QuantileSketch())
+        sketch.bins[index] = count
+        sketch.count += count
+    return sketches
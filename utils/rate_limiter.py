@@ -1,9 +1,283 @@
 """
 Rate limiting utility for respectful scraping
+All scrapers share one per-domain token bucket per process (monotonic clock,
+thread- and asyncio-safe). Set RATE_LIMIT_DB to a SQLite file to coordinate
+the buckets across processes, e.g. the searcher and the availability checker.
 """
+import asyncio
+import os
+import sqlite3
+import threading
 import time
-from datetime import datetime, timedelta
-from typing import Dict
+from typing import Dict, Optional
+
+
+class DomainBucket:
+    """Token bucket for a single domain (GCRA formulation)"""
+
+    def __init__(self, domain: str, interval: float, burst: int = 1):
+        """
+        Initialize bucket
+
+        Args:
+            domain: Domain name
+            interval: Seconds per token (minimum spacing between requests)
+            burst: Requests allowed back-to-back before spacing kicks in
+        """
+        self.domain = domain
+        self.interval = interval
+        self.burst = max(1, burst)
+        self._tat = 0.0  # Theoretical arrival time of the next request
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Reserve the next request slot
+
+        Returns:
+            Seconds to wait before the request may be sent
+        """
+        with self._lock:
+            now = time.monotonic()
+            tat = max(self._tat, now)
+            wait = max(0.0, tat - (self.burst - 1) * self.interval - now)
+            self._tat = tat + self.interval
+            return wait
+
+    def try_reserve(self) -> bool:
+        """
+        Take the next slot only if it is available right now
+
+        Returns:
+            True if a request may be sent immediately
+        """
+        with self._lock:
+            now = time.monotonic()
+            tat = max(self._tat, now)
+            if tat - (self.burst - 1) * self.interval > now:
+                return False
+            self._tat = tat + self.interval
+            return True
+
+    def pause(self, seconds: float):
+        """Push the next free slot at least seconds into the future"""
+        with self._lock:
+            self._tat = max(self._tat, time.monotonic() + seconds)
+
+    def reset(self):
+        """Forget previous requests"""
+        with self._lock:
+            self._tat = 0.0
+
+
+class SqliteCoordinator:
+    """Shares request slots between processes through a local SQLite file"""
+
+    def __init__(self, path: str):
+        """
+        Initialize coordinator
+
+        Args:
+            path: SQLite database file (created if missing)
+        """
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limit_slots ('
+                'domain TEXT PRIMARY KEY, next_at REAL NOT NULL, '
+                'written_mono REAL NOT NULL, written_wall REAL NOT NULL)'
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def reserve(self, domain: str, interval: float) -> float:
+        """
+        Reserve the next request slot for domain across all processes
+
+        CLOCK_MONOTONIC is host-wide, so slots are comparable between
+        processes. A slot written under a different monotonic epoch (e.g.
+        before a reboot) is detected by comparing elapsed monotonic and wall
+        time and discarded.
+
+        Args:
+            domain: Domain name
+            interval: Seconds between requests
+
+        Returns:
+            Seconds to wait before the request may be sent
+        """
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.monotonic()
+            wall = time.time()
+            row = conn.execute(
+                'SELECT next_at, written_mono, written_wall FROM rate_limit_slots WHERE domain = ?',
+                (domain,)
+            ).fetchone()
+
+            slot = now
+            if row:
+                next_at, written_mono, written_wall = row
+                same_epoch = abs((now - written_mono) - (wall - written_wall)) < 60
+                if same_epoch:
+                    slot = max(next_at, now)
+
+            conn.execute(
+                'INSERT INTO rate_limit_slots (domain, next_at, written_mono, written_wall) '
+                'VALUES (?, ?, ?, ?) ON CONFLICT(domain) DO UPDATE SET '
+                'next_at = excluded.next_at, written_mono = excluded.written_mono, '
+                'written_wall = excluded.written_wall',
+                (domain, slot + interval, now, wall)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return slot - now
+
+    def reset(self, domain: str = None):
+        """Forget reservations for domain or all domains"""
+        conn = self._connect()
+        if domain:
+            conn.execute('DELETE FROM rate_limit_slots WHERE domain = ?', (domain,))
+        else:
+            conn.execute('DELETE FROM rate_limit_slots')
+
+
+class LimiterRegistry:
+    """Process-wide registry of domain buckets"""
+
+    def __init__(self, coordinator: Optional[SqliteCoordinator] = None):
+        """
+        Initialize registry
+
+        Args:
+            coordinator: Optional cross-process coordinator
+        """
+        self.coordinator = coordinator
+        self._buckets: Dict[str, DomainBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, domain: str, interval: float) -> DomainBucket:
+        """
+        Get bucket for domain
+
+        Several scrapers may configure different delays for the same domain -
+        the most polite (largest) one wins.
+
+        Args:
+            domain: Domain name
+            interval: Requested seconds between requests
+
+        Returns:
+            Shared DomainBucket
+        """
+        with self._lock:
+            bucket = self._buckets.get(domain)
+            if bucket is None:
+                bucket = DomainBucket(domain, interval)
+                self._buckets[domain] = bucket
+            elif interval > bucket.interval:
+                bucket.interval = interval
+            return bucket
+
+    def set_interval(self, domain: str, interval: float):
+        """
+        Force the interval of a domain (used by adaptive rate control)
+
+        Args:
+            domain: Domain name
+            interval: Seconds between requests
+        """
+        with self._lock:
+            bucket = self._buckets.get(domain)
+            if bucket is None:
+                self._buckets[domain] = DomainBucket(domain, interval)
+            else:
+                bucket.interval = interval
+
+    def try_reserve(self, domain: str) -> bool:
+        """
+        Take a request slot for domain only if no waiting is needed
+
+        Args:
+            domain: Domain name
+
+        Returns:
+            True if a request may be sent immediately
+        """
+        with self._lock:
+            bucket = self._buckets.get(domain)
+        return bucket is None or bucket.try_reserve()
+
+    def pause(self, domain: str, seconds: float):
+        """
+        Hold back all requests to domain for seconds (e.g. Retry-After)
+
+        Args:
+            domain: Domain name
+            seconds: Pause length
+        """
+        with self._lock:
+            bucket = self._buckets.get(domain)
+        if bucket:
+            bucket.pause(seconds)
+
+    def reserve(self, domain: str, interval: float) -> float:
+        """
+        Reserve the next request slot for domain
+
+        Args:
+            domain: Domain name
+            interval: Seconds between requests
+
+        Returns:
+            Seconds to wait before the request may be sent
+        """
+        bucket = self.bucket(domain, interval)
+        wait = bucket.reserve()
+
+        if self.coordinator:
+            try:
+                wait = max(wait, self.coordinator.reserve(domain, bucket.interval))
+            except sqlite3.Error:
+                pass  # Coordination is best effort - the local bucket still applies
+
+        return wait
+
+    def reset(self, domain: str = None):
+        """Reset domain or all domains"""
+        with self._lock:
+            buckets = [self._buckets[domain]] if domain in self._buckets else []
+            if domain is None:
+                buckets = list(self._buckets.values())
+        for bucket in buckets:
+            bucket.reset()
+        if self.coordinator:
+            self.coordinator.reset(domain)
+
+
+_registry: Optional[LimiterRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> LimiterRegistry:
+    """Get the process-wide limiter registry (created on first use)"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            db_path = os.getenv('RATE_LIMIT_DB', '')
+            _registry = LimiterRegistry(SqliteCoordinator(db_path) if db_path else None)
+        return _registry
 
 
 class RateLimiter:
@@ -17,7 +291,7 @@ class RateLimiter:
             default_delay: Default delay in seconds between requests
         """
         self.default_delay = default_delay
-        self.last_request: Dict[str, datetime] = {}
+        self.registry = get_registry()
 
     def wait(self, domain: str, delay: float = None):
         """
@@ -28,15 +302,24 @@ class RateLimiter:
             delay: Optional custom delay (overrides default)
         """
         delay_seconds = delay if delay is not None else self.default_delay
+        remaining = self.registry.reserve(domain, delay_seconds)
 
-        if domain in self.last_request:
-            elapsed = (datetime.now() - self.last_request[domain]).total_seconds()
-            remaining = delay_seconds - elapsed
+        if remaining > 0:
+            time.sleep(remaining)
 
-            if remaining > 0:
-                time.sleep(remaining)
+    async def wait_async(self, domain: str, delay: float = None):
+        """
+        Wait without blocking the event loop before making request to domain
 
-        self.last_request[domain] = datetime.now()
+        Args:
+            domain: Domain name (e.g., 'colognewatch.de')
+            delay: Optional custom delay (overrides default)
+        """
+        delay_seconds = delay if delay is not None else self.default_delay
+        remaining = self.registry.reserve(domain, delay_seconds)
+
+        if remaining > 0:
+            await asyncio.sleep(remaining)
 
     def reset(self, domain: str = None):
         """
@@ -45,7 +328,4 @@ class RateLimiter:
         Args:
             domain: Optional domain to reset (None = reset all)
         """
-        if domain:
-            self.last_request.pop(domain, None)
-        else:
-            self.last_request.clear()
+        self.registry.reset(domain)
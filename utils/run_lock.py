@@ -0,0 +1,64 @@
+"""
+Run lock preventing overlapping executions of a cron job
+Uses an advisory flock on a lock file - the kernel releases it when the
+process exits, so a crashed run never leaves a stale lock behind.
+"""
+import fcntl
+import os
+from typing import Optional
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class RunLock:
+    """Exclusive, non-blocking lock for one job name"""
+
+    def __init__(self, name: str, lock_dir: str = None):
+        """
+        Initialize lock
+
+        Args:
+            name: Job name (e.g. 'watch_searcher')
+            lock_dir: Directory for lock files (default: RUN_LOCK_DIR or /tmp)
+        """
+        lock_dir = lock_dir or os.getenv('RUN_LOCK_DIR', '/tmp')
+        self.path = os.path.join(lock_dir, f"{name}.lock")
+        self._file: Optional[object] = None
+
+    def acquire(self) -> bool:
+        """
+        Try to take the lock without waiting
+
+        Returns:
+            True if acquired, False if another run holds it
+        """
+        handle = open(self.path, 'a+')
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.seek(0)
+            holder = handle.read().strip() or 'unknown'
+            handle.close()
+            logger.warning(f"Run lock {self.path} held by pid {holder}")
+            return False
+
+        handle.seek(0)
+        handle.truncate()
+        handle.write(str(os.getpid()))
+        handle.flush()
+        self._file = handle
+        return True
+
+    def release(self):
+        """Release the lock if held"""
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
@@ -0,0 +1,60 @@
+"""
+Deterministic sharding of sources across searcher processes
+Sources are assigned by a stable hash of their domain, so N processes started
+with --shard 0/N .. N-1/N split the work without overlap and every domain is
+only ever hit by one process (its rate limit holds without coordination).
+"""
+import hashlib
+from typing import Dict, Any, Tuple
+from urllib.parse import urlparse
+
+
+def source_domain(source: Dict[str, Any]) -> str:
+    """
+    Domain a source's requests go to
+
+    Args:
+        source: Source row
+
+    Returns:
+        Lower-case domain name
+    """
+    domain = source.get('domain') or urlparse(source.get('url') or '').netloc
+    return (domain or source.get('name') or 'unknown').lower()
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """
+    Parse a shard spec like '2/4'
+
+    Args:
+        value: 'i/N' with 0 <= i < N
+
+    Returns:
+        Tuple of (index, count)
+
+    Raises:
+        ValueError if the spec is malformed
+    """
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{value}' - expected i/N, e.g. 0/4")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{value}' - index must be between 0 and {count - 1}")
+    return index, count
+
+
+def shard_of(source: Dict[str, Any], count: int) -> int:
+    """
+    Shard a source belongs to (stable across processes and machines)
+
+    Args:
+        source: Source row
+        count: Number of shards
+
+    Returns:
+        Shard index
+    """
+    digest = hashlib.sha256(source_domain(source).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count
@@ -0,0 +1,341 @@
+"""
+Streaming sold detection for listing pages
+Scans a listing page for sold markers while its bytes arrive: per-source
+selectors (matched on start tags), schema.org availability (JSON-LD and
+microdata) and keywords in text. Reading stops at the first decisive signal
+and no DOM is built, so a sold badge near the top of a page costs one chunk
+instead of a full download and parse.
+
+Selectors and schema.org availability are decisive. Keywords are a fallback:
+after a keyword hit the page is still scanned for availability markup, which
+wins ("Verkauft von: <dealer>" next to InStock JSON-LD is available).
+"""
+import os
+import re
+from typing import Iterable, List, Optional, Dict, Any, Tuple
+
+# Text markers of sold listings (whole words, case-insensitive)
+DEFAULT_KEYWORDS = (
+    'bereits verkauft', 'ist verkauft', 'wurde verkauft', 'artikel verkauft',
+    'nicht mehr verfügbar', 'nicht verfügbar', 'sold out', 'out of stock'
+)
+
+# Ambiguous words that only mark a listing sold as a text node of their own (a badge)
+DEFAULT_BADGES = ('verkauft', 'sold')
+
+# schema.org ItemAvailability values (normalized: lowercase letters only)
+SOLD_AVAILABILITY = {'outofstock', 'soldout', 'discontinued', 'oos'}
+AVAILABLE_AVAILABILITY = {
+    'instock', 'instoreonly', 'onlineonly', 'limitedavailability',
+    'preorder', 'presale', 'backorder', 'madetoorder'
+}
+
+# Start tags carrying an availability value in one of their attributes
+_AVAILABILITY_ATTRS = (('itemprop', 'availability'), ('property', 'product:availability'),
+                       ('property', 'og:availability'))
+
+_TAG_RE = re.compile(rb'<([a-zA-Z][\w:-]*)([^>]*)>')
+_ATTR_RE = re.compile(rb'([^\s/>"\'=]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+_JSON_AVAILABILITY_RE = re.compile(rb'"availability"\s*:\s*"([^"]{1,80})"', re.IGNORECASE)
+_RAW_TEXT_TAGS = (b'script', b'style')
+_COMPOUND_RE = re.compile(r'^([a-zA-Z][\w-]*|\*)?((?:[.#][\w-]+|\[[^\]]+\])*)$')
+_PART_RE = re.compile(r'([.#])([\w-]+)|\[\s*([\w:-]+)\s*(?:=\s*["\']?([^"\'\]]*)["\']?\s*)?\]')
+
+# Unterminated text or script content kept between chunks before it is scanned anyway
+CARRY_LIMIT = 65536
+CARRY_TAIL = 256
+
+SOLD = 'sold'
+AVAILABLE = 'available'
+
+
+def _normalize_availability(value: bytes) -> str:
+    """Reduce an availability value to lowercase letters ('https://schema.org/InStock' -> 'instock')"""
+    value = value.decode('ascii', 'ignore').rsplit('/', 1)[-1]
+    return re.sub(r'[^a-z]', '', value.lower())
+
+
+def _availability_signal(value: bytes) -> Optional[str]:
+    """Map an availability value to SOLD / AVAILABLE (None if unknown)"""
+    value = _normalize_availability(value)
+    if value in SOLD_AVAILABILITY:
+        return SOLD
+    if value in AVAILABLE_AVAILABILITY:
+        return AVAILABLE
+    return None
+
+
+def _parse_attrs(raw: bytes) -> Dict[str, str]:
+    """Parse the attributes of a start tag"""
+    attrs = {}
+    for match in _ATTR_RE.finditer(raw):
+        name, *values = match.groups()
+        value = next((v for v in values if v is not None), b'')
+        attrs.setdefault(name.decode('ascii', 'ignore').lower(), value.decode('utf-8', 'ignore'))
+    return attrs
+
+
+def _parse_selector(selector: str) -> Optional[Tuple[Optional[str], List[Tuple[str, Optional[str]]]]]:
+    """
+    Parse a compound selector like 'span.badge[data-status=sold]'
+
+    Args:
+        selector: Compound selector (the last compound of a descendant selector is used)
+
+    Returns:
+        (tag, [(attribute, value or None)]) - classes and ids become attribute
+        conditions - or None for unsupported syntax
+    """
+    parts = selector.split()
+    match = _COMPOUND_RE.match(parts[-1]) if parts else None
+    if not match or _PART_RE.sub('', match.group(2)):
+        return None
+
+    tag = match.group(1)
+    conditions = []
+    for prefix, name, attr_name, attr_value in _PART_RE.findall(match.group(2)):
+        if prefix == '.':
+            conditions.append(('class', name))
+        elif prefix == '#':
+            conditions.append(('id', name))
+        else:
+            conditions.append((attr_name.lower(), attr_value or None))
+    return (tag.lower() if tag and tag != '*' else None), conditions
+
+
+def _matches(selector, tag: str, attrs: Dict[str, str]) -> bool:
+    """Check a parsed selector against a start tag"""
+    selector_tag, conditions = selector
+    if selector_tag and selector_tag != tag:
+        return False
+    for name, value in conditions:
+        actual = attrs.get(name)
+        if actual is None:
+            return False
+        if name == 'class' and value is not None:
+            if value not in actual.split():
+                return False
+        elif value is not None and actual != value:
+            return False
+    return True
+
+
+class SoldDetector:
+    """Scans streamed listing pages for sold markers"""
+
+    def __init__(self, selectors: str = '', keywords: Iterable[str] = None, max_bytes: int = None):
+        """
+        Initialize detector
+
+        Args:
+            selectors: Comma-separated CSS selectors of sold badges (tag, .class, #id, [attr=value])
+            keywords: Sold keywords in page text (default: DEFAULT_KEYWORDS and DEFAULT_BADGES)
+            max_bytes: Bytes read before giving up (default: AVAILABILITY_SCAN_BYTES)
+        """
+        self.selectors = [s for s in (_parse_selector(part.strip()) for part in (selectors or '').split(',')) if s]
+        # Configured keywords replace the defaults including badges
+        self.badges = set() if keywords else {badge.encode('utf-8') for badge in DEFAULT_BADGES}
+        keywords = [k.strip().lower() for k in (keywords or DEFAULT_KEYWORDS) if k.strip()]
+        self.keyword_re = self._compile_keywords(keywords) if keywords else None
+        if max_bytes is None:
+            max_bytes = int(os.getenv('AVAILABILITY_SCAN_BYTES', '2000000'))
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_config(cls, source_config: Dict[str, Any]) -> 'SoldDetector':
+        """
+        Build a detector from a source configuration
+
+        Args:
+            source_config: Source config with optional Sold_Selector and
+                Sold_Keywords (comma-separated)
+
+        Returns:
+            SoldDetector
+        """
+        keywords = source_config.get('Sold_Keywords')
+        return cls(
+            selectors=source_config.get('Sold_Selector') or '',
+            keywords=keywords.split(',') if keywords else None
+        )
+
+    @staticmethod
+    def _compile_keywords(keywords: List[str]) -> re.Pattern:
+        """Compile keywords for UTF-8 and Latin-1 pages"""
+        variants = set()
+        for keyword in keywords:
+            for encoding in ('utf-8', 'latin-1'):
+                try:
+                    variants.add(re.escape(keyword.encode(encoding)))
+                except UnicodeEncodeError:
+                    pass
+        alternatives = b'|'.join(sorted(variants, key=len, reverse=True))
+        return re.compile(rb'(?<![\w\x80-\xff])(?:' + alternatives + rb')(?![\w\x80-\xff])', re.IGNORECASE)
+
+    def scan(self, chunks: Iterable[bytes], stats: Optional[Dict[str, Any]] = None) -> Optional[bool]:
+        """
+        Scan a page until the first decisive signal
+
+        Args:
+            chunks: Raw HTML byte chunks (e.g. response.iter_content())
+            stats: Optional dict that receives bytes_read, signal and stopped_early
+
+        Returns:
+            True if sold, False if marked in stock, None without any signal
+        """
+        scanner = _Scanner(self)
+        bytes_read = 0
+        signal = None
+        stopped_early = False
+
+        for chunk in chunks:
+            bytes_read += len(chunk)
+            signal = scanner.feed(chunk)
+            if signal or bytes_read >= self.max_bytes:
+                stopped_early = True
+                break
+        else:
+            signal = scanner.finish()
+        # No availability markup contradicted the keyword
+        signal = signal or scanner.keyword
+
+        if stats is not None:
+            stats.update({'bytes_read': bytes_read, 'signal': signal, 'stopped_early': stopped_early})
+        return None if signal is None else signal[0] == SOLD
+
+    def scan_text(self, html: bytes) -> Optional[bool]:
+        """
+        Scan a complete page (e.g. a rendered browser page)
+
+        Args:
+            html: Page HTML
+
+        Returns:
+            True if sold, False if marked in stock, None without any signal
+        """
+        return self.scan([html])
+
+
+class _Scanner:
+    """Incremental tag/text tokenizer feeding one page to a detector"""
+
+    def __init__(self, detector: SoldDetector):
+        self.detector = detector
+        self.carry = b''
+        self.raw_text_tag = None  # Inside <script> / <style>
+        self.keyword = None  # First keyword hit, used if no decisive signal follows
+
+    def feed(self, chunk: bytes) -> Optional[Tuple[str, str]]:
+        """
+        Scan the next chunk
+
+        Returns:
+            (SOLD or AVAILABLE, marker) at the first decisive signal, else None
+        """
+        buffer = self.carry + chunk
+        pos = 0
+        length = len(buffer)
+
+        while pos < length:
+            if self.raw_text_tag:
+                end = buffer.find(b'</' + self.raw_text_tag, pos)
+                if end == -1:
+                    return self._keep(buffer, pos, self._scan_script)
+                signal = self._scan_script(buffer[pos:end])
+                if signal:
+                    return signal
+                self.raw_text_tag = None
+                pos = end
+                continue
+
+            start = buffer.find(b'<', pos)
+            if start == -1:
+                return self._keep(buffer, pos, self._scan_text)
+            signal = self._scan_text(buffer[pos:start])
+            if signal:
+                return signal
+
+            if buffer.startswith(b'<!--', start):
+                end = buffer.find(b'-->', start + 4)
+                if end == -1:
+                    self.carry = buffer[start:] if length - start < CARRY_LIMIT else b''
+                    return None
+                pos = end + 3
+                continue
+
+            end = buffer.find(b'>', start)
+            if end == -1:
+                # Overlong unterminated tags are dropped rather than buffered
+                self.carry = buffer[start:] if length - start < CARRY_LIMIT else b''
+                return None
+
+            signal = self._scan_tag(buffer[start:end + 1])
+            if signal:
+                return signal
+            pos = end + 1
+
+        self.carry = b''
+        return None
+
+    def finish(self) -> Optional[Tuple[str, str]]:
+        """Scan what is left once the body has ended"""
+        if not self.carry:
+            return None
+        return (self._scan_script if self.raw_text_tag else self._scan_text)(self.carry)
+
+    def _keep(self, buffer: bytes, pos: int, scan) -> Optional[Tuple[str, str]]:
+        """Carry unterminated content over to the next chunk, scanning it once it grows too long"""
+        self.carry = buffer[pos:]
+        if len(self.carry) > CARRY_LIMIT:
+            signal = scan(self.carry)
+            if signal:
+                return signal
+            self.carry = self.carry[-CARRY_TAIL:]
+        return None
+
+    def _scan_tag(self, raw: bytes) -> Optional[Tuple[str, str]]:
+        """Check a start tag against sold selectors and availability attributes"""
+        match = _TAG_RE.match(raw)
+        if not match:
+            return None
+
+        tag = match.group(1).lower()
+        if tag in _RAW_TEXT_TAGS and not raw.endswith(b'/>'):
+            self.raw_text_tag = tag
+
+        name = tag.decode('ascii', 'ignore')
+        attrs = None
+        for selector in self.detector.selectors:
+            attrs = attrs if attrs is not None else _parse_attrs(match.group(2))
+            if _matches(selector, name, attrs):
+                return SOLD, f'selector {raw[:80].decode("utf-8", "ignore")}'
+
+        if b'availability' in raw:
+            attrs = attrs if attrs is not None else _parse_attrs(match.group(2))
+            for attr, value in _AVAILABILITY_ATTRS:
+                if attrs.get(attr) == value:
+                    state = attrs.get('href') or attrs.get('content') or ''
+                    signal = _availability_signal(state.encode('utf-8'))
+                    if signal:
+                        return signal, f'{value} {state}'
+        return None
+
+    def _scan_script(self, content: bytes) -> Optional[Tuple[str, str]]:
+        """Check script content for JSON-LD availability"""
+        for match in _JSON_AVAILABILITY_RE.finditer(content):
+            signal = _availability_signal(match.group(1))
+            if signal:
+                return signal, f'json-ld {match.group(1).decode("utf-8", "ignore")}'
+        return None
+
+    def _scan_text(self, text: bytes) -> None:
+        """Remember the first sold keyword or badge in text (not decisive)"""
+        if self.keyword is not None or not text.strip():
+            return None
+        if text.strip().rstrip(b'!.').lower() in self.detector.badges:
+            self.keyword = SOLD, f'badge {text.strip().decode("utf-8", "ignore")}'
+        elif self.detector.keyword_re is not None:
+            match = self.detector.keyword_re.search(text)
+            if match:
+                self.keyword = SOLD, f'keyword {match.group(0).decode("utf-8", "ignore")}'
+        return None
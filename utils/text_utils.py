@@ -3,6 +3,7 @@ Text processing utilities for watch data
 """
 import re
 import hashlib
+from html import unescape
 from typing import Optional
 
 
@@ -133,6 +134,43 @@ def normalize_manufacturer(manufacturer: str) -> str:
     return manufacturer
 
 
+def normalize_reference(reference: str) -> str:
+    """
+    Normalize a reference number for matching across sources
+
+    Same rule as watch_reference_key() in migrations/010: '116610 LN',
+    '116610-ln' and '116610LN' all become '116610LN'.
+
+    Args:
+        reference: Raw reference number
+
+    Returns:
+        Uppercase alphanumeric reference or empty string
+    """
+    if not reference:
+        return ""
+    return re.sub(r'[^A-Za-z0-9]', '', reference).upper()
+
+
+def html_to_text(html: str, max_length: int = 1000) -> str:
+    """
+    Visible text of an HTML snippet (e.g. a result card)
+
+    Args:
+        html: Raw HTML
+        max_length: Maximum character length
+
+    Returns:
+        Whitespace-normalized text without tags, scripts and styles
+    """
+    if not html:
+        return ""
+
+    text = re.sub(r'<(script|style)\b.*?</\1\s*>', ' ', html, flags=re.IGNORECASE | re.DOTALL)
+    text = re.sub(r'<[^>]*>', ' ', text)
+    return normalize_text(unescape(text))[:max_length]
+
+
 def truncate_html(html: str, max_length: int = 4000) -> str:
     """
     Truncate HTML to reduce OpenAI token usage
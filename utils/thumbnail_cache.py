@@ -0,0 +1,190 @@
+"""
+Concurrent listing image fetcher with an on-disk thumbnail cache
+Images are fetched by a small thread pool (IMAGE_FETCH_WORKERS), rate-limited
+per image host, read up to IMAGE_MAX_BYTES and stored as small JPEG
+thumbnails under IMAGE_CACHE_DIR, keyed by URL. Listings seen again - on the
+next run or on another source using the same CDN URL - never download their
+image twice. The cache is trimmed to IMAGE_CACHE_MAX_MB, oldest files first.
+"""
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+import requests
+from utils.logger import get_logger
+from utils.rate_limiter import RateLimiter
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is in requirements.txt - without it originals are cached
+    Image = None
+
+logger = get_logger(__name__)
+
+THUMBNAIL_SIZE = (256, 256)
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+
+
+class ThumbnailFetcher:
+    """Bounded background fetching of listing images"""
+
+    def __init__(self, cache_dir: str = None, workers: int = None):
+        """
+        Initialize fetcher
+
+        Args:
+            cache_dir: Thumbnail directory (default: IMAGE_CACHE_DIR)
+            workers: Concurrent downloads (default: IMAGE_FETCH_WORKERS)
+        """
+        self.cache_dir = cache_dir or os.getenv('IMAGE_CACHE_DIR', 'image_cache')
+        self.max_bytes = int(os.getenv('IMAGE_MAX_BYTES', '5000000'))
+        self.max_cache_bytes = int(float(os.getenv('IMAGE_CACHE_MAX_MB', '500')) * 1024 * 1024)
+        self.timeout = float(os.getenv('IMAGE_FETCH_TIMEOUT', '15'))
+        self.delay = float(os.getenv('IMAGE_FETCH_DELAY', '0.5'))
+        workers = workers or int(os.getenv('IMAGE_FETCH_WORKERS', '4'))
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='thumbnail')
+        self.rate_limiter = RateLimiter()
+        self.futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {'cached': 0, 'fetched': 0, 'failed': 0}
+
+    def _count(self, key: str):
+        """Increment a stats counter (called from fetch threads)"""
+        with self._lock:
+            self.stats[key] += 1
+
+    def _path(self, url: str) -> str:
+        """Cache file of an image URL"""
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode()).hexdigest()[:32] + '.jpg')
+
+    def prefetch(self, urls: Iterable[str]):
+        """
+        Start fetching images in the background
+
+        Args:
+            urls: Image URLs (empty ones are ignored)
+        """
+        with self._lock:
+            # Images of findings that were rejected before saving are never collected
+            if len(self.futures) > 1000:
+                self.futures = {url: future for url, future in self.futures.items() if not future.done()}
+            for url in urls:
+                if url and url not in self.futures:
+                    self.futures[url] = self.executor.submit(self._load, url)
+
+    def get(self, url: Optional[str], timeout: float = None) -> Optional[bytes]:
+        """
+        Thumbnail of an image, waiting for a running fetch
+
+        Args:
+            url: Image URL
+            timeout: Seconds to wait (default: IMAGE_FETCH_TIMEOUT)
+
+        Returns:
+            JPEG thumbnail bytes, or None if the image couldn't be fetched
+        """
+        if not url:
+            return None
+        self.prefetch([url])
+        with self._lock:
+            future = self.futures.pop(url, None)
+        try:
+            return future.result(timeout=timeout or self.timeout) if future else None
+        except Exception as e:
+            logger.debug(f"Thumbnail not available for {url}: {e}")
+            return None
+
+    def _load(self, url: str) -> Optional[bytes]:
+        """Read a thumbnail from the cache or fetch it"""
+        path = self._path(url)
+        try:
+            with open(path, 'rb') as f:
+                self._count('cached')
+                return f.read()
+        except FileNotFoundError:
+            pass
+
+        try:
+            thumbnail = self._thumbnail(self._download(url))
+        except Exception as e:
+            self._count('failed')
+            logger.debug(f"Image fetch failed for {url}: {e}")
+            return None
+
+        # Write-then-rename, so concurrent readers never see partial files
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(thumbnail)
+        os.replace(tmp_path, path)
+        self._count('fetched')
+        return thumbnail
+
+    def _download(self, url: str) -> bytes:
+        """Fetch an image, at most IMAGE_MAX_BYTES"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.headers.update({'User-Agent': USER_AGENT})
+
+        self.rate_limiter.wait(f"images:{urlparse(url).netloc}", self.delay)
+        with session.get(url, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            if not response.headers.get('Content-Type', 'image/').startswith('image/'):
+                raise ValueError(f"not an image ({response.headers.get('Content-Type')})")
+            data = bytearray()
+            for chunk in response.iter_content(65536):
+                data += chunk
+                if len(data) > self.max_bytes:
+                    raise ValueError(f"image larger than {self.max_bytes} bytes")
+            return bytes(data)
+
+    @staticmethod
+    def _thumbnail(data: bytes) -> bytes:
+        """Downscale an image to a JPEG thumbnail (originals without Pillow)"""
+        if Image is None:
+            return data
+        with Image.open(io.BytesIO(data)) as image:
+            image = image.convert('RGB')
+            image.thumbnail(THUMBNAIL_SIZE)
+            output = io.BytesIO()
+            image.save(output, 'JPEG', quality=85)
+            return output.getvalue()
+
+    def prune(self) -> int:
+        """
+        Trim the cache to IMAGE_CACHE_MAX_MB, least recently written first
+
+        Returns:
+            Number of files removed
+        """
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith('.jpg'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_cache_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def close(self):
+        """Stop fetching and trim the cache"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        removed = self.prune()
+        if removed:
+            logger.debug(f"Removed {removed} thumbnails from the image cache")
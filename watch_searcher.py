@@ -2,20 +2,38 @@
 Main search script - orchestrates watch searching across all sources
 Runs hourly via cronjob
 """
+import argparse
 import os
 import sys
-from datetime import datetime
-from typing import List, Dict, Any
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from core.supabase_client import SupabaseClient
+from core.supabase_client import SupabaseClient, DuplicateListingError
 from core.openai_extractor import OpenAIExtractor
+from core import pipeline_state
+from core.pipeline_state import PipelineStore, entry_finding
+from core.dedup import DuplicateDetector, listing_signature
 from core.email_sender import EmailSender
-from scrapers import CustomScraperLoader
-from utils import setup_logger, generate_url_hash
+from core.market_stats import MarketStats
+from core.price_tracker import PriceTracker
+from core.records import RawFinding, ExtractedListing, ListingRow
+from core.scheduler import BudgetScheduler, WorkItem
+from scrapers import CustomScraperLoader, ScraperCache
+from scrapers.listing_parser import shutdown_parse_pool
+from utils import setup_logger, generate_url_hash, html_to_text
+from utils.circuit_breaker import CircuitBreaker
+from utils.deadline import Deadline
+from utils.image_hash import dhash, to_signed
+from utils.latency import get_latency_tracker
+from utils.run_lock import RunLock
+from utils.sharding import parse_shard, shard_of
+from utils.thumbnail_cache import ThumbnailFetcher
 
 # Load environment variables
 load_dotenv()
@@ -27,37 +45,117 @@ logger = setup_logger('watch_searcher', 'watch_service.log')
 class WatchSearcher:
     """Main orchestrator for watch searching"""
 
-    def __init__(self):
-        """Initialize all services"""
-        self.db = SupabaseClient()
-        self.openai = OpenAIExtractor()
-        self.email = EmailSender()
+    def __init__(
+        self,
+        db: SupabaseClient = None,
+        openai: OpenAIExtractor = None,
+        email: EmailSender = None,
+        scrapers: ScraperCache = None,
+        url_hashes: set = None,
+        stop_event: threading.Event = None,
+        shard: Tuple[int, int] = None,
+        source_filter: List[str] = None,
+        criteria_filter: List[str] = None,
+        run_id: str = None,
+        pipeline: PipelineStore = None
+    ):
+        """
+        Initialize all services
+
+        A long-running process (daemon.py) passes its warm services, scraper
+        cache and URL hash index; a cron run creates everything itself.
+
+        Args:
+            db: Supabase client
+            openai: OpenAI extractor
+            email: Email sender
+            scrapers: Scraper cache - scrapers and the parse pool stay open after the run
+            url_hashes: Index of existing URL hashes, kept up to date with saved listings
+            stop_event: Set to stop starting new searches (remaining ones are deferred)
+            shard: (index, count) - only search sources whose domain hashes to index
+            source_filter: Only search sources with these names or IDs
+            criteria_filter: Only search criteria with these names or IDs
+            run_id: Run ID shared by all shards of one run
+            pipeline: Durable per-finding stage store (default: PIPELINE_DB)
+        """
+        self.db = db or SupabaseClient()
+        self.openai = openai or OpenAIExtractor()
+        self.email = email or EmailSender()
+        self.scrapers = scrapers
+        self.url_hashes = url_hashes
+        self.stop_event = stop_event or threading.Event()
+        self.shard = shard
+        self.source_filter = source_filter
+        self.criteria_filter = criteria_filter
+        self.pipeline = pipeline or PipelineStore()
+        self.run_id = run_id
 
         self.stats = {
             'sources_checked': 0,
             'sources_failed': 0,
+            'sources_skipped': 0,
             'listings_found': 0,
             'listings_saved': 0,
             'duplicates_skipped': 0,
+            'listings_flagged': 0,
+            'prices_changed': 0,
+            'listings_relisted': 0,
+            'duplicates_clustered': 0,
+            'searches_deferred': 0,
+            'searches_not_due': 0,
             'duration_seconds': 0,
             'status': 'Success'
         }
+        if run_id:
+            self.stats['run_id'] = run_id
+            self.stats['shard'] = f"{shard[0]}/{shard[1]}" if shard else None
 
         self.new_listings = []
+        self.saved_entries: List[Dict[str, Any]] = []
+        self.criteria_by_id: Dict[str, Dict[str, Any]] = {}
+        self.source_health: Dict[str, Dict[str, Any]] = {}
+        self.source_runs: Dict[str, Dict[str, Any]] = {}
+        self.source_budget = float(os.getenv('SOURCE_TIME_BUDGET', '900'))
+        self.backfill_budget = float(os.getenv('BACKFILL_TIME_BUDGET', '900'))
+        self.backfill_pages = int(os.getenv('BACKFILL_MAX_PAGES', '5'))
+        self.first_saved_at: Dict[str, datetime] = {}
+        # Sold inference from result-set disappearance (migration 007)
+        self.sold_inference = os.getenv('SOLD_INFERENCE', 'true').lower() == 'true'
+        self.missed_crawls = int(os.getenv('SEEN_MISSED_CRAWLS', '3'))
+        # Known listings are checked for price changes and relistings (migration 009)
+        self.price_tracking = os.getenv('PRICE_TRACKING', 'true').lower() == 'true'
+        self.prices = PriceTracker(self.db, self.openai, run_id)
+        # New listings are scored against their market (migration 011)
+        self.market = MarketStats(self.db)
+        # Cross-source duplicates are saved but not notified (migration 012)
+        self.dedup = DuplicateDetector(self.db)
+        # Listing photos are fetched in the background and hashed for dedup (migration 013)
+        self.thumbnails = ThumbnailFetcher() if os.getenv('IMAGE_HASHING', 'true').lower() == 'true' else None
         self.start_time = None
 
     def run(self):
         """Main execution flow"""
+        # Shards of one run must not exclude each other
+        lock = RunLock(f"watch_searcher_{self.shard[0]}of{self.shard[1]}" if self.shard else 'watch_searcher')
+        if not lock.acquire():
+            logger.warning("⏭️  Previous search run still active - skipping this run")
+            return
+
         try:
             self.start_time = datetime.now()
+            self.prices.run_id = self.run_id or f"search-{self.start_time:%Y-%m-%dT%H:%M:%S}"
             logger.info("=" * 60)
             logger.info("🚀 Watch Service - Starting Search")
             logger.info("=" * 60)
 
             # Load configuration from Supabase
-            sources = self.db.get_active_sources()
-            criteria_list = self.db.get_search_criteria()
-            existing_hashes = self.db.get_existing_url_hashes()
+            sources = self._select_sources(self.db.get_active_sources())
+            criteria_list = _filter_rows(self.db.get_search_criteria(), self.criteria_filter)
+            if self.url_hashes is not None:
+                existing_hashes = self.url_hashes
+            else:
+                existing_hashes = set(self.db.get_existing_url_hashes())
+            self.source_health = self.db.get_source_health()
 
             if not sources:
                 logger.warning("No active sources configured in database")
@@ -69,14 +167,26 @@ class WatchSearcher:
 
             logger.info(f"📋 Loaded {len(sources)} sources and {len(criteria_list)} search criteria")
 
-            # Search all sources for all criteria
-            for source_config in sources:
-                self._search_source(source_config, criteria_list, existing_hashes)
+            # Findings reference criteria by ID instead of carrying a copy
+            self.criteria_by_id = {c.get('id'): c for c in criteria_list}
+
+            # Finish findings an earlier, interrupted run left behind
+            self._resume_pipeline(sources, existing_hashes)
+
+            # Search (source, criteria) pairs by expected yield within the run budget
+            scheduler = BudgetScheduler()
+            plan = scheduler.plan(sources, criteria_list)
+            self.stats['searches_not_due'] = scheduler.not_due
+            logger.info(f"🗓️  {len(plan)} searches due, {scheduler.not_due} not due yet")
+            self._run_plan(scheduler, plan, existing_hashes)
+            self.market.flush()
 
             # Send email notification if new listings found
             if self.new_listings:
                 logger.info(f"📧 Sending email with {len(self.new_listings)} new listings")
-                self.email.send_new_watches_email(self.new_listings)
+                if self.email.send_new_watches_email(self.new_listings):
+                    self.mark_notified()
+            self._send_price_drops()
 
             # Calculate duration
             duration = (datetime.now() - self.start_time).total_seconds()
@@ -100,192 +210,647 @@ class WatchSearcher:
             self.email.send_error_notification(str(e))
             raise
 
-    def _search_source(
+        finally:
+            if self.scrapers is None:
+                shutdown_parse_pool()
+            self.close()
+            lock.release()
+
+    def close(self):
+        """Stop background image fetching and release pipeline claims"""
+        if self.thumbnails:
+            self.thumbnails.close()
+        self.pipeline.release()
+
+    def run_backfill(self, criteria_list: List[Dict[str, Any]]) -> Dict[str, float]:
+        """
+        Search new or changed criteria across all sources right away
+
+        Walks deeper than a regular run (BACKFILL_MAX_PAGES) and ignores due
+        times. The searches are recorded in the yield history, so afterwards
+        the criteria simply follows the regular schedule.
+
+        Args:
+            criteria_list: Criteria rows from get_pending_backfills()
+
+        Returns:
+            Dict of criteria_id -> seconds from the change to its first saved listing
+        """
+        if not criteria_list:
+            return {}
+        lock = RunLock('watch_backfill')
+        if not lock.acquire():
+            logger.warning("⏭️  Backfill already running - skipping")
+            return {}
+
+        first_results: Dict[str, float] = {}
+
+        try:
+            self.start_time = datetime.now()
+            self.stats['run_id'] = f"backfill-{self.start_time:%Y-%m-%dT%H:%M:%S}"
+            self.prices.run_id = self.stats['run_id']
+            names = ', '.join(c.get('name') or c.get('model') or str(c.get('id')) for c in criteria_list)
+            logger.info("=" * 60)
+            logger.info(f"⚡ Backfilling {len(criteria_list)} new or changed criteria: {names}")
+            logger.info("=" * 60)
+
+            # All sources - a new criteria shouldn't wait for the other shards
+            sources = _filter_rows(self.db.get_active_sources(), self.source_filter)
+            if self.url_hashes is not None:
+                existing_hashes = self.url_hashes
+            else:
+                existing_hashes = set(self.db.get_existing_url_hashes())
+            self.source_health = self.db.get_source_health()
+            self.criteria_by_id.update({c.get('id'): c for c in criteria_list})
+
+            scheduler = BudgetScheduler(budget_seconds=self.backfill_budget)
+            plan = scheduler.plan(sources, criteria_list, due_only=False)
+            self._run_plan(scheduler, plan, existing_hashes, max_pages=self.backfill_pages)
+            self.market.flush()
+
+            if self.new_listings:
+                logger.info(f"📧 Sending email with {len(self.new_listings)} new listings")
+                if self.email.send_new_watches_email(self.new_listings):
+                    self.mark_notified()
+            self._send_price_drops()
+
+            # Interrupted backfills are repeated; budget-deferred pairs go first in the next regular run
+            interrupted = {item.criteria.get('id') for item in scheduler.deferred} if self.stop_event.is_set() else set()
+            for criteria in criteria_list:
+                criteria_id = criteria.get('id')
+                if criteria_id in interrupted:
+                    continue
+
+                first_saved_at = self.first_saved_at.get(criteria_id)
+                self.db.mark_criteria_backfilled(criteria, first_saved_at)
+                if first_saved_at:
+                    changed_at = criteria.get('updated_at') or criteria.get('created_at')
+                    if changed_at:
+                        changed_at = datetime.fromisoformat(changed_at.replace('Z', '+00:00'))
+                        if changed_at.tzinfo is None:
+                            changed_at = changed_at.replace(tzinfo=timezone.utc)
+                    seconds = (first_saved_at - changed_at).total_seconds() if changed_at else 0.0
+                    first_results[criteria_id] = seconds
+                    logger.info(f"⏱️  {criteria.get('name') or criteria_id}: first results {first_results[criteria_id]:.0f}s after the change")
+
+            self.stats['duration_seconds'] = int((datetime.now() - self.start_time).total_seconds())
+            self._log_summary()
+            self.db.log_search_run(self.stats)
+            return first_results
+
+        except Exception as e:
+            logger.error(f"💥 Backfill failed: {e}", exc_info=True)
+            self.stats['status'] = 'Failed'
+            self.stats['error_message'] = str(e)
+            self.db.log_search_run(self.stats)
+            raise
+
+        finally:
+            if self.scrapers is None:
+                shutdown_parse_pool()
+            self.close()
+            lock.release()
+
+    def _select_sources(self, sources: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Apply --sources filter and shard assignment
+
+        Args:
+            sources: All active sources
+
+        Returns:
+            Sources this process is responsible for
+        """
+        sources = _filter_rows(sources, self.source_filter)
+        if self.shard:
+            index, count = self.shard
+            sources = [s for s in sources if shard_of(s, count) == index]
+            logger.info(f"🧩 Shard {index}/{count}: {len(sources)} sources")
+        return sources
+
+    def _run_plan(
         self,
-        source_config: Dict[str, Any],
-        criteria_list: List[Dict[str, Any]],
-        existing_hashes: set
+        scheduler: BudgetScheduler,
+        plan: List[WorkItem],
+        existing_hashes: set,
+        max_pages: int = None
     ):
         """
-        Search single source for all criteria
+        Run planned searches until the budget is used up
 
         Args:
-            source_config: Source configuration from Notion
-            criteria_list: List of search criteria
+            scheduler: Budget scheduler of this run
+            plan: Work items in execution order
             existing_hashes: Set of existing URL hashes
+            max_pages: Result pages per search (default: source Max_Pages)
+        """
+        # Scrapers (and their browsers) are closed right after their last planned search
+        last_index = {item.source.get('id'): index for index, item in enumerate(plan)}
+        try:
+            for index, item in enumerate(plan):
+                self._run_item(scheduler, item, existing_hashes, max_pages)
+                source_id = item.source.get('id')
+                if last_index[source_id] == index and source_id in self.source_runs:
+                    self._close_source(self.source_runs.pop(source_id))
+
+        finally:
+            for source_run in self.source_runs.values():
+                self._close_source(source_run)
+            self.source_runs.clear()
+
+        self.stats['searches_deferred'] = len(scheduler.deferred)
+        if scheduler.deferred:
+            reason = "Stop requested" if self.stop_event.is_set() else "Time budget used up"
+            logger.warning(f"⏳ {reason} - deferred {len(scheduler.deferred)} searches to the next run")
+
+    def _run_item(
+        self,
+        scheduler: BudgetScheduler,
+        item: WorkItem,
+        existing_hashes: set,
+        max_pages: int = None
+    ):
+        """
+        Run one planned search, or defer it if it doesn't fit its budgets
+
+        The source budget (SOURCE_TIME_BUDGET) is only charged while the
+        source's own searches fetch, so interleaved sources don't run out
+        of time while waiting for their turn.
+
+        Args:
+            scheduler: Budget scheduler of this run
+            item: Planned (source, criteria) search
+            existing_hashes: Set of existing URL hashes
+            max_pages: Result pages per search (default: source Max_Pages)
+        """
+        if self.stop_event.is_set() or scheduler.exhausted() or not scheduler.can_start(item):
+            scheduler.defer(item)
+            return
+
+        source_run = self._open_source(item.source)
+        if source_run is None:
+            return
+
+        budget = self.source_budget - source_run['spent']
+        if budget <= 0:
+            logger.info(f"  ⏳ {source_run['config'].get('name', 'Unknown')}: source time budget used up")
+            scheduler.defer(item)
+            return
+
+        scraper = source_run['scraper']
+        scraper.deadline = Deadline.within(scheduler.work_deadline(), budget)
+
+        start = time.monotonic()
+        saved = self._search_pair(source_run, item.criteria, existing_hashes, max_pages)
+        source_run['spent'] += scraper.deadline.spent()
+
+        criteria_id = item.criteria.get('id')
+        if criteria_id in scraper.budget_exhausted:
+            # Stopped at the deadline - retried first next run instead of counting as empty
+            scheduler.defer(item)
+        elif saved is not None and criteria_id not in scraper.failed_searches:
+            # Failed searches would drag the pair's yield estimate down - the breaker handles them
+            scheduler.record(item, saved, time.monotonic() - start)
+
+    def _open_source(self, source_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Get scraper and breaker of a source, loading them on first use
+
+        Args:
+            source_config: Source configuration from Supabase
+
+        Returns:
+            Source run state, or None if the source is skipped or failed
         """
-        source_name = source_config.get('name', 'Unknown')
         source_id = source_config.get('id')
+        if source_id in self.source_runs:
+            source_run = self.source_runs[source_id]
+            return None if source_run['failed'] else source_run
+
+        source_name = source_config.get('name', 'Unknown')
+        breaker = CircuitBreaker(source_id, self.source_health.get(source_id))
+        source_run = {'config': source_config, 'breaker': breaker, 'scraper': None, 'raw': 0, 'saved': 0,
+                      'spent': 0.0, 'failed': True}
+
+        if breaker.should_skip():
+            logger.info(f"\n⏸️  Skipping {source_name} - circuit open until {breaker.next_probe_at:%Y-%m-%d %H:%M}")
+            self.stats['sources_skipped'] += 1
+            self.source_runs[source_id] = dict(source_run, breaker=None)
+            return None
+
+        self.source_runs[source_id] = source_run
 
         try:
             logger.info(f"\n🌐 Searching {source_name}...")
             self.stats['sources_checked'] += 1
 
-            # Load appropriate scraper (generic or custom)
-            scraper = CustomScraperLoader.load_scraper(source_config)
+            # Load appropriate scraper (generic or custom), warm if cached
+            if self.scrapers is not None:
+                scraper = self.scrapers.get(source_config)
+            else:
+                scraper = CustomScraperLoader.load_scraper(source_config)
+            scraper.breaker = breaker
 
-            # Search for each criteria
-            all_findings = []
+            source_run.update(scraper=scraper, failed=False)
+            return source_run
 
-            for criteria in criteria_list:
-                manufacturer = criteria.get('manufacturer', '')
-                model = criteria.get('model', '')
-
-                logger.info(f"  🔍 {manufacturer} {model}")
-
-                try:
-                    findings = scraper.search(criteria)
-                    all_findings.extend([
-                        {**f, 'criteria': criteria} for f in findings
-                    ])
-                except Exception as e:
-                    logger.error(f"  ❌ Search failed: {e}")
+        except Exception as e:
+            self._fail_source(source_run, e)
+            return None
+
+    def _search_pair(
+        self,
+        source_run: Dict[str, Any],
+        criteria: Dict[str, Any],
+        existing_hashes: set,
+        max_pages: int = None
+    ) -> int:
+        """
+        Search one source for one criteria
+
+        Args:
+            source_run: Source run state from _open_source
+            criteria: Search criteria
+            existing_hashes: Set of existing URL hashes
+            max_pages: Result pages to walk (default: source Max_Pages)
+
+        Returns:
+            Number of new listings saved, or None if the search failed
+        """
+        saved_count = 0
+        scraper = source_run['scraper']
+        seen_hashes = set()
+        listing_source = None
+        failed = False
+
+        try:
+            # Process each result page as soon as it arrives
+            for _, findings in scraper.search_many([criteria], max_pages=max_pages):
+                if not findings:
                     continue
+                source_run['raw'] += len(findings)
+                seen_hashes.update(generate_url_hash(f.get('link', '')) for f in findings)
+                listing_source = listing_source or findings[0].get('source_name') or scraper.source_name
+                saved_count += len(self.process_page(criteria, findings, existing_hashes))
 
-            if not all_findings:
-                logger.info(f"  ℹ️  No listings found")
-                scraper.close_driver()
-                self.db.update_source_stats(source_id, success=True)
-                return
+        except Exception as e:
+            self._fail_source(source_run, e)
+            failed = True
+
+        # Only a crawl that saw the whole result set tells which listings vanished
+        if (self.sold_inference and seen_hashes and not source_run['failed']
+                and criteria.get('id') not in scraper.incomplete_crawls):
+            flagged = self.db.record_crawl(listing_source, criteria.get('id'), sorted(seen_hashes), self.missed_crawls)
+            if flagged:
+                logger.info(f"  🏷️  {flagged} listings missing from {self.missed_crawls} complete crawls - flagged as probably sold")
+            self.stats['listings_flagged'] += flagged
+
+        source_run['saved'] += saved_count
+        return None if failed else saved_count
+
+    def _fail_source(self, source_run: Dict[str, Any], error: Exception):
+        """Mark a source as failed for the rest of the run"""
+        source_name = source_run['config'].get('name', 'Unknown')
+        logger.error(f"  ❌ {source_name} failed: {error}")
+        self.stats['sources_failed'] += 1
+        source_run['failed'] = True
+        source_run['error'] = str(error)
+        source_run['breaker'].record(False, 0)
+
+    def _close_source(self, source_run: Dict[str, Any]):
+        """
+        Close scraper and persist source stats and health
 
-            logger.info(f"  ✅ Found {len(all_findings)} raw listings")
+        Args:
+            source_run: Source run state from _open_source
+        """
+        breaker = source_run['breaker']
+        if breaker is None:
+            return  # Skipped by its circuit breaker
 
-            # Extract structured data with OpenAI
-            extracted = self._extract_and_filter(all_findings, existing_hashes)
+        source_id = source_run['config'].get('id')
+        source_name = source_run['config'].get('name', 'Unknown')
 
-            # Save to database
-            saved_count = self._save_listings(extracted)
+        try:
+            if source_run['scraper'] is not None and self.scrapers is None:
+                source_run['scraper'].close_driver()
 
-            logger.info(f"  💾 Saved {saved_count} new listings")
+            if source_run['failed']:
+                self.db.update_source_stats(source_id, success=False, error_msg=source_run.get('error'))
+                return
 
-            # Close scraper
-            scraper.close_driver()
+            if not source_run['raw']:
+                logger.info(f"  ℹ️  {source_name}: no listings found")
+            else:
+                logger.info(f"  ✅ {source_name}: {source_run['raw']} raw listings, {source_run['saved']} new saved")
+
+            if breaker.state != 'closed':
+                logger.warning(f"  ⚡ Circuit {breaker.state} for {source_name} (failure rate {breaker.failure_rate():.0%})")
 
             # Update source stats
-            self.db.update_source_stats(source_id, success=True)
+            self.db.update_source_stats(source_id, success=breaker.state == 'closed')
 
         except Exception as e:
-            logger.error(f"  ❌ {source_name} failed: {e}")
-            self.stats['sources_failed'] += 1
-            self.db.update_source_stats(source_id, success=False, error_msg=str(e))
+            logger.error(f"  ❌ Closing {source_name} failed: {e}")
+
+        finally:
+            self.db.save_source_health(breaker.to_dict())
+
+    def _resume_pipeline(self, sources: List[Dict[str, Any]], existing_hashes: set):
+        """
+        Drain findings of earlier runs from the pipeline store
 
-    def _extract_and_filter(
+        Unfinished findings continue at the stage they stopped at (nothing is
+        re-fetched); saved findings whose email never went out are notified
+        with this run's listings.
+
+        Args:
+            sources: Sources of this run (other shards drain their own findings)
+            existing_hashes: Set of existing URL hashes
+        """
+        purged = self.pipeline.purge()
+        if purged:
+            logger.debug(f"Purged {purged} finished pipeline entries")
+
+        source_names = {s.get('name') for s in sources}
+        for entry in self.pipeline.unnotified():
+            # Entries a concurrent run (e.g. a backfill) saved are notified by that run
+            if entry['source_name'] in source_names and entry.get('listing') and self.pipeline.claim(entry):
+                if not entry['listing'].get('canonical_id'):
+                    self.new_listings.append(entry['listing'])
+                self.saved_entries.append(entry)
+
+        pending = [e for e in self.pipeline.unfinished() if e['source_name'] in source_names]
+        if not pending:
+            return
+
+        logger.info(f"♻️  Resuming {len(pending)} unfinished findings of earlier runs")
+        for entry in pending:
+            if self.stop_event.is_set():
+                break
+            # Another run may have taken it since it was listed
+            if not self.pipeline.claim(entry):
+                continue
+            if entry['criteria_id'] not in self.criteria_by_id:
+                self.pipeline.reject(entry, 'Criteria no longer active')
+                continue
+            self._advance_safely(entry, existing_hashes)
+
+    def process_page(
         self,
+        criteria: Dict[str, Any],
         findings: List[Dict[str, Any]],
         existing_hashes: set
     ) -> List[Dict[str, Any]]:
         """
-        Extract structured data with OpenAI and filter
+        Extract, filter and save one result page of a criteria
+
+        Every finding is recorded in the pipeline store first, so an
+        interrupted run can pick it up again.
 
         Args:
-            findings: Raw findings from scraper
+            criteria: Search criteria the page was fetched for
+            findings: Raw listings returned by the scraper
             existing_hashes: Set of existing URL hashes
 
         Returns:
-            List of validated, filtered listings
+            Saved listing rows
         """
-        results = []
+        manufacturer = criteria.get('manufacturer', '')
+        model = criteria.get('model', '')
+        logger.info(f"  🔍 {manufacturer} {model}: {len(findings)} results")
+
+        criteria_id = criteria.get('id')
+        self.criteria_by_id.setdefault(criteria_id, criteria)
+
+        # Photos download while listings are extracted - new links only
+        if self.thumbnails:
+            self.thumbnails.prefetch(
+                f.get('image_url') for f in findings if generate_url_hash(f.get('link', '')) not in existing_hashes
+            )
 
+        saved = []
+        known = []
         for finding in findings:
-            try:
-                # Extract structured data
-                extracted = self.openai.extract_watch_data(
-                    finding.get('raw_html', ''),
-                    finding.get('source_name', '')
-                )
+            raw = RawFinding.from_scraper(finding, criteria_id)
+            url_hash = generate_url_hash(raw.link)
+            if self.price_tracking and url_hash in existing_hashes:
+                known.append((raw, url_hash))
+                continue
 
-                if not extracted:
-                    continue
+            entry = self.pipeline.add(raw, url_hash, self.run_id)
+            if entry['stage'] not in pipeline_state.UNFINISHED_STAGES:
+                # Saved by an earlier run
+                self.stats['duplicates_skipped'] += 1
+                continue
+            if not self.pipeline.claim(entry):
+                logger.debug("  ⊘ Being processed by another run")
+                continue
 
-                # Check if matches criteria
-                criteria = finding.get('criteria', {})
-                if not self.openai.match_search_criteria(extracted, criteria):
-                    logger.debug("  ⊘ Doesn't match criteria")
-                    continue
+            row = self._advance_safely(entry, existing_hashes)
+            if row:
+                saved.append(row)
 
-                # Filter by country
-                allowed_countries = criteria.get('allowed_countries', [])
-                if not self.openai.filter_by_country(extracted, allowed_countries):
-                    logger.debug("  ⊘ Filtered by country")
-                    continue
+        if known:
+            self._check_known(known)
+        self.prices.flush()
+        self.market.flush(force=False)
+        return saved
+
+    def _check_known(self, known: List[Tuple[RawFinding, str]]):
+        """
+        Check listings already in the database for price changes and relistings
 
-                # Check duplicates
-                url = finding.get('link', '')
-                url_hash = generate_url_hash(url)
+        Args:
+            known: (finding, url_hash) pairs of known listings on a result page
+        """
+        before = dict(self.prices.stats)
+        self.prices.check_page(known)
+
+        self.stats['duplicates_skipped'] += self.prices.stats['unchanged'] - before['unchanged']
+        self.stats['prices_changed'] += self.prices.stats['prices_changed'] - before['prices_changed']
+        self.stats['listings_relisted'] += self.prices.stats['relisted'] - before['relisted']
+
+    def _send_price_drops(self):
+        """Email price drops of known listings found so far"""
+        if not self.prices.drops:
+            return
+        logger.info(f"📧 Sending email with {len(self.prices.drops)} price drops")
+        if self.email.send_price_drops_email(self.prices.drops):
+            self.prices.drops = []
+
+    def _advance_safely(self, entry: Dict[str, Any], existing_hashes: set) -> Optional[Dict[str, Any]]:
+        """
+        Advance an entry, recording failures for retry with back-off
 
-                if url_hash in existing_hashes:
-                    self.stats['duplicates_skipped'] += 1
-                    logger.debug("  ⊘ Duplicate (already in DB)")
-                    continue
+        Args:
+            entry: Pipeline entry
+            existing_hashes: Set of existing URL hashes
 
-                # Merge extracted data with original finding
-                listing = {
-                    **extracted,
-                    'link': url,
-                    'url_hash': url_hash,
-                    'criteria_id': criteria.get('id'),
-                    'source_name': finding.get('source_name'),
-                    'source_type': finding.get('source_type')
-                }
-
-                results.append(listing)
-                self.stats['listings_found'] += 1
-
-            except Exception as e:
-                logger.error(f"  ❌ Extraction failed: {e}")
-                continue
+        Returns:
+            Saved listing row or None
+        """
+        try:
+            return self._advance(entry, existing_hashes)
+        except Exception as e:
+            if self.pipeline.fail(entry, str(e)):
+                logger.warning(f"  ⚠️  Finding failed after stage {entry['stage']}, will retry: {e}")
+            else:
+                logger.error(f"  ❌ Finding failed after {entry['attempts']} attempts: {e}")
+            return None
+
+    def _advance(self, entry: Dict[str, Any], existing_hashes: set) -> Optional[Dict[str, Any]]:
+        """
+        Move an entry through the remaining stages
+
+        fetched -> prefiltered (not a duplicate) -> extracted (OpenAI) ->
+        matched (criteria and country) -> saved (Supabase). Each stage is
+        persisted before the next starts.
+
+        Args:
+            entry: Pipeline entry (updated in place)
+            existing_hashes: Set of existing URL hashes (saved listings are added)
+
+        Returns:
+            Saved listing row, or None if the finding was rejected
 
-        return results
+        Raises:
+            Exception on transient failures (extraction, saving)
+        """
+        url_hash = entry['url_hash']
+        finding = entry_finding(entry)
+
+        # Check duplicates before paying for extraction
+        if entry['stage'] == pipeline_state.FETCHED:
+            if url_hash in existing_hashes:
+                self.stats['duplicates_skipped'] += 1
+                logger.debug("  ⊘ Duplicate (already in DB)")
+                self.pipeline.reject(entry, 'Duplicate')
+                return None
+            self.pipeline.advance(entry, pipeline_state.PREFILTERED)
+
+        # Extract structured data
+        if entry['stage'] == pipeline_state.PREFILTERED:
+            extracted = self.openai.extract_watch_data(
+                finding.raw_html or '',
+                finding.source_name,
+                raise_errors=True
+            )
+            if not extracted:
+                self.pipeline.reject(entry, 'Low confidence')
+                return None
+            # Card text is kept for duplicate detection, raw HTML is not needed past extraction
+            extracted['description'] = html_to_text(finding.raw_html, max_length=1000)
+            self.pipeline.advance(entry, pipeline_state.EXTRACTED, extracted=extracted)
+
+        if entry['stage'] == pipeline_state.EXTRACTED:
+            # Check if matches criteria
+            criteria = self.criteria_by_id.get(finding.criteria_id, {})
+            if not self.openai.match_search_criteria(entry['extracted'], criteria):
+                logger.debug("  ⊘ Doesn't match criteria")
+                self.pipeline.reject(entry, "Doesn't match criteria")
+                return None
+
+            # Filter by country
+            allowed_countries = criteria.get('allowed_countries', [])
+            if not self.openai.filter_by_country(entry['extracted'], allowed_countries):
+                logger.debug("  ⊘ Filtered by country")
+                self.pipeline.reject(entry, 'Filtered by country')
+                return None
+            self.pipeline.advance(entry, pipeline_state.MATCHED)
+
+        if entry['stage'] != pipeline_state.MATCHED:
+            return None
+
+        # Saved meanwhile (same listing found for another criteria)
+        if url_hash in existing_hashes:
+            self.stats['duplicates_skipped'] += 1
+            self.pipeline.reject(entry, 'Duplicate')
+            return None
+
+        listing = ExtractedListing.from_extraction(entry['extracted'], finding, url_hash)
+        self.stats['listings_found'] += 1
+        return self._save_listing(entry, listing, existing_hashes)
+
+    def _save_listing(
+        self,
+        entry: Dict[str, Any],
+        listing: ExtractedListing,
+        existing_hashes: set
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Save listing to database
+
+        Args:
+            entry: Pipeline entry of the listing
+            listing: Extracted listing
+            existing_hashes: Set of existing URL hashes (saved listing is added)
+
+        Returns:
+            Saved listing row, or None if another run saved the URL first
 
-    def _save_listings(self, listings: List[Dict[str, Any]]) -> int:
+        Raises:
+            RuntimeError if Supabase rejected the row (retried)
         """
-        Save listings to database
+        # Build listing data for Supabase, scored before the listing joins its market
+        listing_data = {**ListingRow.from_listing(listing).to_dict(), **self.market.deal_score(listing)}
+        signature = listing_signature(listing.title, listing.description)
+        listing_data['dedup_signature'] = signature or None
+        listing_data['image_hash'] = self._image_hash(listing.image_url)
+        listing_data['canonical_id'] = self.dedup.find_canonical(listing_data, signature)
+
+        try:
+            listing_id = self.db.create_listing(listing_data, raise_duplicates=True)
+        except DuplicateListingError:
+            existing_hashes.add(listing.url_hash)
+            self.stats['duplicates_skipped'] += 1
+            logger.debug("  ⊘ Duplicate (saved meanwhile by another run)")
+            self.pipeline.reject(entry, 'Duplicate')
+            return None
+        if not listing_id:
+            raise RuntimeError("Failed to save listing")
+        existing_hashes.add(listing.url_hash)
+        self.pipeline.advance(entry, pipeline_state.SAVED, listing=listing_data)
+        self.prices.record(listing_id, listing.price, listing.currency)
+        self.market.add(listing)
+        self.dedup.add(listing_id, listing_data, signature, listing_data['canonical_id'])
+
+        # Track for email - duplicates of listings found earlier aren't sent again
+        if listing_data['canonical_id']:
+            self.stats['duplicates_clustered'] += 1
+            logger.info(f"  🧬 Same watch as listing {listing_data['canonical_id']}: {listing.link}")
+        else:
+            self.new_listings.append(listing_data)
+        self.saved_entries.append(entry)
+        self.first_saved_at.setdefault(listing.criteria_id, datetime.now(timezone.utc))
+        self.stats['listings_saved'] += 1
+        return listing_data
+
+    def _image_hash(self, image_url: Optional[str]) -> Optional[int]:
+        """
+        Perceptual hash of a listing photo
 
         Args:
-            listings: Extracted listings
+            image_url: Photo URL from the result card
 
         Returns:
-            Number of listings saved
+            dHash as signed 64-bit integer, or None without (fetchable) photo
         """
-        saved = 0
-
-        for listing in listings:
-            try:
-                # Build listing data for Supabase
-                listing_data = {
-                    'name': f"{listing.get('manufacturer', 'Unknown')} {listing.get('model', '')}",
-                    'manufacturer': listing.get('manufacturer', ''),
-                    'model': listing.get('model', ''),
-                    'reference_number': listing.get('reference_number', ''),
-                    'year': listing.get('year'),
-                    'condition': listing.get('condition', 'Unbekannt'),
-                    'price': listing.get('price'),
-                    'currency': listing.get('currency', 'EUR'),
-                    'location': listing.get('location', ''),
-                    'country': listing.get('country', ''),
-                    'link': listing.get('link', ''),
-                    'seller_name': listing.get('seller_name', ''),
-                    'seller_url': listing.get('seller_url', ''),
-                    'source': listing.get('source_name', 'Unknown'),
-                    'source_type': listing.get('source_type', 'Unknown'),
-                    'url_hash': listing.get('url_hash', ''),
-                    'search_criteria_id': listing.get('criteria_id'),
-                }
-
-                # Create in Supabase
-                self.db.create_listing(listing_data)
-
-                # Track for email
-                self.new_listings.append(listing_data)
-
-                saved += 1
-                self.stats['listings_saved'] += 1
-
-            except Exception as e:
-                logger.error(f"  ❌ Failed to save listing: {e}")
-                continue
+        if not self.thumbnails or not image_url:
+            return None
+        value = dhash(self.thumbnails.get(image_url))
+        return to_signed(value) if value is not None else None
 
-        return saved
+    def reset_results(self):
+        """Forget listings collected so far (queue workers reuse one searcher for many tasks)"""
+        self.new_listings = []
+        self.saved_entries = []
+        self.first_saved_at.clear()
+
+    def mark_notified(self):
+        """Mark listings saved so far as notified (email sent or handed to the coordinator)"""
+        self.pipeline.mark_notified(self.saved_entries)
+        self.saved_entries = []
 
     def _log_summary(self):
         """Log execution summary"""
@@ -294,19 +859,119 @@ class WatchSearcher:
         logger.info("=" * 60)
         logger.info(f"Sources checked:     {self.stats['sources_checked']}")
         logger.info(f"Sources failed:      {self.stats['sources_failed']}")
+        logger.info(f"Sources skipped:     {self.stats['sources_skipped']}")
         logger.info(f"Listings found:      {self.stats['listings_found']}")
         logger.info(f"Listings saved:      {self.stats['listings_saved']}")
         logger.info(f"Duplicates skipped:  {self.stats['duplicates_skipped']}")
+        logger.info(f"Probably sold:       {self.stats['listings_flagged']}")
+        logger.info(f"Prices changed:      {self.stats['prices_changed']}")
+        logger.info(f"Relisted:            {self.stats['listings_relisted']}")
+        logger.info(f"Cross-source dupes:  {self.stats['duplicates_clustered']}")
+        logger.info(f"Searches deferred:   {self.stats['searches_deferred']}")
+        logger.info(f"Searches not due:    {self.stats['searches_not_due']}")
         logger.info(f"Duration:            {self.stats['duration_seconds']}s")
         logger.info(f"Status:              {self.stats['status']}")
         logger.info("=" * 60)
 
+        latency = get_latency_tracker().report()
+        if latency:
+            logger.info("⏱️  Fetch latency per domain (p50 / p95 / p99, hedges sent/won)")
+            for domain, stats in sorted(latency.items()):
+                logger.info(
+                    f"  {domain:<30} {stats['p50']:.2f}s / {stats['p95']:.2f}s / {stats['p99']:.2f}s "
+                    f"({stats['count']} fetches, {stats.get('hedges_sent', 0)}/{stats.get('hedges_won', 0)})"
+                )
+
+
+def _filter_rows(rows: List[Dict[str, Any]], names: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """Keep rows whose id or name is in names (case-insensitive, None = all)"""
+    if not names:
+        return rows
+    wanted = {n.strip().lower() for n in names}
+    return [r for r in rows if str(r.get('id')).lower() in wanted or (r.get('name') or '').lower() in wanted]
+
+
+def combine_shards(db: SupabaseClient, run_id: str) -> Dict[str, Any]:
+    """
+    Merge the sync_history rows of all shards of a run into one summary
+
+    Args:
+        db: Supabase client
+        run_id: Shared run ID
+
+    Returns:
+        Combined stats (counts summed, duration = slowest shard)
+    """
+    rows = db.get_run_history(run_id)
+    combined = {
+        'run_id': run_id,
+        'shards': sorted(r.get('shard') or 'all' for r in rows),
+        'sources_checked': sum(r.get('sources_checked') or 0 for r in rows),
+        'sources_failed': sum(r.get('sources_failed') or 0 for r in rows),
+        'listings_found': sum(r.get('listings_found') or 0 for r in rows),
+        'listings_saved': sum(r.get('listings_saved') or 0 for r in rows),
+        'duplicates_skipped': sum(r.get('duplicates_skipped') or 0 for r in rows),
+        'duration_seconds': max((r.get('duration_seconds') or 0 for r in rows), default=0),
+    }
+    statuses = {r.get('status') for r in rows}
+    if not rows or statuses == {'Failed'}:
+        combined['status'] = 'Failed'
+    elif 'Failed' in statuses or 'Partial' in statuses:
+        combined['status'] = 'Partial'
+    else:
+        combined['status'] = 'Success'
+
+    logger.info("=" * 60)
+    logger.info(f"📊 COMBINED SUMMARY - run {run_id} ({len(rows)} shards: {', '.join(combined['shards'])})")
+    logger.info("=" * 60)
+    for key in ('sources_checked', 'sources_failed', 'listings_found', 'listings_saved',
+                'duplicates_skipped', 'duration_seconds', 'status'):
+        logger.info(f"{key.replace('_', ' ').capitalize() + ':':<21}{combined[key]}")
+    logger.info("=" * 60)
+    return combined
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command line flags"""
+    parser = argparse.ArgumentParser(description='Search all active sources for all active criteria')
+    parser.add_argument('--shard', type=parse_shard, metavar='i/N',
+                        help='Only search sources whose domain hashes to shard i of N')
+    parser.add_argument('--sources', type=lambda v: v.split(','), metavar='NAMES',
+                        help='Comma-separated source names or IDs')
+    parser.add_argument('--criteria', type=lambda v: v.split(','), metavar='NAMES',
+                        help='Comma-separated criteria names or IDs')
+    parser.add_argument('--run-id', default=os.getenv('SEARCH_RUN_ID'),
+                        help='Run ID shared by all shards (default with --shard: current hour)')
+    parser.add_argument('--combine', metavar='RUN_ID',
+                        help='Merge the logged stats of all shards of a run and exit')
+    parser.add_argument('--backfill', action='store_true',
+                        help='Only search criteria added or changed since their last backfill')
+    args = parser.parse_args(argv)
+
+    # Shards started by the same cron tick agree on the run ID without coordination
+    if args.shard and not args.run_id:
+        args.run_id = datetime.now().strftime('%Y-%m-%dT%H')
+    return args
+
 
 def main():
     """Entry point"""
+    args = parse_args()
     try:
-        searcher = WatchSearcher()
-        searcher.run()
+        if args.combine:
+            combine_shards(SupabaseClient(), args.combine)
+            return
+
+        searcher = WatchSearcher(
+            shard=args.shard,
+            source_filter=args.sources,
+            criteria_filter=args.criteria,
+            run_id=args.run_id
+        )
+        if args.backfill:
+            searcher.run_backfill(_filter_rows(searcher.db.get_pending_backfills(), args.criteria))
+        else:
+            searcher.run()
     except Exception as e:
         logger.error(f"Fatal error: {e}", exc_info=True)
         sys.exit(1)